@@ -3,6 +3,7 @@ from django.apps import AppConfig
 from django.db.models.signals import post_migrate
 from django.conf import settings
 from aircraft_manufacturing.logger import django_logger
+from aircraft_manufacturing.search import create_trigram_search_indexes
 
 def create_initial_team_types(sender, **kwargs):
     """Create default team types if they don't exist."""
@@ -77,6 +78,9 @@ class AccountsConfig(AppConfig):
         Connect signals when the app is ready.
         This method is called once when Django starts.
         """
+        # Indexes are created on test databases too, only initial data is skipped
+        post_migrate.connect(create_trigram_search_indexes, sender=self)
+
         # Skip automatic creation during tests or when explicitly disabled
         if getattr(settings, 'SKIP_INITIAL_DATA', False):
             return
@@ -1,5 +1,15 @@
 from rest_framework import permissions
 
+
+def is_read_request(request, view) -> bool:
+    """
+    Whether the request only reads: a safe method, or an action the view lists in
+    read_only_actions, e.g. a lookup taking its ids in a POST body.
+    """
+    return request.method in permissions.SAFE_METHODS or getattr(view, 'action', None) in getattr(
+        view, 'read_only_actions', ()
+    )
+
 class AllowAny(permissions.BasePermission):
     """
     Custom permission to allow any request.
@@ -15,7 +25,7 @@ class IsSuperUserOrReadOnly(permissions.BasePermission):
     """
     def has_permission(self, request, view):
         # Read permissions are allowed to any authenticated request
-        if request.method in permissions.SAFE_METHODS:
+        if is_read_request(request, view):
             return request.user and request.user.is_authenticated
         
         # Write permissions are only allowed to superusers
@@ -29,7 +39,7 @@ class IsMemberOfTeam(permissions.BasePermission):
     """
     def has_permission(self, request, view):
         # Read permissions are allowed to any authenticated request
-        if request.method in permissions.SAFE_METHODS:
+        if is_read_request(request, view):
             return request.user and request.user.is_authenticated
         
         # Write permissions are only allowed to team members
@@ -43,7 +53,7 @@ class IsMemberOfAssemblyTeam(permissions.BasePermission):
     """
     def has_permission(self, request, view):
         # Read permissions are allowed to any authenticated request
-        if request.method in permissions.SAFE_METHODS:
+        if is_read_request(request, view):
             return request.user and request.user.is_authenticated
         
         # Write permissions are only allowed to assemblers
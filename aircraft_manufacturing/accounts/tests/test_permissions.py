@@ -3,7 +3,7 @@ from django.contrib.auth.models import User
 from rest_framework.test import APIRequestFactory
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.permissions import IsAuthenticated
-from accounts.permissions import IsSuperUserOrReadOnly
+from accounts.permissions import IsMemberOfAssemblyTeam, IsSuperUserOrReadOnly
 from accounts.models import TeamType
 
 class MockViewSet(ModelViewSet):
@@ -81,3 +81,15 @@ class IsSuperUserOrReadOnlyTests(TestCase):
                     self.permission.has_permission(request, self.view),
                     f"{method.upper()} should not be allowed for unauthenticated users"
                 )
+
+    def test_read_only_actions(self):
+        """Test that a POST to an action the view lists as read-only is checked as a read"""
+        request = self.factory.post('/')
+        request.user = self.regular_user
+        self.view.read_only_actions = ('multi',)
+        for permission in (self.permission, IsMemberOfAssemblyTeam()):
+            with self.subTest(permission=type(permission).__name__):
+                self.view.action = 'multi'
+                self.assertTrue(permission.has_permission(request, self.view))
+                self.view.action = 'create'
+                self.assertFalse(permission.has_permission(request, self.view))
@@ -0,0 +1,243 @@
+import csv
+import io
+import queue
+import threading
+import zlib
+from itertools import chain
+from typing import Iterable, Iterator, List, Sequence, Tuple
+from django.conf import settings
+from django.db import connections
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+from drf_yasg import openapi
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.encoders import JSONEncoder
+from aircraft_manufacturing.logger import django_logger
+
+# (header, queryset lookup) pairs describing the exported columns
+ExportColumns = Sequence[Tuple[str, str]]
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+}
+EXPORT_CHUNK_SIZE = 2000
+# Rows are buffered up to this many bytes before being handed to the server
+EXPORT_BUFFER_SIZE = 64 * 1024
+# Maximum number of COPY blocks waiting to be sent before the database side pauses
+COPY_QUEUE_SIZE = 64
+# Seconds the response waits for a cancelled COPY to stop before leaving its thread behind
+COPY_JOIN_TIMEOUT = 5
+
+EXPORT_PARAMETERS = [
+    openapi.Parameter(
+        'file_format',
+        openapi.IN_QUERY,
+        description="Export format (csv, ndjson, json). Defaults to csv",
+        type=openapi.TYPE_STRING,
+        required=False
+    ),
+    openapi.Parameter(
+        'gzip',
+        openapi.IN_QUERY,
+        description="Compress the export with gzip on the fly",
+        type=openapi.TYPE_BOOLEAN,
+        required=False
+    ),
+]
+
+
+def get_export_options(request) -> Tuple[str, bool]:
+    """Read and validate the export format and compression query parameters."""
+    file_format = request.query_params.get('file_format', 'csv').lower()
+    if file_format not in EXPORT_FORMATS:
+        raise ValidationError({'file_format': f"Unsupported format: {file_format}"})
+    compress = request.query_params.get('gzip', 'false').lower() in ('1', 'true', 'yes')
+    return file_format, compress
+
+
+def buffer_chunks(chunks: Iterable[str], size: int = EXPORT_BUFFER_SIZE) -> Iterator[bytes]:
+    """Join small text chunks into larger encoded blocks to keep per-row overhead low."""
+    buffer = []
+    buffered = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= size:
+            yield ''.join(buffer).encode()
+            buffer = []
+            buffered = 0
+    if buffer:
+        yield ''.join(buffer).encode()
+
+
+def iter_csv(rows: Iterable[tuple], headers: List[str]) -> Iterator[str]:
+    """Render rows as CSV lines, one string per row."""
+    line = io.StringIO()
+    writer = csv.writer(line)
+    for values in chain([headers], rows):
+        writer.writerow(values)
+        yield line.getvalue()
+        line.seek(0)
+        line.truncate()
+
+
+def iter_ndjson(rows: Iterable[tuple], headers: List[str]) -> Iterator[str]:
+    """Render rows as newline delimited JSON objects."""
+    encoder = JSONEncoder(ensure_ascii=False)
+    for values in rows:
+        yield encoder.encode(dict(zip(headers, values))) + '\n'
+
+
+def iter_json_array(rows: Iterable[tuple], headers: List[str]) -> Iterator[str]:
+    """Render rows as the objects of one JSON array."""
+    encoder = JSONEncoder(ensure_ascii=False)
+    yield '['
+    for index, values in enumerate(rows):
+        yield (',' if index else '') + encoder.encode(dict(zip(headers, values)))
+    yield ']'
+
+
+def gzip_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Compress a byte stream into the gzip format chunk by chunk."""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def iter_export(queryset: QuerySet, columns: ExportColumns, file_format: str,
+                chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Stream the queryset rows in the requested format.
+
+    Rows are fetched as plain tuples with a server-side cursor where the database
+    supports it, so memory use stays constant regardless of the result size.
+    """
+    headers = [header for header, _ in columns]
+    rows = queryset.prefetch_related(None).values_list(
+        *[lookup for _, lookup in columns]
+    ).iterator(chunk_size=chunk_size)
+    render = {'csv': iter_csv, 'ndjson': iter_ndjson, 'json': iter_json_array}[file_format]
+    return buffer_chunks(render(rows, headers))
+
+
+class CopyCancelled(Exception):
+    """Raised inside COPY when the consumer stopped reading the stream."""
+
+
+class _CopyWriter:
+    """File-like object batching COPY output and handing it to the consuming thread."""
+
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=COPY_QUEUE_SIZE)
+        self.cancelled = threading.Event()
+        self.buffer = bytearray()
+
+    def write(self, data):
+        self.buffer += data
+        if len(self.buffer) >= EXPORT_BUFFER_SIZE:
+            self.flush()
+        return len(data)
+
+    def flush(self):
+        block = bytes(self.buffer)
+        self.buffer.clear()
+        self.put(block)
+
+    def put(self, item):
+        while True:
+            if self.cancelled.is_set():
+                raise CopyCancelled()
+            try:
+                self.queue.put(item, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+
+def can_copy_export(queryset: QuerySet, file_format: str) -> bool:
+    """Whether the COPY TO fast path can serve this export."""
+    if file_format != 'csv' or not getattr(settings, 'EXPORT_USE_COPY', True):
+        return False
+    return connections[queryset.db].vendor == 'postgresql'
+
+
+def iter_copy_export(queryset: QuerySet, columns: ExportColumns) -> Iterator[bytes]:
+    """
+    Stream the queryset rows as CSV produced by PostgreSQL's COPY TO STDOUT.
+
+    The SELECT is compiled from the filtered queryset, so every filter and ordering
+    applies unchanged. Values are rendered by PostgreSQL, e.g. booleans as t/f.
+    COPY runs in a worker thread that pushes blocks through a bounded queue, which
+    keeps memory constant and pauses the database side when the client is slow.
+    """
+    connection = connections[queryset.db]
+    values = queryset.prefetch_related(None).values_list(*[lookup for _, lookup in columns])
+    sql, params = values.query.sql_with_params()
+
+    connection.ensure_connection()
+    writer = _CopyWriter()
+    finished = object()
+
+    def run_copy():
+        # The cursor lives in the thread only, a response which is never iterated opens none
+        try:
+            with connection.connection.cursor() as cursor:
+                copy_sql = "COPY ({}) TO STDOUT WITH CSV".format(cursor.mogrify(sql, params).decode())
+                cursor.copy_expert(copy_sql, writer)
+            writer.flush()
+            writer.put(finished)
+        except CopyCancelled:
+            pass
+        except Exception as e:
+            # Handed over like the blocks, the consumer may be gone with the queue full
+            try:
+                writer.put(e)
+            except CopyCancelled:
+                pass
+
+    header = io.StringIO()
+    csv.writer(header).writerow([header_name for header_name, _ in columns])
+
+    def stream():
+        thread = threading.Thread(target=run_copy, daemon=True)
+        thread.start()
+        try:
+            yield header.getvalue().encode()
+            while True:
+                block = writer.queue.get()
+                if block is finished:
+                    break
+                if isinstance(block, Exception):
+                    raise block
+                yield block
+        finally:
+            writer.cancelled.set()
+            thread.join(timeout=COPY_JOIN_TIMEOUT)
+            if thread.is_alive():
+                django_logger.warning("COPY export did not stop after the stream was closed")
+
+    return stream()
+
+
+def streaming_export_response(request, queryset: QuerySet, columns: ExportColumns, filename: str) -> StreamingHttpResponse:
+    """Build a streaming file response for the queryset using the request's export options."""
+    file_format, compress = get_export_options(request)
+    if can_copy_export(queryset, file_format):
+        stream = iter_copy_export(queryset, columns)
+    else:
+        stream = iter_export(queryset, columns, file_format)
+    filename = f"{filename}.{file_format}"
+    content_type = EXPORT_FORMATS[file_format]
+    if compress:
+        stream = gzip_stream(stream)
+        filename = f"{filename}.gz"
+        content_type = 'application/gzip'
+
+    response = StreamingHttpResponse(stream, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,94 @@
+"""Fetching many objects of a viewset by id in one request."""
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from aircraft_manufacturing.responses import GeneralFailedResponseSerializer
+
+# Objects fetched by one multi-get request
+MULTI_GET_MAX_IDS = 500
+
+MULTI_GET_RESPONSE = openapi.Response(
+    description="Objects in the requested order, null where no object has the id",
+    schema=openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        properties={
+            'results': openapi.Schema(
+                type=openapi.TYPE_ARRAY,
+                items=openapi.Schema(type=openapi.TYPE_OBJECT, x_nullable=True)
+            ),
+            'not_found': openapi.Schema(
+                type=openapi.TYPE_ARRAY,
+                items=openapi.Schema(type=openapi.TYPE_INTEGER)
+            ),
+        },
+    ),
+)
+
+
+class MultiGetSerializer(serializers.Serializer):
+    """Serializer validating the ids of a multi-get request"""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        min_length=1,
+        max_length=MULTI_GET_MAX_IDS,
+        help_text="IDs of the objects to fetch"
+    )
+
+
+class MultiGetMixin:
+    """
+    Add a multi action fetching many objects by id with the queryset of the viewset.
+
+    Ids are given as ?ids=1,2,3 or, for large sets, as {"ids": [...]} in a POST body.
+    The action runs with the permissions of the viewset and counts as a read for them.
+    """
+    read_only_actions = ('multi',)
+
+    @swagger_auto_schema(
+        method='get',
+        operation_summary="Get many by id",
+        operation_description=f"Get up to {MULTI_GET_MAX_IDS} objects by id in the requested order",
+        manual_parameters=[
+            openapi.Parameter(
+                'ids',
+                openapi.IN_QUERY,
+                description="Comma separated IDs",
+                type=openapi.TYPE_STRING,
+                required=True
+            ),
+        ],
+        responses={
+            status.HTTP_200_OK: MULTI_GET_RESPONSE,
+            status.HTTP_400_BAD_REQUEST: GeneralFailedResponseSerializer,
+        }
+    )
+    @swagger_auto_schema(
+        method='post',
+        operation_summary="Get many by id",
+        operation_description=f"Get up to {MULTI_GET_MAX_IDS} objects by id in the requested order, "
+                              "for id lists too long for a query string",
+        request_body=MultiGetSerializer,
+        responses={
+            status.HTTP_200_OK: MULTI_GET_RESPONSE,
+            status.HTTP_400_BAD_REQUEST: GeneralFailedResponseSerializer,
+        }
+    )
+    @action(detail=False, methods=['get', 'post'], url_path='multi', pagination_class=None, filterset_class=None)
+    def multi(self, request, *args, **kwargs):
+        """Fetch many objects by id in one query."""
+        if request.method == 'GET':
+            data = {'ids': [part for part in request.query_params.get('ids', '').split(',') if part.strip()]}
+        else:
+            data = request.data
+        serializer = MultiGetSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+
+        found = list(self.get_queryset().filter(pk__in=set(ids)))
+        by_id = {obj.pk: row for obj, row in zip(found, self.get_serializer(found, many=True).data)}
+        return Response({
+            'results': [by_id.get(pk) for pk in ids],
+            'not_found': [pk for pk in dict.fromkeys(ids) if pk not in by_id],
+        })
@@ -0,0 +1,77 @@
+"""Trigram indexes for the substring (icontains) searches of the list filters on PostgreSQL."""
+from typing import List, Type
+from django.apps import apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections, models, transaction
+from django.db.models.functions import Cast, Upper
+from aircraft_manufacturing.logger import django_logger
+
+# Columns searched with icontains as (model, field). On PostgreSQL icontains compiles to
+# UPPER(column::text) LIKE UPPER(pattern), so the indexes are on that expression.
+TRIGRAM_INDEXES = [
+    ('inventory.Part', 'serial_number'),
+    ('assembly.Aircraft', 'serial_number'),
+    ('accounts.Team', 'name'),
+    ('auth.User', 'username'),
+    ('auth.User', 'email'),
+]
+
+
+def get_trigram_index_name(model: Type[models.Model], field_name: str) -> str:
+    return f"{model._meta.db_table}_{field_name}_trgm"
+
+
+def get_trigram_index(model: Type[models.Model], field_name: str):
+    """Build the GIN trigram index on the upper cased text of a field."""
+    from django.contrib.postgres.indexes import GinIndex, OpClass
+
+    return GinIndex(
+        OpClass(Upper(Cast(field_name, models.TextField())), name='gin_trgm_ops'),
+        name=get_trigram_index_name(model, field_name),
+    )
+
+
+def has_trigram_extension(using: str = DEFAULT_DB_ALIAS) -> bool:
+    """Check whether pg_trgm is installed in the database."""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')")
+        return cursor.fetchone()[0]
+
+
+def create_trigram_indexes(using: str = DEFAULT_DB_ALIAS) -> List[str]:
+    """
+    Create the pg_trgm extension and the missing trigram indexes, returns the created index names.
+
+    Does nothing on other databases, where icontains stays a plain LIKE. When the
+    extension cannot be created, e.g. without the privilege, the searches keep
+    working on sequential scans and a warning is logged.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql' or not getattr(settings, 'TRIGRAM_SEARCH_INDEXES', True):
+        return []
+    try:
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    except DatabaseError as e:
+        django_logger.warning(f"pg_trgm is not available, substring searches are not indexed: {e}")
+        return []
+
+    created = []
+    with connection.schema_editor() as schema_editor, connection.cursor() as cursor:
+        for label, field_name in TRIGRAM_INDEXES:
+            model = apps.get_model(label)
+            existing = connection.introspection.get_constraints(cursor, model._meta.db_table)
+            index = get_trigram_index(model, field_name)
+            if index.name not in existing:
+                schema_editor.add_index(model, index)
+                created.append(index.name)
+    return created
+
+
+def create_trigram_search_indexes(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    """Create the trigram indexes after migrate, migrations are generated per deployment."""
+    for name in create_trigram_indexes(using):
+        django_logger.info(f"Trigram index {name} created successfully.")
@@ -0,0 +1,118 @@
+"""Compact integer serial numbers with a prefix plus base36 display form."""
+import secrets
+from typing import Callable, List, Optional, Tuple, Type
+from django.db import connection, models, transaction
+
+SERIAL_DIGITS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+# Digits of the display form, smaller values are zero padded so the form sorts like the value
+SERIAL_WIDTH = 8
+SERIAL_SPACE = 36 ** SERIAL_WIDTH
+SERIAL_BACKFILL_CHUNK_SIZE = 10000
+# Rows per UPDATE of a backfill chunk where it is a CASE expression with a branch per row
+SERIAL_BACKFILL_BATCH_SIZE = 1000
+
+
+def format_serial(prefix: str, value: int) -> str:
+    """Format an integer serial as the prefix followed by its zero padded base36 digits."""
+    digits = ''
+    while value:
+        value, digit = divmod(value, 36)
+        digits = SERIAL_DIGITS[digit] + digits
+    return prefix + digits.rjust(SERIAL_WIDTH, '0')
+
+
+def parse_serial(prefix: str, serial_number: str) -> Optional[int]:
+    """
+    Get the integer value of a serial number in the display form of the prefix.
+
+    Existing hexadecimal serials like P-1A2B3C4D are valid base36 and keep their
+    string. Returns None for any other format, which is only stored as a string.
+    """
+    if not serial_number or not serial_number.startswith(prefix):
+        return None
+    digits = serial_number[len(prefix):]
+    if len(digits) != SERIAL_WIDTH or any(digit not in SERIAL_DIGITS for digit in digits):
+        return None
+    return int(digits, 36)
+
+
+def get_serial_range(prefix: str, text: str) -> Optional[Tuple[int, int]]:
+    """
+    Get the range of integer serials whose display form starts with the text.
+
+    Returns None when the text is not the start of a serial of the prefix, e.g. a
+    fragment from the middle of one, which has to be matched against the strings.
+    """
+    text = text.strip().upper()
+    if len(text) <= len(prefix) or not text.startswith(prefix):
+        return None
+    digits = text[len(prefix):]
+    if len(digits) > SERIAL_WIDTH or any(digit not in SERIAL_DIGITS for digit in digits):
+        return None
+    return int(digits.ljust(SERIAL_WIDTH, '0'), 36), int(digits.ljust(SERIAL_WIDTH, 'Z'), 36)
+
+
+def get_serial_prefix_q(prefix: str, text: str) -> Optional[models.Q]:
+    """
+    Match serial numbers starting with the text on the integer serial index.
+
+    Rows not backfilled yet only have the string and are matched on it. Returns None
+    when the text is not the start of a serial of the prefix.
+    """
+    serial_range = get_serial_range(prefix, text)
+    if serial_range is None:
+        return None
+    return models.Q(serial__range=serial_range) | models.Q(serial__isnull=True, serial_number__istartswith=text.strip())
+
+
+def random_serial() -> int:
+    """Draw a random integer serial, its display form is SERIAL_WIDTH digits long."""
+    return secrets.randbelow(SERIAL_SPACE)
+
+
+def _update_serials(model: Type[models.Model], rows: List[models.Model]):
+    """Write the serials of the rows, joining a VALUES list on PostgreSQL."""
+    if not rows:
+        return
+    if connection.vendor != 'postgresql':
+        model.objects.bulk_update(rows, ['serial'], batch_size=SERIAL_BACKFILL_BATCH_SIZE)
+        return
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {table} SET serial = serials.serial FROM (VALUES {', '.join(['(%s, %s)'] * len(rows))}) "
+            f"AS serials (id, serial) WHERE {table}.id = serials.id",
+            [value for row in rows for value in (row.id, row.serial)]
+        )
+
+
+def backfill_serials(model: Type[models.Model], prefix: str, chunk_size: int = SERIAL_BACKFILL_CHUNK_SIZE,
+                     progress: Optional[Callable[[int, int], None]] = None) -> Tuple[int, int]:
+    """
+    Fill the integer serial of rows stored before it existed, from their serial number strings.
+
+    Rows are read in keyset ordered chunks of ids, each chunk is written in its own
+    transaction. Serial numbers in another format are left as
+    strings only. Returns the filled and skipped rows, progress is called with both
+    after every chunk.
+    """
+    filled = skipped = 0
+    last_id = 0
+    while True:
+        rows = list(model.objects.filter(serial__isnull=True, id__gt=last_id).order_by('id').values_list(
+            'id', 'serial_number'
+        )[:chunk_size])
+        if not rows:
+            return filled, skipped
+        last_id = rows[-1][0]
+        updates = [
+            model(id=row_id, serial=serial)
+            for row_id, serial in ((row_id, parse_serial(prefix, serial_number)) for row_id, serial_number in rows)
+            if serial is not None
+        ]
+        with transaction.atomic():
+            _update_serials(model, updates)
+        filled += len(updates)
+        skipped += len(rows) - len(updates)
+        if progress:
+            progress(filled, skipped)
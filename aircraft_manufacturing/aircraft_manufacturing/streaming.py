@@ -0,0 +1,105 @@
+"""Incremental JSON rendering of responses too large to build in memory."""
+from collections.abc import Iterator as IteratorABC
+from itertools import islice
+from typing import Any, Iterable, Iterator, Optional, Tuple, Type
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+from rest_framework import serializers
+from rest_framework.compat import LONG_SEPARATORS, SHORT_SEPARATORS
+from rest_framework.renderers import JSONRenderer
+from .exports import EXPORT_CHUNK_SIZE, buffer_chunks
+
+
+class JSONObjectStream:
+    """(key, value) pairs rendered as a JSON object as they are produced, iterated once."""
+
+    def __init__(self, items: Iterable[Tuple[str, Any]]):
+        self.items = items
+
+    def __iter__(self):
+        return iter(self.items)
+
+
+def is_streamed(data: Any) -> bool:
+    """Whether the data is, or contains, a value rendered incrementally."""
+    if isinstance(data, (JSONObjectStream, QuerySet, IteratorABC)):
+        return True
+    if isinstance(data, dict):
+        return any(is_streamed(value) for value in data.values())
+    if isinstance(data, (list, tuple)):
+        return any(is_streamed(value) for value in data)
+    return False
+
+
+def iter_serialized(queryset: QuerySet, serializer_class: Type[serializers.Serializer],
+                    chunk_size: int = EXPORT_CHUNK_SIZE, context: Optional[dict] = None) -> Iterator[dict]:
+    """
+    Serialize the queryset a chunk of rows at a time.
+
+    Rows are read with a server-side cursor where the database supports it and
+    prefetches run per chunk, so only one chunk of instances is held at once.
+    """
+    rows = queryset.iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield from serializer_class(chunk, many=True, context=context or {}).data
+
+
+def iter_json(data: Any, encoder) -> Iterator[str]:
+    """
+    Render the data as JSON fragments.
+
+    Dicts and lists without streamed values are encoded in one call. Querysets are
+    iterated in chunks, other iterators and JSONObjectStream are consumed as they are
+    rendered, so they are never held in memory as a whole.
+    """
+    if not is_streamed(data):
+        yield encoder.encode(data)
+    elif isinstance(data, (dict, JSONObjectStream)):
+        yield '{'
+        for index, (key, value) in enumerate(data.items() if isinstance(data, dict) else data):
+            yield f"{',' if index else ''}{encoder.encode(str(key))}:"
+            yield from iter_json(value, encoder)
+        yield '}'
+    else:
+        if isinstance(data, QuerySet):
+            data = data.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        yield '['
+        for index, value in enumerate(data):
+            if index:
+                yield ','
+            yield from iter_json(value, encoder)
+        yield ']'
+
+
+class StreamingJSONRenderer(JSONRenderer):
+    """
+    JSON renderer accepting generators, querysets and JSONObjectStream in the data.
+
+    render() joins the output like JSONRenderer does, render_stream() yields it in
+    blocks for a StreamingHttpResponse, see streaming_json_response.
+    """
+
+    def render_stream(self, data, accepted_media_type=None, renderer_context=None) -> Iterator[bytes]:
+        """Render the data in blocks, without indentation as fragments are encoded separately."""
+        if data is None:
+            return iter(())
+        encoder = self.encoder_class(
+            ensure_ascii=self.ensure_ascii,
+            allow_nan=not self.strict,
+            separators=SHORT_SEPARATORS if self.compact else LONG_SEPARATORS,
+        )
+        return buffer_chunks(iter_json(data, encoder))
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not is_streamed(data):
+            return super().render(data, accepted_media_type, renderer_context)
+        return b''.join(self.render_stream(data, accepted_media_type, renderer_context))
+
+
+def streaming_json_response(data, status: int = 200) -> StreamingHttpResponse:
+    """Build a response rendering the data incrementally while it is sent."""
+    renderer = StreamingJSONRenderer()
+    return StreamingHttpResponse(renderer.render_stream(data), content_type=renderer.media_type, status=status)
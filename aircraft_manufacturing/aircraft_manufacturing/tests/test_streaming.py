@@ -0,0 +1,44 @@
+import json
+from django.test import SimpleTestCase, TestCase
+from rest_framework.renderers import JSONRenderer
+from aircraft_manufacturing.streaming import JSONObjectStream, StreamingJSONRenderer, is_streamed, iter_serialized
+from assembly.tests.test_allocation import AllocationDataMixin
+from inventory.models import Part
+from inventory.serializers import PartSerializer
+
+
+class StreamingDetectionTests(SimpleTestCase):
+    def test_is_streamed(self):
+        """Test that only data holding iterators, querysets or object streams is rendered incrementally"""
+        self.assertFalse(is_streamed({'a': [1, {'b': (2, 3)}]}))
+        self.assertTrue(is_streamed({'a': [1, {'b': iter([2])}]}))
+        self.assertTrue(is_streamed(JSONObjectStream([])))
+
+    def test_plain_data_renders_like_json_renderer(self):
+        """Test that data without streamed values is left to JSONRenderer"""
+        self.assertEqual(StreamingJSONRenderer().render({'a': [1]}), JSONRenderer().render({'a': [1]}))
+        self.assertEqual(list(StreamingJSONRenderer().render_stream(None)), [])
+
+
+class StreamingRendererTests(AllocationDataMixin, TestCase):
+    def setUp(self):
+        self.create_allocation_data()
+        self.create_parts(self.wing_type, 2)
+
+    def test_streaming_renderer_matches_json_renderer(self):
+        """Test that generators, querysets and object streams render like the equivalent lists and dicts"""
+        parts = Part.objects.order_by('id')
+        expected = {
+            'types': {'parts': PartSerializer(parts, many=True).data, 'ids': list(parts.values('id')), 'empty': []},
+            'total': 2,
+        }
+        streamed = JSONObjectStream(iter([
+            ('types', {
+                'parts': iter_serialized(parts, PartSerializer, chunk_size=1),
+                'ids': parts.values('id'),
+                'empty': (part for part in []),
+            }),
+            ('total', 2),
+        ]))
+        rendered = b''.join(StreamingJSONRenderer().render_stream(streamed))
+        self.assertEqual(json.loads(rendered), json.loads(JSONRenderer().render(expected)))
@@ -42,6 +42,7 @@ urlpatterns = [
                             path('accounts/', include('accounts.urls')),
                             path('inventory/', include('inventory.urls')),
                             path('assembly/', include('assembly.urls')),
+                            path('analytics/', include('analytics.urls')),
                             path('auth/', include('rest_framework.urls')),
                         ]
                     ),
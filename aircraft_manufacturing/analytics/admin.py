@@ -0,0 +1,16 @@
+from django.contrib import admin
+from .models import DailyAssembly, DailyPartProduction
+
+
+@admin.register(DailyPartProduction)
+class DailyPartProductionAdmin(admin.ModelAdmin):
+    list_display = ['date', 'team', 'part_type', 'aircraft_type', 'count', 'updated_at']
+    list_filter = ['team', 'part_type', 'aircraft_type']
+    date_hierarchy = 'date'
+
+
+@admin.register(DailyAssembly)
+class DailyAssemblyAdmin(admin.ModelAdmin):
+    list_display = ['date', 'aircraft_type', 'count', 'updated_at']
+    list_filter = ['aircraft_type']
+    date_hierarchy = 'date'
@@ -0,0 +1,50 @@
+"""Configuration for analytics app."""
+from django.apps import AppConfig
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+
+def part_saved(sender, instance, created, raw=False, **kwargs):
+    """Count the units of a newly produced part in the daily production rollup."""
+    if created and not raw:
+        from .rollups import record_part_production
+        record_part_production(instance, sign=1)
+
+
+def part_deleted(sender, instance, **kwargs):
+    """Remove a recycled part from the daily production rollup."""
+    from .rollups import record_part_production
+    record_part_production(instance, sign=-1)
+
+
+# Concurrent assemblies of a type share one rollup row, the aircraft rollups are
+# bumped once the assembly commits so the row lock is not held for the whole transaction
+
+
+def aircraft_saved(sender, instance, created, raw=False, **kwargs):
+    """Count a newly assembled aircraft in the daily assembly rollup."""
+    if created and not raw:
+        from .rollups import record_assembly
+        transaction.on_commit(lambda: record_assembly(instance, delta=1))
+
+
+def aircraft_deleted(sender, instance, **kwargs):
+    """Remove a deleted aircraft from the daily assembly rollup."""
+    from .rollups import record_assembly
+    transaction.on_commit(lambda: record_assembly(instance, delta=-1))
+
+
+class AnalyticsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'analytics'
+    verbose_name = 'Production Analytics'
+
+    def ready(self):
+        """
+        Connect signals keeping the rollups up to date.
+        Bulk writes bypass these signals, run `recompute_rollups` after them.
+        """
+        post_save.connect(part_saved, sender='inventory.Part', dispatch_uid='analytics_part_saved')
+        post_delete.connect(part_deleted, sender='inventory.Part', dispatch_uid='analytics_part_deleted')
+        post_save.connect(aircraft_saved, sender='assembly.Aircraft', dispatch_uid='analytics_aircraft_saved')
+        post_delete.connect(aircraft_deleted, sender='assembly.Aircraft', dispatch_uid='analytics_aircraft_deleted')
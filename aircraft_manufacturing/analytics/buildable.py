@@ -0,0 +1,119 @@
+"""Buildable aircraft report computed on aircraft type x part type matrices."""
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+from django.db.models import Sum
+from assembly.bom import get_bom_version, get_leaf_requirements
+from assembly.models import AircraftType
+from inventory.models import AVAILABLE_PARTS, PART_UNITS, Part, PartType
+
+
+@dataclass
+class StockMatrix:
+    """Required quantities and unused stock as aircraft type x part type matrices."""
+    aircraft_type_ids: np.ndarray
+    aircraft_type_names: List[str]
+    part_type_ids: np.ndarray
+    part_type_names: List[str]
+    # Leaf parts of each type needed for one aircraft
+    required: np.ndarray
+    # Available parts in stock, neither used nor reserved
+    available: np.ndarray
+
+
+def _index(ids: Sequence[int], names: Sequence[str]) -> Tuple[np.ndarray, List[str], np.ndarray]:
+    """Map ids to dense positions, returning (sorted unique ids, their names, position of every id)."""
+    unique, first, positions = np.unique(np.asarray(ids, dtype=np.int64), return_index=True, return_inverse=True)
+    return unique, [names[i] for i in first], positions
+
+
+def find_positions(unique: np.ndarray, ids: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+    """Find the positions of ids in the sorted unique ids, returning (positions, mask of found ids)."""
+    ids = np.asarray(ids, dtype=np.int64)
+    positions = np.minimum(np.searchsorted(unique, ids), max(len(unique) - 1, 0))
+    found = unique[positions] == ids if len(unique) else np.zeros(len(ids), dtype=bool)
+    return positions, found
+
+
+def load_stock_matrix() -> StockMatrix:
+    """
+    Load the leaf requirement and unused stock matrices.
+
+    Requirements are the cached bill of materials explosions, so sub-assemblies
+    are replaced by the components they are built from like in the allocation.
+    Rows and columns are the aircraft and part types having a requirement, stock
+    of other types cannot contribute to an aircraft and is left out. Stock is
+    grouped by ids only, which keeps the aggregate free of joins. Parts held by
+    reservations are not available and left out like in the allocation.
+    """
+    aircraft_types = list(AircraftType.objects.values_list('id', 'name').order_by('id'))
+    version = get_bom_version()
+    leaves = [
+        (aircraft_type_id, aircraft_type_name, part_type_id, quantity)
+        for aircraft_type_id, aircraft_type_name in aircraft_types
+        for part_type_id, quantity in get_leaf_requirements(aircraft_type_id, version).items()
+    ]
+    names = dict(PartType.objects.filter(
+        id__in={row[2] for row in leaves}
+    ).values_list('id', 'name')) if leaves else {}
+    requirements = [(row[0], row[1], row[2], names[row[2]], row[3]) for row in leaves]
+    stock = list(Part.objects.filter(AVAILABLE_PARTS).values_list(
+        'aircraft_type_id', 'part_type_id'
+    ).annotate(count=Sum(PART_UNITS)).order_by())
+
+    aircraft_type_ids, aircraft_type_names, required_rows = _index(
+        [row[0] for row in requirements], [row[1] for row in requirements]
+    )
+    part_type_ids, part_type_names, required_columns = _index(
+        [row[2] for row in requirements], [row[3] for row in requirements]
+    )
+    shape = (len(aircraft_type_ids), len(part_type_ids))
+    required = np.zeros(shape, dtype=np.int64)
+    required[required_rows, required_columns] = [row[4] for row in requirements]
+
+    available = np.zeros(shape, dtype=np.int64)
+    stock_rows, rows_found = find_positions(aircraft_type_ids, [row[0] for row in stock])
+    stock_columns, columns_found = find_positions(part_type_ids, [row[1] for row in stock])
+    found = rows_found & columns_found
+    available[stock_rows[found], stock_columns[found]] = np.asarray([row[2] for row in stock], dtype=np.int64)[found]
+    return StockMatrix(aircraft_type_ids, aircraft_type_names, part_type_ids, part_type_names, required, available)
+
+
+def compute_buildable(required: np.ndarray, available: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Compute how many aircraft of each type the stock can build.
+
+    Returns (buildable count per aircraft type, mask of the limiting part types,
+    parts left over after building that many). Aircraft types without any
+    requirement cannot be built.
+    """
+    needed = required > 0
+    ratio = np.where(needed, available // np.maximum(required, 1), np.iinfo(np.int64).max)
+    buildable = np.where(needed.any(axis=1), ratio.min(axis=1, initial=np.iinfo(np.int64).max), 0)
+    limiting = needed & (ratio == buildable[:, None])
+    surplus = available - buildable[:, None] * required
+    return buildable, limiting, surplus
+
+
+def get_buildable_report() -> Dict[str, dict]:
+    """Get the buildable report keyed by aircraft type name."""
+    matrix = load_stock_matrix()
+    buildable, limiting, surplus = compute_buildable(matrix.required, matrix.available)
+    # Parts still missing to build one more aircraft than possible today
+    missing = np.maximum((buildable[:, None] + 1) * matrix.required - matrix.available, 0)
+    relevant = (matrix.required > 0) | (matrix.available > 0)
+    names = np.array(matrix.part_type_names, dtype=object)
+
+    report = {}
+    for row in np.argsort(np.array(matrix.aircraft_type_names, dtype=object), kind='stable'):
+        columns = np.flatnonzero(relevant[row])
+        report[matrix.aircraft_type_names[row]] = {
+            'aircraft_type': int(matrix.aircraft_type_ids[row]),
+            'buildable': int(buildable[row]),
+            'limiting_part_types': names[limiting[row]].tolist(),
+            'surplus': dict(zip(names[columns].tolist(), surplus[row, columns].tolist())),
+            'missing_for_next': {
+                name: count for name, count in zip(names[columns].tolist(), missing[row, columns].tolist()) if count
+            },
+        }
+    return report
@@ -0,0 +1,34 @@
+"""Constants for analytics app."""
+from typing import Dict
+
+# Time series bucket sizes mapped to the Trunc kind used to build them
+SERIES_INTERVALS: Dict[str, str] = {
+    'day': 'day',
+    'week': 'week',
+    'month': 'month',
+}
+
+# Default number of days covered when no start date is given
+DEFAULT_SERIES_DAYS: Dict[str, int] = {
+    'day': 30,
+    'week': 26 * 7,
+    'month': 365,
+}
+
+# Dimensions the part production series can be grouped by
+PART_SERIES_GROUPS = ('team', 'part_type', 'aircraft_type')
+
+# Number of days recomputed per transaction by recompute_rollups
+RECOMPUTE_WINDOW_DAYS = 31
+
+# Days of production history used to estimate team rates when planning
+DEFAULT_HISTORY_DAYS = 30
+MAX_HISTORY_DAYS = 365
+
+# Results of every search category, by default and at most
+SEARCH_LIMIT = 5
+SEARCH_MAX_LIMIT = 20
+# Shortest text searched, a single character matches most rows
+SEARCH_MIN_LENGTH = 2
+# Latency budget of a search in seconds, categories not answered in time are left out
+SEARCH_TIMEOUT = 0.5
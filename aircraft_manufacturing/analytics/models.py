@@ -0,0 +1,37 @@
+from django.db import models
+
+
+class DailyPartProduction(models.Model):
+    """Number of part units produced per day, team, part type and aircraft type"""
+    date = models.DateField(help_text="Production date")
+    team = models.ForeignKey('accounts.Team', on_delete=models.CASCADE, null=True, help_text="Team which produced the parts")
+    part_type = models.ForeignKey('inventory.PartType', on_delete=models.CASCADE, help_text="Type of the parts")
+    aircraft_type = models.ForeignKey('assembly.AircraftType', on_delete=models.CASCADE, help_text="Aircraft type the parts belong to")
+    count = models.IntegerField(default=0, help_text="Number of part units produced, lots count their quantity")
+    updated_at = models.DateTimeField(auto_now=True, help_text="Date and time of last update")
+
+    class Meta:
+        unique_together = ['date', 'team', 'part_type', 'aircraft_type']
+        ordering = ['date', 'team', 'part_type', 'aircraft_type']
+        verbose_name = 'Daily Part Production'
+        verbose_name_plural = 'Daily Part Production'
+
+    def __str__(self):
+        return f"{self.date} - {self.part_type.name} for {self.aircraft_type.name} ({self.count})"
+
+
+class DailyAssembly(models.Model):
+    """Number of aircraft assembled per day and aircraft type"""
+    date = models.DateField(help_text="Assembly date")
+    aircraft_type = models.ForeignKey('assembly.AircraftType', on_delete=models.CASCADE, help_text="Type of the aircraft")
+    count = models.IntegerField(default=0, help_text="Number of aircraft assembled")
+    updated_at = models.DateTimeField(auto_now=True, help_text="Date and time of last update")
+
+    class Meta:
+        unique_together = ['date', 'aircraft_type']
+        ordering = ['date', 'aircraft_type']
+        verbose_name = 'Daily Assembly'
+        verbose_name_plural = 'Daily Assembly'
+
+    def __str__(self):
+        return f"{self.date} - {self.aircraft_type.name} ({self.count})"
@@ -0,0 +1,152 @@
+"""Production planning from target aircraft counts."""
+import math
+from datetime import date, timedelta
+from typing import Dict, Optional
+import numpy as np
+from django.db.models import Sum
+from django.utils import timezone
+from accounts.models import Team
+from .buildable import find_positions, load_stock_matrix
+from .models import DailyAssembly, DailyPartProduction
+
+
+class PlanningError(ValueError):
+    """Raised when the targets cannot be planned."""
+
+
+def allocate(need: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    Split the needed parts of every column over the rows proportionally to the weights.
+
+    Columns without any weight are split equally between the rows able to produce
+    them (weight is NaN), rounding remainders go to the row with the largest share.
+    """
+    capable = ~np.isnan(weights)
+    weights = np.where(capable, np.nan_to_num(weights), 0.0)
+    totals = weights.sum(axis=0)
+    weights = np.where(totals > 0, weights, capable.astype(float))
+    shares = np.divide(weights, weights.sum(axis=0), out=np.zeros_like(weights), where=weights.sum(axis=0) > 0)
+    allocated = np.floor(shares * need).astype(np.int64)
+    remainder = need - allocated.sum(axis=0)
+    producible = shares.sum(axis=0) > 0
+    allocated[shares.argmax(axis=0)[producible], np.flatnonzero(producible)] += remainder[producible]
+    return allocated
+
+
+def _estimate(days: Optional[float], today: date) -> Optional[date]:
+    return None if days is None else today + timedelta(days=math.ceil(days))
+
+
+def get_production_plan(targets: Dict[str, int], deadline: Optional[date] = None, history_days: int = 30) -> dict:
+    """
+    Plan the parts every team still has to produce to assemble the target aircraft.
+
+    Demand is the target count times the required quantities, net of the unused
+    stock of each aircraft type. Part types are mapped to teams through
+    TeamPartPermission and split by each team's production rate over the last
+    history_days days, read from the daily rollups. Completion dates assume the
+    teams keep producing at those rates.
+    """
+    matrix = load_stock_matrix()
+    aircraft_positions = {name: row for row, name in enumerate(matrix.aircraft_type_names)}
+    unknown = [name for name in targets if name not in aircraft_positions]
+    if unknown:
+        raise PlanningError(f"Aircraft types without part requirements: {', '.join(unknown)}")
+
+    target = np.zeros(len(matrix.aircraft_type_ids), dtype=np.int64)
+    target[[aircraft_positions[name] for name in targets]] = list(targets.values())
+    # Parts needed per aircraft type x part type, net of the stock
+    demand = target[:, None] * matrix.required
+    need = np.maximum(demand - matrix.available, 0)
+    # Stock only counts up to the demand of the aircraft type it was made for
+    need_per_part = need.sum(axis=0)
+
+    teams = list(Team.objects.filter(
+        team_type__teampartpermission__can_create=True
+    ).values_list('id', 'name', 'team_type__teampartpermission__part_type_id').order_by('name'))
+    team_ids = list(dict.fromkeys(row[0] for row in teams))
+    team_names = dict((row[0], row[1]) for row in teams)
+    team_positions = {team_id: index for index, team_id in enumerate(team_ids)}
+
+    today = timezone.localdate()
+    history_start = today - timedelta(days=history_days)
+    produced = list(DailyPartProduction.objects.filter(
+        date__gte=history_start, date__lt=today, team_id__in=team_ids
+    ).values_list('team_id', 'part_type_id').annotate(total=Sum('count')).order_by())
+
+    # Daily rate per team x part type, NaN where the team cannot produce the part type
+    rates = np.full((len(team_ids), len(matrix.part_type_ids)), np.nan)
+    columns, found = find_positions(matrix.part_type_ids, [row[2] for row in teams])
+    rows = np.array([team_positions[row[0]] for row in teams], dtype=np.int64)
+    rates[rows[found], columns[found]] = 0.0
+    if produced:
+        rows = np.array([team_positions[row[0]] for row in produced], dtype=np.int64)
+        columns, found = find_positions(matrix.part_type_ids, [row[1] for row in produced])
+        found &= ~np.isnan(rates[rows, columns])
+        rates[rows[found], columns[found]] = np.array([row[2] for row in produced], dtype=float)[found] / history_days
+
+    assigned = allocate(need_per_part, rates)
+    unassigned = need_per_part - assigned.sum(axis=0)
+    # Days each team needs to produce its share, producing one part type after another
+    with np.errstate(divide='ignore', invalid='ignore'):
+        team_days = np.where(assigned > 0, assigned / np.nan_to_num(rates), 0.0).sum(axis=1)
+
+    part_names = matrix.part_type_names
+    team_plans = []
+    for row, team_id in enumerate(team_ids):
+        columns = np.flatnonzero(~np.isnan(rates[row]))
+        days = float(team_days[row]) if np.isfinite(team_days[row]) else None
+        completion = _estimate(days, today)
+        team_plans.append({
+            'team': team_id,
+            'team_name': team_names[team_id],
+            'parts': {part_names[column]: int(assigned[row, column]) for column in columns},
+            'daily_rate': {part_names[column]: round(float(rates[row, column]), 2) for column in columns},
+            'estimated_days': None if days is None else math.ceil(days),
+            'estimated_completion': completion,
+            'on_track': None if deadline is None or completion is None else completion <= deadline,
+        })
+
+    assembly_total = DailyAssembly.objects.filter(
+        date__gte=history_start, date__lt=today
+    ).aggregate(total=Sum('count'))['total'] or 0
+    assembly_rate = assembly_total / history_days
+    aircraft = int(target.sum())
+    assembly_days = aircraft / assembly_rate if assembly_rate else (0.0 if not aircraft else None)
+
+    completions = [plan['estimated_completion'] for plan in team_plans if plan['parts'] and any(plan['parts'].values())]
+    parts_ready = None if any(completion is None for completion in completions) or unassigned.any() else max(completions, default=today)
+    assembly_completion = _estimate(assembly_days, today)
+    completion = None if parts_ready is None or assembly_completion is None else max(parts_ready, assembly_completion)
+
+    return {
+        'targets': targets,
+        'deadline': deadline,
+        'history_days': history_days,
+        'aircraft_types': {
+            name: {
+                'target': int(target[row]),
+                'to_produce': {
+                    part_names[column]: int(need[row, column]) for column in np.flatnonzero(matrix.required[row])
+                },
+            }
+            for name, row in aircraft_positions.items() if name in targets
+        },
+        'part_types': {
+            name: {
+                'required': int(demand[:, column].sum()),
+                'available': int(np.minimum(matrix.available[:, column], demand[:, column]).sum()),
+                'to_produce': int(need_per_part[column]),
+                'unassigned': int(unassigned[column]),
+            }
+            for column, name in enumerate(part_names) if demand[:, column].any()
+        },
+        'teams': team_plans,
+        'assembly': {
+            'aircraft': aircraft,
+            'daily_rate': round(assembly_rate, 2),
+            'estimated_completion': assembly_completion,
+        },
+        'estimated_completion': completion,
+        'on_track': None if deadline is None or completion is None else completion <= deadline,
+    }
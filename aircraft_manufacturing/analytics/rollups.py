@@ -0,0 +1,139 @@
+"""Maintenance of the daily production rollups."""
+from datetime import date, datetime, time, timedelta
+from typing import List, Tuple
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, QuerySet, Subquery, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+from assembly.models import Aircraft, AircraftPart
+from inventory.models import Part
+from .constants import RECOMPUTE_WINDOW_DAYS
+from .models import DailyAssembly, DailyPartProduction
+
+
+def _bump(model, delta: int, **lookup):
+    """Atomically add delta to the rollup row, creating it on first use."""
+    if model.objects.filter(**lookup).update(count=F('count') + delta) or delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(count=delta, **lookup)
+    except IntegrityError:
+        # Another transaction created the row first
+        model.objects.filter(**lookup).update(count=F('count') + delta)
+
+
+def record_part_production(part: Part, sign: int = 1):
+    """Add (or remove with a negative sign) the units of a part to its production day."""
+    _bump(
+        DailyPartProduction,
+        sign * (part.quantity or 1),
+        date=timezone.localdate(part.created_at),
+        team_id=part.owner.team_id if part.owner_id else None,
+        part_type_id=part.part_type_id,
+        aircraft_type_id=part.aircraft_type_id,
+    )
+
+
+def record_assembly(aircraft: Aircraft, delta: int = 1):
+    """Add (or remove with a negative delta) an aircraft to its assembly day."""
+    _bump(
+        DailyAssembly,
+        delta,
+        date=timezone.localdate(aircraft.created_at),
+        aircraft_type_id=aircraft.aircraft_type_id,
+    )
+
+
+def get_assembly_days(aircraft: QuerySet) -> List[dict]:
+    """Count the aircraft of the queryset per assembly day and aircraft type."""
+    return list(aircraft.annotate(
+        day=TruncDate('created_at')
+    ).values('day', 'aircraft_type_id').annotate(total=Count('id')).order_by())
+
+
+def record_assembly_days(days: List[dict], sign: int = 1):
+    """Add (or remove with a negative sign) aircraft counted by get_assembly_days."""
+    for row in days:
+        _bump(DailyAssembly, sign * row['total'], date=row['day'], aircraft_type_id=row['aircraft_type_id'])
+
+
+def get_day_range(start: date, end: date) -> Tuple[datetime, datetime]:
+    """Get the aware datetime range [start, end + 1 day) covering the given days."""
+    return (
+        timezone.make_aware(datetime.combine(start, time.min)),
+        timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min)),
+    )
+
+
+# Units produced as a part row, a lot holds its remaining quantity plus the units taken by aircraft
+PRODUCED_UNITS = Coalesce(
+    F('quantity') + Coalesce(Subquery(
+        AircraftPart.objects.filter(part=OuterRef('pk')).values('part').annotate(taken=Sum('quantity')).values('taken')
+    ), 0),
+    1,
+)
+
+
+@transaction.atomic
+def recompute_part_production(start: date, end: date) -> int:
+    """Rebuild the part production rollup for the given days from the parts table."""
+    range_start, range_end = get_day_range(start, end)
+    DailyPartProduction.objects.filter(date__range=(start, end)).delete()
+    rows = Part.objects.filter(
+        created_at__gte=range_start,
+        created_at__lt=range_end,
+    ).annotate(
+        day=TruncDate('created_at')
+    ).values(
+        'day', 'owner__team_id', 'part_type_id', 'aircraft_type_id'
+    ).annotate(total=Sum(PRODUCED_UNITS)).order_by()
+    DailyPartProduction.objects.bulk_create([
+        DailyPartProduction(
+            date=row['day'],
+            team_id=row['owner__team_id'],
+            part_type_id=row['part_type_id'],
+            aircraft_type_id=row['aircraft_type_id'],
+            count=row['total'],
+        )
+        for row in rows
+    ])
+    return len(rows)
+
+
+@transaction.atomic
+def recompute_assembly(start: date, end: date) -> int:
+    """Rebuild the assembly rollup for the given days from the aircraft table."""
+    range_start, range_end = get_day_range(start, end)
+    DailyAssembly.objects.filter(date__range=(start, end)).delete()
+    rows = Aircraft.objects.filter(
+        created_at__gte=range_start,
+        created_at__lt=range_end,
+    ).annotate(
+        day=TruncDate('created_at')
+    ).values('day', 'aircraft_type_id').annotate(total=Count('id')).order_by()
+    DailyAssembly.objects.bulk_create([
+        DailyAssembly(date=row['day'], aircraft_type_id=row['aircraft_type_id'], count=row['total'])
+        for row in rows
+    ])
+    return len(rows)
+
+
+def recompute_rollups(start: date, end: date, window_days: int = RECOMPUTE_WINDOW_DAYS, progress=None) -> Tuple[int, int]:
+    """
+    Rebuild both rollups for the given days.
+
+    Existing rows in the range are replaced, so running it again gives the same
+    result. Use it after bulk writes which bypass the model signals. Days are
+    processed in windows, each in its own short transaction.
+    """
+    part_rows = assembly_rows = 0
+    window_start = start
+    while window_start <= end:
+        window_end = min(window_start + timedelta(days=window_days - 1), end)
+        part_rows += recompute_part_production(window_start, window_end)
+        assembly_rows += recompute_assembly(window_start, window_end)
+        if progress:
+            progress(window_start, window_end)
+        window_start = window_end + timedelta(days=1)
+    return part_rows, assembly_rows
@@ -0,0 +1,181 @@
+"""Ranked search over parts, aircraft, users and teams within a latency budget."""
+import time
+from typing import Callable, Dict, List, Optional
+from django.contrib.auth.models import User
+from django.db import DatabaseError, connection, transaction
+from django.db.models import OuterRef, Q, QuerySet, Subquery
+from accounts.models import Team
+from aircraft_manufacturing.logger import django_logger
+from aircraft_manufacturing.serials import get_serial_prefix_q
+from assembly.constants import AIRCRAFT_SERIAL_PREFIX
+from assembly.models import Aircraft, AircraftPart
+from inventory.constants import PART_SERIAL_PREFIX
+from inventory.models import Part
+from .constants import SEARCH_LIMIT, SEARCH_TIMEOUT
+
+# Scores of a match, results are ranked by score and then by category in this order
+EXACT_MATCH, PREFIX_MATCH, SUBSTRING_MATCH = 3, 2, 1
+SEARCH_CATEGORIES = ('part', 'aircraft', 'user', 'team')
+
+
+def get_score(text: str, *values: Optional[str]) -> int:
+    """Score the best match of the upper cased text among the values."""
+    values = [(value or '').upper() for value in values]
+    if text in values:
+        return EXACT_MATCH
+    if any(value.startswith(text) for value in values):
+        return PREFIX_MATCH
+    return SUBSTRING_MATCH
+
+
+def find_matches(queryset: QuerySet, prefix_q: Q, substring_q: Q, limit: int) -> List[dict]:
+    """
+    Get up to limit rows matching from their start, then rows containing the text.
+
+    Both queries stop at the limit, prefix matches are read from the integer serial
+    or trigram indexes, substring matches from the trigram indexes on PostgreSQL.
+    """
+    found = list(queryset.filter(prefix_q)[:limit])
+    if len(found) < limit:
+        found += queryset.filter(substring_q).exclude(id__in=[row['id'] for row in found])[:limit - len(found)]
+    return found
+
+
+def get_serial_q(prefix: str, text: str) -> Q:
+    return get_serial_prefix_q(prefix, text) or Q(serial_number__istartswith=text)
+
+
+def search_parts(text: str, limit: int) -> List[dict]:
+    """Search parts by serial number, with the aircraft they went into."""
+    # The latest link, a lot is shared by many aircraft
+    link = AircraftPart.objects.filter(part_id=OuterRef('id')).order_by('-created_at')
+    parts = Part.objects.values('id', 'serial_number', 'part_type__name', 'is_used').annotate(
+        aircraft_id=Subquery(link.values('aircraft_id')[:1]),
+        aircraft_serial_number=Subquery(link.values('aircraft__serial_number')[:1]),
+    ).order_by()
+    return [
+        {
+            'category': 'part',
+            'id': part['id'],
+            'label': part['serial_number'],
+            'description': f"{part['part_type__name']} in {part['aircraft_serial_number']}" if part['aircraft_id']
+            else f"{part['part_type__name']}, {'used' if part['is_used'] else 'available'}",
+            'aircraft': {'id': part['aircraft_id'], 'serial_number': part['aircraft_serial_number']}
+            if part['aircraft_id'] else None,
+            'score': get_score(text.upper(), part['serial_number']),
+        }
+        for part in find_matches(
+            parts, get_serial_q(PART_SERIAL_PREFIX, text), Q(serial_number__icontains=text), limit
+        )
+    ]
+
+
+def search_aircraft(text: str, limit: int) -> List[dict]:
+    """Search aircraft by serial number, with who assembled them."""
+    aircraft = Aircraft.objects.values(
+        'id', 'serial_number', 'aircraft_type__name', 'owner__user__username'
+    ).order_by()
+    return [
+        {
+            'category': 'aircraft',
+            'id': row['id'],
+            'label': row['serial_number'],
+            'description': f"{row['aircraft_type__name']} assembled by {row['owner__user__username'] or 'unknown'}",
+            'score': get_score(text.upper(), row['serial_number']),
+        }
+        for row in find_matches(
+            aircraft, get_serial_q(AIRCRAFT_SERIAL_PREFIX, text), Q(serial_number__icontains=text), limit
+        )
+    ]
+
+
+def search_users(text: str, limit: int) -> List[dict]:
+    """Search users by username and email, with their team."""
+    users = User.objects.values('id', 'username', 'email', 'teammember__team__name').order_by()
+    return [
+        {
+            'category': 'user',
+            'id': user['id'],
+            'label': user['username'],
+            'description': user['teammember__team__name'] or user['email'],
+            'score': get_score(text.upper(), user['username'], user['email']),
+        }
+        for user in find_matches(
+            users,
+            Q(username__istartswith=text) | Q(email__istartswith=text),
+            Q(username__icontains=text) | Q(email__icontains=text),
+            limit
+        )
+    ]
+
+
+def search_teams(text: str, limit: int) -> List[dict]:
+    """Search teams by name."""
+    teams = Team.objects.values('id', 'name', 'team_type__name').order_by()
+    return [
+        {
+            'category': 'team',
+            'id': team['id'],
+            'label': team['name'],
+            'description': team['team_type__name'],
+            'score': get_score(text.upper(), team['name']),
+        }
+        for team in find_matches(teams, Q(name__istartswith=text), Q(name__icontains=text), limit)
+    ]
+
+
+SEARCHES: Dict[str, Callable[[str, int], List[dict]]] = {
+    'part': search_parts,
+    'aircraft': search_aircraft,
+    'user': search_users,
+    'team': search_teams,
+}
+
+
+def _set_statement_timeout(timeout: Optional[float]):
+    """Limit the queries of the current transaction to timeout seconds on PostgreSQL, None restores the default."""
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        if timeout is None:
+            cursor.execute("SET LOCAL statement_timeout TO DEFAULT")
+        else:
+            cursor.execute("SET LOCAL statement_timeout = %s", [max(int(timeout * 1000), 1)])
+
+
+def global_search(text: str, limit: int = SEARCH_LIMIT, timeout: float = SEARCH_TIMEOUT) -> dict:
+    """
+    Search every category for the text and rank the results in one list.
+
+    Categories are prefix and substring lookups with a LIMIT, they run one after the
+    other on the request's connection, each in a savepoint. On PostgreSQL the queries of
+    a category are cancelled by the server once the rest of the timeout budget is spent.
+    Categories cancelled, failed or left when the budget is spent are listed as timed out.
+    """
+    text = text.strip()
+    started = time.monotonic()
+    results = []
+    timed_out = []
+    with transaction.atomic():
+        for category in SEARCH_CATEGORIES:
+            remaining = timeout - (time.monotonic() - started)
+            if remaining <= 0:
+                timed_out.append(category)
+                continue
+            try:
+                with transaction.atomic():
+                    _set_statement_timeout(remaining)
+                    results += SEARCHES[category](text, limit)
+                    _set_statement_timeout(None)
+            except DatabaseError as e:
+                # Cancelled by the statement timeout, or failed
+                django_logger.warning(f"Search of {category} failed: {e}")
+                timed_out.append(category)
+
+    results.sort(key=lambda result: (-result['score'], SEARCH_CATEGORIES.index(result['category']), result['label'] or ''))
+    return {
+        'query': text,
+        'results': results,
+        'timed_out': timed_out,
+        'elapsed_ms': round((time.monotonic() - started) * 1000, 1),
+    }
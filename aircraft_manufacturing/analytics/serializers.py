@@ -0,0 +1,51 @@
+from datetime import timedelta
+from django.utils import timezone
+from rest_framework import serializers
+from .constants import (
+    DEFAULT_HISTORY_DAYS, DEFAULT_SERIES_DAYS, MAX_HISTORY_DAYS, PART_SERIES_GROUPS, SERIES_INTERVALS
+)
+
+
+class SeriesQuerySerializer(serializers.Serializer):
+    """Serializer validating the time series query parameters"""
+    interval = serializers.ChoiceField(choices=list(SERIES_INTERVALS), default='day')
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    aircraft_type = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        attrs['end'] = attrs.get('end') or timezone.localdate()
+        attrs['start'] = attrs.get('start') or attrs['end'] - timedelta(days=DEFAULT_SERIES_DAYS[attrs['interval']] - 1)
+        if attrs['start'] > attrs['end']:
+            raise serializers.ValidationError({'start': "Start date must be before the end date"})
+        return attrs
+
+
+class PartSeriesQuerySerializer(SeriesQuerySerializer):
+    """Serializer validating the part production series query parameters"""
+    team = serializers.IntegerField(required=False)
+    part_type = serializers.IntegerField(required=False)
+    group_by = serializers.CharField(required=False, default='team,part_type')
+
+    def validate_group_by(self, value):
+        groups = [group.strip() for group in value.split(',') if group.strip()]
+        invalid = [group for group in groups if group not in PART_SERIES_GROUPS]
+        if invalid:
+            raise serializers.ValidationError(f"Unsupported groups: {', '.join(invalid)}")
+        return groups
+
+
+class PlanRequestSerializer(serializers.Serializer):
+    """Serializer validating a production plan request"""
+    targets = serializers.DictField(
+        child=serializers.IntegerField(min_value=0),
+        allow_empty=False,
+        help_text="Number of aircraft to build per aircraft type name, e.g. {\"TB2\": 20}"
+    )
+    deadline = serializers.DateField(required=False, help_text="Date the aircraft should be ready by")
+    history_days = serializers.IntegerField(
+        min_value=1,
+        max_value=MAX_HISTORY_DAYS,
+        default=DEFAULT_HISTORY_DAYS,
+        help_text="Days of production history used to estimate team rates"
+    )
@@ -0,0 +1,355 @@
+"""
+Discrete-event factory simulator for capacity planning.
+
+Producer teams make parts as Poisson processes at their daily rate, split over
+the part types they may create and the aircraft types of the product mix in
+proportion to the kits needed. Assembly teams take a complete kit as soon as
+one is free and assemble it in an exponentially distributed time. Arrival
+times of a whole replication are sampled with NumPy up front, the event loop
+then only merges them with assembly completions.
+
+This module avoids Django imports at module level so replications can run in
+spawned worker processes.
+"""
+import heapq
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional
+import numpy as np
+
+DEFAULT_TEAM_RATE = 5.0
+DEFAULT_ASSEMBLY_RATE = 1.0
+# Assembly capacity is read from the busiest days of the assembly teams, days waiting
+# for parts would make the historical throughput understate it. Fewer team days of
+# history than this are not enough to measure it and the rate has to be given.
+ASSEMBLY_CAPACITY_PERCENTILE = 90
+MIN_ASSEMBLY_DAYS = 5
+# Station utilisation above which assembly is reported as the bottleneck
+ASSEMBLY_BOTTLENECK_UTILISATION = 0.95
+
+
+@dataclass
+class FactoryConfig:
+    """A factory layout and product mix to simulate."""
+    aircraft_types: List[str]
+    part_types: List[str]
+    # Parts of each type needed per aircraft, aircraft type x part type
+    required: np.ndarray
+    # Relative number of aircraft of each type to build
+    mix: np.ndarray
+    team_names: List[str]
+    # Parts per day each producer team makes
+    team_rates: np.ndarray
+    # Part types each team may create, team x part type
+    capabilities: np.ndarray
+    assembly_teams: int = 1
+    # Aircraft per day a single assembly team completes
+    assembly_rate: float = DEFAULT_ASSEMBLY_RATE
+    # Unused parts at the start, aircraft type x part type
+    initial_stock: Optional[np.ndarray] = None
+    days: float = 30.0
+
+    def stream_rates(self) -> np.ndarray:
+        """Parts per day of every team x aircraft type x part type stream."""
+        demand = self.mix[:, None] * self.required
+        capable_demand = self.capabilities * demand.sum(axis=0)
+        totals = capable_demand.sum(axis=1)
+        scale = np.divide(self.team_rates, totals, out=np.zeros(len(self.team_rates)), where=totals > 0)
+        return scale[:, None, None] * self.capabilities[:, None, :] * demand[None, :, :]
+
+    def with_team_copy(self, name: str) -> 'FactoryConfig':
+        """Get a copy of the layout with one more team like the given producer team."""
+        if name not in self.team_names:
+            raise ValueError(f"Unknown team: {name}")
+        index = self.team_names.index(name)
+        copies = sum(1 for team_name in self.team_names if team_name.startswith(name))
+        return replace(
+            self,
+            team_names=self.team_names + [f"{name} ({copies + 1})"],
+            team_rates=np.append(self.team_rates, self.team_rates[index]),
+            capabilities=np.vstack([self.capabilities, self.capabilities[index]]),
+        )
+
+
+@dataclass
+class ReplicationResult:
+    """Outcome of a single replication."""
+    completed: np.ndarray
+    assembly_utilisation: float
+    starvation: np.ndarray
+    produced: np.ndarray
+    consumed: np.ndarray
+
+
+def run_replication(config: FactoryConfig, seed) -> ReplicationResult:
+    """Simulate the factory once for config.days days."""
+    rng = np.random.default_rng(seed)
+    rates = config.stream_rates()
+    n_teams, n_aircraft, n_parts = rates.shape
+
+    # Poisson arrivals: the count of every stream, then uniformly spread times
+    counts = rng.poisson(rates * config.days).ravel()
+    streams = np.repeat(np.arange(counts.size), counts)
+    times = rng.uniform(0.0, config.days, streams.size)
+    order = np.argsort(times, kind='stable')
+    teams, aircraft_types, part_types = np.unravel_index(streams[order], rates.shape)
+    times = times[order]
+
+    required = config.required.tolist()
+    kits = [[(part, quantity) for part, quantity in enumerate(row) if quantity > 0] for row in required]
+    stock = [[deque() for _ in range(n_parts)] for _ in range(n_aircraft)]
+    if config.initial_stock is not None:
+        for aircraft_type, part_type in zip(*np.nonzero(config.initial_stock)):
+            stock[aircraft_type][part_type].extend([-1] * int(config.initial_stock[aircraft_type, part_type]))
+    mix = config.mix.tolist()
+
+    completed = [0] * n_aircraft
+    started = [0] * n_aircraft
+    consumed = [0] * n_teams
+    starvation = [0.0] * n_parts
+    service_times = iter(())
+    stations = config.assembly_teams
+    free = stations
+    in_progress = []
+    idle_time = 0.0
+    waiting_time = 0.0
+    last_time = 0.0
+
+    def next_service_time():
+        nonlocal service_times
+        value = next(service_times, None)
+        if value is None:
+            service_times = iter(rng.exponential(1.0 / config.assembly_rate, 1024).tolist())
+            value = next(service_times)
+        return value
+
+    def ready_types():
+        return [
+            aircraft_type for aircraft_type, kit in enumerate(kits)
+            if kit and mix[aircraft_type] > 0
+            and all(len(stock[aircraft_type][part]) >= quantity for part, quantity in kit)
+        ]
+
+    def start_assemblies(now: float) -> bool:
+        nonlocal free
+        started_any = False
+        while free:
+            candidates = ready_types()
+            if not candidates:
+                break
+            # Keep the built aircraft close to the mix
+            aircraft_type = min(candidates, key=lambda candidate: started[candidate] / mix[candidate])
+            for part, quantity in kits[aircraft_type]:
+                for _ in range(quantity):
+                    team = stock[aircraft_type][part].popleft()
+                    if team >= 0:
+                        consumed[team] += 1
+            started[aircraft_type] += 1
+            free -= 1
+            heapq.heappush(in_progress, (now + next_service_time(), aircraft_type))
+            started_any = True
+        return started_any
+
+    def advance(now: float):
+        nonlocal idle_time, waiting_time, last_time
+        idle = free * (now - last_time)
+        idle_time += idle
+        waiting_time += idle
+        last_time = now
+
+    def finish_until(now: float):
+        nonlocal free, waiting_time
+        while in_progress and in_progress[0][0] <= now:
+            finished_at, aircraft_type = heapq.heappop(in_progress)
+            advance(finished_at)
+            completed[aircraft_type] += 1
+            free += 1
+            if start_assemblies(finished_at):
+                waiting_time = 0.0
+
+    start_assemblies(0.0)
+    for now, team, aircraft_type, part_type in zip(
+        times.tolist(), teams.tolist(), aircraft_types.tolist(), part_types.tolist()
+    ):
+        finish_until(now)
+        advance(now)
+        stock[aircraft_type][part_type].append(team)
+        if free and start_assemblies(now):
+            # The arriving part completed a kit stations were waiting for
+            starvation[part_type] += waiting_time
+            waiting_time = 0.0
+    finish_until(config.days)
+    advance(config.days)
+
+    capacity = stations * config.days
+    return ReplicationResult(
+        completed=np.array(completed),
+        assembly_utilisation=1.0 - idle_time / capacity if capacity else 0.0,
+        starvation=np.array(starvation) / capacity if capacity else np.zeros(n_parts),
+        produced=counts.reshape(rates.shape).sum(axis=(1, 2)),
+        consumed=np.array(consumed),
+    )
+
+
+def _run_batch(config: FactoryConfig, seeds) -> List[ReplicationResult]:
+    return [run_replication(config, seed) for seed in seeds]
+
+
+def simulate(config: FactoryConfig, replications: int = 100, workers: int = 1, seed: Optional[int] = None) -> dict:
+    """
+    Run Monte Carlo replications of the factory and summarise them.
+
+    Replications get independent random streams spawned from the seed, so results
+    do not depend on the number of workers. With more than one worker batches of
+    replications run in a process pool.
+    """
+    seeds = np.random.SeedSequence(seed).spawn(replications)
+    if workers > 1:
+        batches = [seeds[index::workers] for index in range(workers)]
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+            results = [result for batch in executor.map(_run_batch, [config] * workers, batches) for result in batch]
+    else:
+        results = _run_batch(config, seeds)
+    return summarise(config, results)
+
+
+def _distribution(values: np.ndarray) -> Dict[str, float]:
+    p5, p50, p95 = np.percentile(values, [5, 50, 95])
+    return {
+        'mean': round(float(values.mean()), 2),
+        'std': round(float(values.std()), 2),
+        'p5': float(p5),
+        'p50': float(p50),
+        'p95': float(p95),
+    }
+
+
+def summarise(config: FactoryConfig, results: List[ReplicationResult]) -> dict:
+    """Summarise replications into throughput distributions and bottleneck utilisation."""
+    completed = np.array([result.completed for result in results])
+    utilisation = np.array([result.assembly_utilisation for result in results])
+    starvation = np.array([result.starvation for result in results]).mean(axis=0)
+    produced = np.array([result.produced for result in results]).sum(axis=0)
+    consumed = np.array([result.consumed for result in results]).sum(axis=0)
+    # Share of each team's output assembled into aircraft, teams close to 1 hold assembly back
+    team_utilisation = np.divide(consumed, produced, out=np.zeros(len(produced)), where=produced > 0)
+
+    if utilisation.mean() >= ASSEMBLY_BOTTLENECK_UTILISATION or not starvation.any():
+        bottleneck = 'assembly'
+    else:
+        bottleneck = config.part_types[int(starvation.argmax())]
+    return {
+        'days': config.days,
+        'replications': len(results),
+        'throughput': {
+            name: _distribution(completed[:, index])
+            for index, name in enumerate(config.aircraft_types) if config.mix[index] > 0
+        },
+        'total_throughput': _distribution(completed.sum(axis=1)),
+        'assembly': {
+            'teams': config.assembly_teams,
+            'rate': config.assembly_rate,
+            'utilisation': round(float(utilisation.mean()), 3),
+        },
+        'teams': {
+            name: {'rate': round(float(config.team_rates[index]), 2), 'utilisation': round(float(team_utilisation[index]), 3)}
+            for index, name in enumerate(config.team_names)
+        },
+        # Share of assembly capacity spent waiting for each part type
+        'starvation': {name: round(float(starvation[index]), 3) for index, name in enumerate(config.part_types)},
+        'bottleneck': bottleneck,
+    }
+
+
+def load_factory_config(days: float = 30.0, history_days: int = 30, mix: Optional[Dict[str, float]] = None,
+                        with_stock: bool = False, default_team_rate: float = DEFAULT_TEAM_RATE,
+                        assembly_rate: Optional[float] = None) -> FactoryConfig:
+    """
+    Build the factory layout from the database.
+
+    Teams, their part types and the requirements come from Team, TeamPartPermission
+    and the leaf requirements of the bill of materials. Team rates are measured from
+    the last history_days days of the production rollups, teams without history
+    produce default_team_rate parts a day. The mix defaults to the assembled aircraft mix.
+
+    Unless given, the assembly rate is the capacity of an assembly team on its busiest
+    days of the history, not its throughput, which drops whenever parts are missing.
+    Raises ValueError when there are too few assembly days to measure it.
+    """
+    from datetime import timedelta
+    from django.db.models import Count, Sum
+    from django.db.models.functions import TruncDate
+    from django.utils import timezone
+    from accounts.constants import TeamTypes
+    from accounts.models import Team
+    from assembly.models import Aircraft
+    from .buildable import find_positions, load_stock_matrix
+    from .models import DailyAssembly, DailyPartProduction
+    from .rollups import get_day_range
+
+    matrix = load_stock_matrix()
+    today = timezone.localdate()
+    history = {'date__gte': today - timedelta(days=history_days), 'date__lt': today}
+
+    if mix:
+        unknown = [name for name in mix if name not in matrix.aircraft_type_names]
+        if unknown:
+            raise ValueError(f"Aircraft types without part requirements: {', '.join(unknown)}")
+        weights = np.array([mix.get(name, 0.0) for name in matrix.aircraft_type_names], dtype=float)
+    else:
+        assembled = dict(DailyAssembly.objects.filter(**history).values_list(
+            'aircraft_type_id'
+        ).annotate(total=Sum('count')).order_by())
+        weights = np.array([assembled.get(int(type_id), 0) for type_id in matrix.aircraft_type_ids], dtype=float)
+        if not weights.any():
+            weights = np.ones(len(matrix.aircraft_type_ids))
+
+    teams = list(Team.objects.filter(
+        team_type__teampartpermission__can_create=True
+    ).values_list('id', 'name', 'team_type__teampartpermission__part_type_id').order_by('name'))
+    team_ids = list(dict.fromkeys(row[0] for row in teams))
+    team_names = dict((row[0], row[1]) for row in teams)
+    team_positions = {team_id: index for index, team_id in enumerate(team_ids)}
+    capabilities = np.zeros((len(team_ids), len(matrix.part_type_ids)), dtype=float)
+    columns, found = find_positions(matrix.part_type_ids, [row[2] for row in teams])
+    rows = np.array([team_positions[row[0]] for row in teams], dtype=np.int64)
+    capabilities[rows[found], columns[found]] = 1.0
+
+    produced = dict(DailyPartProduction.objects.filter(team_id__in=team_ids, **history).values_list(
+        'team_id'
+    ).annotate(total=Sum('count')).order_by())
+    team_rates = np.array([produced.get(team_id, 0) / history_days or default_team_rate for team_id in team_ids])
+
+    assembly_teams = Team.objects.filter(team_type__name=TeamTypes.ASSEMBLY).count() or 1
+    if assembly_rate is None:
+        history_start, history_end = get_day_range(history['date__gte'], today - timedelta(days=1))
+        # Aircraft assembled per assembly team and day
+        team_days = [row[2] for row in Aircraft.objects.filter(
+            created_at__gte=history_start,
+            created_at__lt=history_end,
+            owner__team__team_type__name=TeamTypes.ASSEMBLY,
+        ).annotate(day=TruncDate('created_at')).values_list('day', 'owner__team_id').annotate(
+            count=Count('id')
+        ).order_by()]
+        if len(team_days) < MIN_ASSEMBLY_DAYS:
+            raise ValueError(
+                f"{len(team_days)} assembly team days in the last {history_days} days are not enough "
+                f"to measure the assembly capacity, set the assembly rate"
+            )
+        assembly_rate = float(np.percentile(team_days, ASSEMBLY_CAPACITY_PERCENTILE))
+
+    return FactoryConfig(
+        aircraft_types=matrix.aircraft_type_names,
+        part_types=matrix.part_type_names,
+        required=matrix.required,
+        mix=weights,
+        team_names=[team_names[team_id] for team_id in team_ids],
+        team_rates=team_rates,
+        capabilities=capabilities,
+        assembly_teams=assembly_teams,
+        assembly_rate=assembly_rate,
+        initial_stock=matrix.available if with_stock else None,
+        days=days,
+    )
@@ -0,0 +1,71 @@
+from datetime import date, datetime
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.utils import timezone
+from accounts.models import TeamType, Team, TeamMember
+from accounts.constants import TeamTypes
+from analytics.models import DailyAssembly, DailyPartProduction
+from analytics.rollups import recompute_rollups
+from assembly.models import Aircraft, AircraftType
+from inventory.models import Part, PartType, TeamPartPermission
+
+
+class RollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        """Set up data for all test methods"""
+        cls.wing_type = TeamType.objects.create(name=TeamTypes.WING)
+        cls.wing_team = Team.objects.create(team_type=cls.wing_type, name="Wing Team")
+        cls.wing_member = TeamMember.objects.create(
+            team=cls.wing_team,
+            user=User.objects.create_user(username="wing_user", password="password")
+        )
+        cls.assembly_type = TeamType.objects.create(name=TeamTypes.ASSEMBLY)
+        cls.assembly_member = TeamMember.objects.create(
+            team=Team.objects.create(team_type=cls.assembly_type, name="Assembly Team"),
+            user=User.objects.create_user(username="assembly_user", password="password")
+        )
+        cls.aircraft_type = AircraftType.objects.create(name="Test Aircraft Type")
+        cls.part_type = PartType.objects.create(name="WING")
+        TeamPartPermission.objects.create(team_type=cls.wing_type, part_type=cls.part_type, can_create=True)
+
+    def create_part(self):
+        return Part.objects.create(part_type=self.part_type, aircraft_type=self.aircraft_type, owner=self.wing_member)
+
+    def test_part_production_incremental(self):
+        """Test that creating and recycling parts keeps the daily production count"""
+        parts = [self.create_part() for _ in range(3)]
+        rollup = DailyPartProduction.objects.get()
+        self.assertEqual(rollup.date, timezone.localdate())
+        self.assertEqual(rollup.team, self.wing_team)
+        self.assertEqual(rollup.count, 3)
+
+        parts[0].delete()
+        rollup.refresh_from_db()
+        self.assertEqual(rollup.count, 2)
+
+    def test_assembly_incremental(self):
+        """Test that assembling and deleting aircraft keeps the daily assembly count"""
+        with self.captureOnCommitCallbacks(execute=True):
+            aircraft = Aircraft.objects.create(aircraft_type=self.aircraft_type, owner=self.assembly_member)
+        self.assertEqual(DailyAssembly.objects.get().count, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            aircraft.delete()
+        self.assertEqual(DailyAssembly.objects.get().count, 0)
+
+    def test_recompute_rollups(self):
+        """Test that recomputing rebuilds the range from the source tables and is idempotent"""
+        parts = [self.create_part() for _ in range(3)]
+        first_day = timezone.make_aware(datetime(2024, 1, 1, 10))
+        Part.objects.filter(id__in=[part.id for part in parts[:2]]).update(created_at=first_day)
+        Aircraft.objects.create(aircraft_type=self.aircraft_type, owner=self.assembly_member)
+        # Bulk updates bypass the signals, the rollup still counts everything today
+        self.assertEqual(DailyPartProduction.objects.get().count, 3)
+
+        for _ in range(2):
+            recompute_rollups(date(2024, 1, 1), timezone.localdate(), window_days=7)
+            self.assertEqual(
+                dict(DailyPartProduction.objects.values_list('date', 'count')),
+                {date(2024, 1, 1): 2, timezone.localdate(): 1}
+            )
+            self.assertEqual(DailyAssembly.objects.get().count, 1)
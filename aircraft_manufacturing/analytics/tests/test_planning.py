@@ -0,0 +1,104 @@
+from datetime import timedelta
+import numpy as np
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.utils import timezone
+from accounts.models import TeamType, Team, TeamMember
+from accounts.constants import TeamTypes
+from analytics.models import DailyAssembly, DailyPartProduction
+from analytics.planning import PlanningError, allocate, get_production_plan
+from analytics.rollups import recompute_part_production
+from assembly.bom import invalidate_bom_cache
+from assembly.models import AircraftPartRequirement, AircraftType
+from inventory.models import Part, PartType, TeamPartPermission
+
+
+class AllocateTests(TestCase):
+    def test_allocate_by_rate(self):
+        """Test that parts are split by rate, equally without history and never to incapable teams"""
+        allocated = allocate(np.array([10, 5, 4]), np.array([[1.0, np.nan, 0.0], [3.0, 0.0, 0.0]]))
+        self.assertEqual(allocated.tolist(), [[2, 0, 2], [8, 5, 2]])
+
+
+class ProductionPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        """Set up data for all test methods"""
+        cls.wing_type = TeamType.objects.create(name=TeamTypes.WING)
+        cls.body_type = TeamType.objects.create(name=TeamTypes.BODY)
+        cls.wing_team = Team.objects.create(team_type=cls.wing_type, name="Wing Team")
+        cls.second_wing_team = Team.objects.create(team_type=cls.wing_type, name="Second Wing Team")
+        cls.body_team = Team.objects.create(team_type=cls.body_type, name="Body Team")
+        cls.member = TeamMember.objects.create(
+            team=cls.wing_team, user=User.objects.create_user(username="wing_user", password="password")
+        )
+        cls.tb2 = AircraftType.objects.create(name="TB2")
+        cls.wing = PartType.objects.create(name="WING")
+        cls.body = PartType.objects.create(name="BODY")
+        TeamPartPermission.objects.create(team_type=cls.wing_type, part_type=cls.wing, can_create=True)
+        TeamPartPermission.objects.create(team_type=cls.body_type, part_type=cls.body, can_create=True)
+        AircraftPartRequirement.objects.create(aircraft_type=cls.tb2, part_type=cls.wing, quantity=2)
+        AircraftPartRequirement.objects.create(aircraft_type=cls.tb2, part_type=cls.body, quantity=1)
+        for _ in range(4):
+            Part.objects.create(part_type=cls.wing, aircraft_type=cls.tb2, owner=cls.member)
+
+        yesterday = timezone.localdate() - timedelta(days=1)
+        # 1 and 3 wings a day, 2 bodies a day and 1 aircraft every 2 days over the last 10 days
+        for team, part_type, count in [(cls.wing_team, cls.wing, 10), (cls.second_wing_team, cls.wing, 30),
+                                       (cls.body_team, cls.body, 20)]:
+            DailyPartProduction.objects.create(
+                date=yesterday, team=team, part_type=part_type, aircraft_type=cls.tb2, count=count
+            )
+        # Parts created above are counted today, outside of the history
+        DailyAssembly.objects.create(date=yesterday, aircraft_type=cls.tb2, count=5)
+
+    def setUp(self):
+        # Rolled back requirement changes of other tests do not send the invalidating signals
+        invalidate_bom_cache()
+
+    def test_plan(self):
+        """Test that the plan nets out stock, splits parts by team rate and estimates completion"""
+        today = timezone.localdate()
+        plan = get_production_plan({'TB2': 10}, deadline=today + timedelta(days=10), history_days=10)
+        self.assertEqual(plan['aircraft_types']['TB2']['to_produce'], {'WING': 16, 'BODY': 10})
+        self.assertEqual(plan['part_types']['WING'], {'required': 20, 'available': 4, 'to_produce': 16, 'unassigned': 0})
+
+        teams = {team['team_name']: team for team in plan['teams']}
+        self.assertEqual(teams['Wing Team']['parts'], {'WING': 4})
+        self.assertEqual(teams['Second Wing Team']['parts'], {'WING': 12})
+        self.assertEqual(teams['Body Team']['parts'], {'BODY': 10})
+        self.assertEqual(teams['Body Team']['daily_rate'], {'BODY': 2.0})
+        self.assertEqual(teams['Wing Team']['estimated_days'], 4)
+        self.assertEqual(teams['Body Team']['estimated_completion'], today + timedelta(days=5))
+
+        self.assertEqual(plan['assembly']['estimated_completion'], today + timedelta(days=20))
+        self.assertEqual(plan['estimated_completion'], today + timedelta(days=20))
+        self.assertFalse(plan['on_track'])
+
+    def test_plan_unknown_aircraft_type(self):
+        """Test that targets must have part requirements"""
+        with self.assertRaises(PlanningError):
+            get_production_plan({'AKINCI': 1})
+
+    def test_plan_lots(self):
+        """Test that lots count their units in the rollups and the plan"""
+        today = timezone.localdate()
+        rivet = PartType.objects.create(name="RIVET", is_lot_tracked=True)
+        TeamPartPermission.objects.create(team_type=self.wing_type, part_type=rivet, can_create=True)
+        AircraftPartRequirement.objects.create(aircraft_type=self.tb2, part_type=rivet, quantity=100)
+        lot = Part.objects.create(part_type=rivet, aircraft_type=self.tb2, owner=self.member, quantity=500)
+        self.assertEqual(DailyPartProduction.objects.get(date=today, part_type=rivet).count, 500)
+
+        # Move the lot into the history, the recompute counts its units as well
+        produced_at = timezone.now() - timedelta(days=2)
+        Part.objects.filter(pk=lot.pk).update(created_at=produced_at)
+        day = timezone.localdate(produced_at)
+        recompute_part_production(day, day)
+        self.assertEqual(DailyPartProduction.objects.get(date=day, part_type=rivet).count, 500)
+
+        plan = get_production_plan({'TB2': 10}, history_days=10)
+        self.assertEqual(plan['part_types']['RIVET'], {'required': 1000, 'available': 500, 'to_produce': 500, 'unassigned': 0})
+        teams = {team['team_name']: team for team in plan['teams']}
+        self.assertEqual(teams['Wing Team']['parts'], {'WING': 4, 'RIVET': 500})
+        self.assertEqual(teams['Wing Team']['daily_rate'], {'WING': 1.0, 'RIVET': 50.0})
+        self.assertEqual(teams['Wing Team']['estimated_days'], 14)
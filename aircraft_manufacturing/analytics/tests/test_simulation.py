@@ -0,0 +1,94 @@
+from datetime import timedelta
+import numpy as np
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from accounts.models import TeamType, Team, TeamMember
+from accounts.constants import TeamTypes
+from analytics.simulation import FactoryConfig, load_factory_config, run_replication, simulate
+from assembly.models import Aircraft, AircraftPartRequirement, AircraftType
+from inventory.models import PartType, TeamPartPermission
+
+
+def get_config(avionics_rate: float = 2.0, **kwargs) -> FactoryConfig:
+    """One aircraft type needing 2 wings and 2 avionics, built by a wing and an avionics team"""
+    defaults = dict(
+        aircraft_types=['TB3'],
+        part_types=['WING', 'AVIONICS'],
+        required=np.array([[2, 2]]),
+        mix=np.array([1.0]),
+        team_names=['WING Team', 'AVIONICS Team'],
+        team_rates=np.array([10.0, avionics_rate]),
+        capabilities=np.array([[1.0, 0.0], [0.0, 1.0]]),
+        assembly_teams=2,
+        assembly_rate=2.0,
+        days=60,
+    )
+    defaults.update(kwargs)
+    return FactoryConfig(**defaults)
+
+
+class SimulationTests(TestCase):
+    def test_replication_consumes_kits(self):
+        """Test that assembled aircraft never use more parts than produced"""
+        result = run_replication(get_config(), seed=1)
+        self.assertTrue((result.consumed <= result.produced).all())
+        # Every started kit takes 2 wings and 2 avionics, finished or not
+        self.assertEqual(result.consumed[0], result.consumed[1])
+        self.assertGreaterEqual(result.consumed[0], result.completed[0] * 2)
+        self.assertGreater(result.completed[0], 0)
+
+    def test_simulate_bottleneck(self):
+        """Test that the slow avionics team is the bottleneck until a second one is added"""
+        report = simulate(get_config(), replications=20, seed=1)
+        self.assertEqual(report['bottleneck'], 'AVIONICS')
+        # One avionics team makes 2 parts a day, enough for 1 aircraft a day
+        self.assertAlmostEqual(report['total_throughput']['mean'], 60, delta=6)
+        self.assertGreater(report['teams']['AVIONICS Team']['utilisation'], report['teams']['WING Team']['utilisation'])
+
+        doubled = simulate(get_config().with_team_copy('AVIONICS Team'), replications=20, seed=1)
+        self.assertGreater(doubled['total_throughput']['mean'], report['total_throughput']['mean'] * 1.5)
+        self.assertIn('AVIONICS Team (2)', doubled['teams'])
+
+    def test_simulate_is_reproducible_across_workers(self):
+        """Test that results only depend on the seed, not on the process pool"""
+        config = get_config(days=10)
+        self.assertEqual(
+            simulate(config, replications=4, workers=1, seed=7),
+            simulate(config, replications=4, workers=2, seed=7)
+        )
+
+    def test_load_factory_config(self):
+        """Test that the layout is read from teams, permissions and requirements"""
+        wing_type = TeamType.objects.create(name=TeamTypes.WING)
+        Team.objects.create(team_type=wing_type, name="Wing Team")
+        Team.objects.create(team_type=TeamType.objects.create(name=TeamTypes.ASSEMBLY), name="Assembly Team")
+        aircraft_type = AircraftType.objects.create(name="TB2")
+        wing = PartType.objects.create(name="WING")
+        TeamPartPermission.objects.create(team_type=wing_type, part_type=wing, can_create=True)
+        AircraftPartRequirement.objects.create(aircraft_type=aircraft_type, part_type=wing, quantity=2)
+
+        with self.assertRaises(ValueError):
+            load_factory_config(days=5, default_team_rate=4)
+        config = load_factory_config(days=5, default_team_rate=4, assembly_rate=2)
+        self.assertEqual(config.team_names, ['Wing Team'])
+        self.assertEqual(config.team_rates.tolist(), [4.0])
+        self.assertEqual(config.required.tolist(), [[2]])
+        self.assertEqual(config.assembly_teams, 1)
+        self.assertIn(simulate(config, replications=2, seed=1)['bottleneck'], ('WING', 'assembly'))
+
+    def test_assembly_rate_from_busiest_days(self):
+        """Test that the assembly rate is the capacity of the busiest days, not the average throughput"""
+        assembly_team = Team.objects.create(team_type=TeamType.objects.create(name=TeamTypes.ASSEMBLY), name="Assembly Team")
+        member = TeamMember.objects.create(team=assembly_team, user=User.objects.create_user(username="assembler"))
+        aircraft_type = AircraftType.objects.create(name="TB2")
+        wing = PartType.objects.create(name="WING")
+        AircraftPartRequirement.objects.create(aircraft_type=aircraft_type, part_type=wing, quantity=2)
+        # Starved most days, 3 aircraft on the days all parts were there
+        for days_ago, count in [(1, 1), (2, 1), (3, 1), (4, 3), (5, 3)]:
+            for _ in range(count):
+                aircraft = Aircraft.objects.create(aircraft_type=aircraft_type, owner=member)
+                Aircraft.objects.filter(id=aircraft.id).update(created_at=timezone.now() - timedelta(days=days_ago))
+
+        config = load_factory_config(days=5)
+        self.assertEqual(config.assembly_rate, 3.0)
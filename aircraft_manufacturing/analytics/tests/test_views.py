@@ -0,0 +1,236 @@
+from datetime import date, timedelta
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework import status
+from django.test import TestCase
+from rest_framework.test import APITestCase
+from accounts.models import TeamType, Team, TeamMember
+from accounts.constants import TeamTypes
+from analytics.models import DailyAssembly, DailyPartProduction
+from analytics.search import global_search
+from assembly.bom import invalidate_bom_cache
+from assembly.models import Aircraft, AircraftPart, AircraftPartRequirement, AircraftType, PartComponent, Reservation
+from inventory.models import Part, PartType, TeamPartPermission
+
+
+class ProductionViewSetTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        """Set up data for all test methods"""
+        cls.user = User.objects.create_user(username="manager", password="password")
+        cls.wing_team = Team.objects.create(team_type=TeamType.objects.create(name=TeamTypes.WING), name="Wing Team")
+        cls.body_team = Team.objects.create(team_type=TeamType.objects.create(name=TeamTypes.BODY), name="Body Team")
+        cls.aircraft_type = AircraftType.objects.create(name="TB2")
+        cls.wing = PartType.objects.create(name="WING")
+        cls.body = PartType.objects.create(name="BODY")
+        for day, team, part_type, count in [
+            (date(2024, 1, 1), cls.wing_team, cls.wing, 4),
+            (date(2024, 1, 2), cls.wing_team, cls.wing, 6),
+            (date(2024, 1, 2), cls.body_team, cls.body, 3),
+            (date(2024, 2, 5), cls.wing_team, cls.wing, 2),
+        ]:
+            DailyPartProduction.objects.create(
+                date=day, team=team, part_type=part_type, aircraft_type=cls.aircraft_type, count=count
+            )
+        DailyAssembly.objects.create(date=date(2024, 1, 1), aircraft_type=cls.aircraft_type, count=1)
+        DailyAssembly.objects.create(date=date(2024, 1, 3), aircraft_type=cls.aircraft_type, count=2)
+
+    def get_api_url(self, viewname, **kwargs):
+        """Helper method to generate versioned API URLs"""
+        version = 'v1'
+        kwargs['version'] = version
+        return reverse(viewname, kwargs=kwargs)
+
+    def test_part_series(self):
+        """Test part production buckets with filters and groups"""
+        url = self.get_api_url('analytics:production-parts')
+        params = {'start': '2024-01-01', 'end': '2024-02-29'}
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(url, {**params, 'interval': 'month', 'group_by': 'part_type'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(row['period'], row['part_type_name'], row['count']) for row in response.data['results']],
+            [(date(2024, 1, 1), 'WING', 10), (date(2024, 1, 1), 'BODY', 3), (date(2024, 2, 1), 'WING', 2)]
+        )
+
+        response = self.client.get(url, {**params, 'interval': 'week', 'team': self.wing_team.id})
+        self.assertEqual(
+            [(row['period'], row['team_name'], row['count']) for row in response.data['results']],
+            [(date(2024, 1, 1), 'Wing Team', 10), (date(2024, 2, 5), 'Wing Team', 2)]
+        )
+
+        response = self.client.get(url, {**params, 'group_by': 'owner'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_aircraft_series(self):
+        """Test aircraft assembly buckets"""
+        self.client.force_authenticate(user=self.user)
+        url = self.get_api_url('analytics:production-aircraft')
+        response = self.client.get(url, {'start': '2024-01-01', 'end': '2024-01-31', 'interval': 'week'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data['results'],
+            [{'period': date(2024, 1, 1), 'aircraft_type': self.aircraft_type.id, 'aircraft_type_name': 'TB2', 'count': 3}]
+        )
+
+        response = self.client.get(url, {'start': '2024-02-01', 'end': '2024-01-01'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ReportViewSetTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        """Set up data for all test methods"""
+        cls.user = User.objects.create_user(username="manager", password="password")
+        cls.wing_type = TeamType.objects.create(name=TeamTypes.WING)
+        cls.member = TeamMember.objects.create(
+            team=Team.objects.create(team_type=cls.wing_type, name="Wing Team"), user=cls.user
+        )
+        cls.tb2 = AircraftType.objects.create(name="TB2")
+        cls.tb3 = AircraftType.objects.create(name="TB3")
+        cls.empty = AircraftType.objects.create(name="AKINCI")
+        cls.wing = PartType.objects.create(name="WING")
+        cls.body = PartType.objects.create(name="BODY")
+        cls.tail = PartType.objects.create(name="TAIL")
+        for part_type in (cls.wing, cls.body, cls.tail):
+            TeamPartPermission.objects.create(team_type=cls.wing_type, part_type=part_type, can_create=True)
+        for aircraft_type, part_type, quantity in [
+            (cls.tb2, cls.wing, 2), (cls.tb2, cls.body, 1),
+            (cls.tb3, cls.wing, 2), (cls.tb3, cls.body, 1), (cls.tb3, cls.tail, 1),
+        ]:
+            AircraftPartRequirement.objects.create(aircraft_type=aircraft_type, part_type=part_type, quantity=quantity)
+        for aircraft_type, part_type, count in [
+            (cls.tb2, cls.wing, 5), (cls.tb2, cls.body, 2), (cls.tb2, cls.tail, 1),
+            (cls.tb3, cls.wing, 4), (cls.tb3, cls.body, 2),
+        ]:
+            for _ in range(count):
+                Part.objects.create(part_type=part_type, aircraft_type=aircraft_type, owner=cls.member)
+        used = Part.objects.create(part_type=cls.body, aircraft_type=cls.tb3, owner=cls.member)
+        Part.objects.filter(id=used.id).update(is_used=True)
+
+    def setUp(self):
+        # Rolled back requirement changes of other tests do not send the invalidating signals
+        invalidate_bom_cache()
+
+    def get_api_url(self, viewname, **kwargs):
+        """Helper method to generate versioned API URLs"""
+        version = 'v1'
+        kwargs['version'] = version
+        return reverse(viewname, kwargs=kwargs)
+
+    def test_buildable(self):
+        """Test buildable counts, limiting part types and surplus from four queries once the explosions are cached"""
+        self.client.force_authenticate(user=self.user)
+        url = self.get_api_url('analytics:reports-buildable')
+        self.client.get(url)
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(response.data), ['TB2', 'TB3'])
+        self.assertEqual(response.data['TB2'], {
+            'aircraft_type': self.tb2.id,
+            'buildable': 2,
+            'limiting_part_types': ['WING', 'BODY'],
+            'surplus': {'WING': 1, 'BODY': 0, 'TAIL': 1},
+            'missing_for_next': {'WING': 1, 'BODY': 1},
+        })
+        self.assertEqual(response.data['TB3']['buildable'], 0)
+        self.assertEqual(response.data['TB3']['limiting_part_types'], ['TAIL'])
+        self.assertEqual(response.data['TB3']['surplus'], {'WING': 4, 'BODY': 2, 'TAIL': 0})
+
+    def test_buildable_leaves_out_reserved_parts(self):
+        """Test that parts held by a reservation are not counted as buildable stock"""
+        reservation = Reservation.objects.create(
+            aircraft_type=self.tb2, owner=self.member, expires_at=timezone.now() + timedelta(minutes=30)
+        )
+        wings = Part.objects.filter(aircraft_type=self.tb2, part_type=self.wing).order_by('id')[:2]
+        Part.objects.filter(id__in=[part.id for part in wings]).update(reservation=reservation)
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.get_api_url('analytics:reports-buildable'))
+        self.assertEqual(response.data['TB2']['buildable'], 1)
+        self.assertEqual(response.data['TB2']['surplus']['WING'], 1)
+
+    def test_buildable_explodes_sub_assemblies(self):
+        """Test that sub-assemblies are counted by the leaf components they are built from"""
+        frame = PartType.objects.create(name="FRAME")
+        TeamPartPermission.objects.create(team_type=self.wing_type, part_type=frame, can_create=True)
+        PartComponent.objects.create(part_type=self.body, component=frame, quantity=2)
+        for _ in range(4):
+            Part.objects.create(part_type=frame, aircraft_type=self.tb2, owner=self.member)
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.get_api_url('analytics:reports-buildable'))
+        self.assertEqual(response.data['TB2']['buildable'], 2)
+        self.assertEqual(response.data['TB2']['limiting_part_types'], ['WING', 'FRAME'])
+        self.assertEqual(response.data['TB2']['missing_for_next'], {'WING': 1, 'FRAME': 2})
+        self.assertEqual(response.data['TB3']['limiting_part_types'], ['TAIL', 'FRAME'])
+
+    def test_plan(self):
+        """Test the production plan endpoint validation"""
+        self.client.force_authenticate(user=self.user)
+        url = self.get_api_url('analytics:reports-plan')
+        response = self.client.post(url, {'targets': {'TB2': 3}}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['aircraft_types']['TB2']['to_produce'], {'WING': 1, 'BODY': 1})
+        self.assertEqual(response.data['teams'][0]['parts'], {'WING': 1, 'BODY': 1, 'TAIL': 0})
+
+        response = self.client.post(url, {'targets': {'TB2': -1}}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(url, {'targets': {'AKINCI': 1}}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search(self):
+        """Test that one search ranks parts, the aircraft they went into, users and teams"""
+        assembler = TeamMember.objects.create(
+            team=Team.objects.create(team_type=TeamType.objects.create(name=TeamTypes.ASSEMBLY), name="Assembly Team"),
+            user=User.objects.create_user(username="assembler")
+        )
+        aircraft = Aircraft.objects.create(aircraft_type=self.tb2, owner=assembler, serial_number='A-00C0FFEE')
+        part = Part.objects.create(part_type=self.wing, aircraft_type=self.tb2, owner=self.member,
+                                   serial_number='P-00C0FFEE')
+        AircraftPart.objects.create(aircraft=aircraft, part=part)
+        self.client.force_authenticate(user=self.user)
+        url = self.get_api_url('analytics:reports-search')
+
+        response = self.client.get(url, {'q': 'p-00c0ffee'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['timed_out'], [])
+        self.assertEqual(response.data['results'][0]['label'], 'P-00C0FFEE')
+        self.assertEqual(response.data['results'][0]['aircraft'], {'id': aircraft.id, 'serial_number': 'A-00C0FFEE'})
+
+        response = self.client.get(url, {'q': 'c0ffee'})
+        self.assertEqual([(result['category'], result['label']) for result in response.data['results']],
+                         [('part', 'P-00C0FFEE'), ('aircraft', 'A-00C0FFEE')])
+        self.assertEqual(response.data['results'][1]['description'], 'TB2 assembled by assembler')
+
+        response = self.client.get(url, {'q': 'wing team', 'limit': 1})
+        self.assertEqual([(result['category'], result['score']) for result in response.data['results']],
+                         [('team', 3)])
+        response = self.client.get(url, {'q': 'man'})
+        self.assertEqual([(result['category'], result['label']) for result in response.data['results']],
+                         [('user', 'manager')])
+
+        response = self.client.get(url, {'q': 'a'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SearchBudgetTests(TestCase):
+    def test_categories_within_budget(self):
+        """Test that every category is searched on the request's connection, and a spent budget skips them"""
+        user = User.objects.create_user(username="searcher", email="searcher@example.com")
+        Team.objects.create(team_type=TeamType.objects.create(name=TeamTypes.WING), name="Searcher Team")
+
+        result = global_search('searcher')
+        self.assertEqual(result['timed_out'], [])
+        self.assertEqual([(row['category'], row['id'], row['score']) for row in result['results']][:1],
+                         [('user', user.id, 3)])
+        self.assertEqual(result['results'][1]['label'], 'Searcher Team')
+
+        result = global_search('searcher', timeout=0)
+        self.assertEqual(result['timed_out'], ['part', 'aircraft', 'user', 'team'])
+        self.assertEqual(result['results'], [])
@@ -0,0 +1,9 @@
+from rest_framework.routers import DefaultRouter
+from . import views
+
+app_name = 'analytics'
+router = DefaultRouter()
+router.register('production', views.ProductionViewSet, basename='production')
+router.register('reports', views.ReportViewSet, basename='reports')
+
+urlpatterns = router.urls
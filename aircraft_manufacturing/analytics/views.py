@@ -0,0 +1,323 @@
+from django.db.models import Sum
+from django.db.models.functions import Trunc
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from aircraft_manufacturing.responses import GeneralFailedResponseSerializer
+from .buildable import get_buildable_report
+from .constants import SEARCH_LIMIT, SEARCH_MAX_LIMIT, SEARCH_MIN_LENGTH, SERIES_INTERVALS
+from .models import DailyAssembly, DailyPartProduction
+from .planning import PlanningError, get_production_plan
+from .search import global_search
+from .serializers import PartSeriesQuerySerializer, PlanRequestSerializer, SeriesQuerySerializer
+
+SERIES_PARAMETERS = [
+    openapi.Parameter(
+        'interval',
+        openapi.IN_QUERY,
+        description="Bucket size of the series (day, week, month). Defaults to day",
+        type=openapi.TYPE_STRING,
+        required=False
+    ),
+    openapi.Parameter(
+        'start',
+        openapi.IN_QUERY,
+        description="First day of the series (format: YYYY-MM-DD)",
+        type=openapi.TYPE_STRING,
+        format=openapi.FORMAT_DATE,
+        required=False
+    ),
+    openapi.Parameter(
+        'end',
+        openapi.IN_QUERY,
+        description="Last day of the series (format: YYYY-MM-DD). Defaults to today",
+        type=openapi.TYPE_STRING,
+        format=openapi.FORMAT_DATE,
+        required=False
+    ),
+    openapi.Parameter(
+        'aircraft_type',
+        openapi.IN_QUERY,
+        description="Filter by aircraft type",
+        type=openapi.TYPE_INTEGER,
+        required=False
+    ),
+]
+
+SERIES_RESPONSE = openapi.Schema(
+    type=openapi.TYPE_OBJECT,
+    properties={
+        'interval': openapi.Schema(type=openapi.TYPE_STRING),
+        'start': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
+        'end': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
+        'results': openapi.Schema(
+            type=openapi.TYPE_ARRAY,
+            items=openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    'period': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
+                    'count': openapi.Schema(type=openapi.TYPE_INTEGER),
+                },
+                additionalProperties=openapi.Schema(type=openapi.TYPE_STRING),
+            ),
+        ),
+    }
+)
+
+
+class ProductionViewSet(viewsets.GenericViewSet):
+    """Production time series read from the daily rollups."""
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = None
+
+    def get_series(self, queryset, query: dict, groups: dict) -> Response:
+        """Sum the rollup rows into period buckets grouped by the given {key: lookup} columns."""
+        rows = queryset.filter(
+            date__range=(query['start'], query['end'])
+        ).annotate(
+            period=Trunc('date', SERIES_INTERVALS[query['interval']])
+        ).values(
+            'period', *groups.values()
+        ).annotate(
+            total=Sum('count')
+        ).order_by('period', *groups.values())
+
+        results = []
+        for row in rows:
+            result = {'period': row['period']}
+            result.update({key: row[lookup] for key, lookup in groups.items()})
+            result['count'] = row['total']
+            results.append(result)
+        return Response(data={
+            'interval': query['interval'],
+            'start': query['start'],
+            'end': query['end'],
+            'results': results,
+        })
+
+    @swagger_auto_schema(
+        method='get',
+        operation_summary="Part production series",
+        operation_description="Get the number of parts produced per period, grouped by team, part type and/or aircraft type",
+        manual_parameters=SERIES_PARAMETERS + [
+            openapi.Parameter(
+                'team',
+                openapi.IN_QUERY,
+                description="Filter by team",
+                type=openapi.TYPE_INTEGER,
+                required=False
+            ),
+            openapi.Parameter(
+                'part_type',
+                openapi.IN_QUERY,
+                description="Filter by part type",
+                type=openapi.TYPE_INTEGER,
+                required=False
+            ),
+            openapi.Parameter(
+                'group_by',
+                openapi.IN_QUERY,
+                description="Comma separated groups (team, part_type, aircraft_type). Defaults to team,part_type",
+                type=openapi.TYPE_STRING,
+                required=False
+            ),
+        ],
+        responses={
+            status.HTTP_200_OK: openapi.Response(description="Success", schema=SERIES_RESPONSE),
+            status.HTTP_400_BAD_REQUEST: GeneralFailedResponseSerializer,
+        }
+    )
+    @action(detail=False, methods=['get'], url_path='parts')
+    def parts(self, request, *args, **kwargs):
+        """Get the part production series."""
+        serializer = PartSeriesQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        query = serializer.validated_data
+
+        queryset = DailyPartProduction.objects.all()
+        for field in ('team', 'part_type', 'aircraft_type'):
+            if query.get(field) is not None:
+                queryset = queryset.filter(**{f'{field}_id': query[field]})
+
+        groups = {}
+        for group in query['group_by']:
+            groups[group] = f'{group}_id'
+            groups[f'{group}_name'] = f'{group}__name'
+        return self.get_series(queryset, query, groups)
+
+    @swagger_auto_schema(
+        method='get',
+        operation_summary="Aircraft assembly series",
+        operation_description="Get the number of aircraft assembled per period and aircraft type",
+        manual_parameters=SERIES_PARAMETERS,
+        responses={
+            status.HTTP_200_OK: openapi.Response(description="Success", schema=SERIES_RESPONSE),
+            status.HTTP_400_BAD_REQUEST: GeneralFailedResponseSerializer,
+        }
+    )
+    @action(detail=False, methods=['get'], url_path='aircraft')
+    def aircraft(self, request, *args, **kwargs):
+        """Get the aircraft assembly series."""
+        serializer = SeriesQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        query = serializer.validated_data
+
+        queryset = DailyAssembly.objects.all()
+        if query.get('aircraft_type') is not None:
+            queryset = queryset.filter(aircraft_type_id=query['aircraft_type'])
+        groups = {'aircraft_type': 'aircraft_type_id', 'aircraft_type_name': 'aircraft_type__name'}
+        return self.get_series(queryset, query, groups)
+
+
+class ReportViewSet(viewsets.GenericViewSet):
+    """Stock and capacity reports computed on the requirement matrices."""
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = None
+
+    @swagger_auto_schema(
+        method='get',
+        operation_summary="Buildable aircraft",
+        operation_description="Get how many aircraft of each type the unused stock can build, "
+                              "the limiting part types and the surplus of every part type",
+        responses={
+            status.HTTP_200_OK: openapi.Response(
+                description="Success",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    additionalProperties=openapi.Schema(
+                        type=openapi.TYPE_OBJECT,
+                        properties={
+                            'aircraft_type': openapi.Schema(type=openapi.TYPE_INTEGER),
+                            'buildable': openapi.Schema(type=openapi.TYPE_INTEGER),
+                            'limiting_part_types': openapi.Schema(
+                                type=openapi.TYPE_ARRAY,
+                                items=openapi.Schema(type=openapi.TYPE_STRING),
+                            ),
+                            'surplus': openapi.Schema(
+                                type=openapi.TYPE_OBJECT,
+                                additionalProperties=openapi.Schema(type=openapi.TYPE_INTEGER),
+                            ),
+                            'missing_for_next': openapi.Schema(
+                                type=openapi.TYPE_OBJECT,
+                                additionalProperties=openapi.Schema(type=openapi.TYPE_INTEGER),
+                            ),
+                        },
+                    ),
+                ),
+            ),
+        }
+    )
+    @action(detail=False, methods=['get'], url_path='buildable')
+    def buildable(self, request, *args, **kwargs):
+        """Get the buildable aircraft report."""
+        return Response(data=get_buildable_report())
+
+    @swagger_auto_schema(
+        method='post',
+        operation_summary="Production plan",
+        operation_description="Get the parts every team still has to produce to assemble the target aircraft, "
+                              "net of the unused stock, with completion estimates from recent production rates",
+        request_body=PlanRequestSerializer,
+        responses={
+            status.HTTP_200_OK: openapi.Response(
+                description="Success",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'aircraft_types': openapi.Schema(type=openapi.TYPE_OBJECT),
+                        'part_types': openapi.Schema(type=openapi.TYPE_OBJECT),
+                        'teams': openapi.Schema(
+                            type=openapi.TYPE_ARRAY,
+                            items=openapi.Schema(type=openapi.TYPE_OBJECT),
+                        ),
+                        'assembly': openapi.Schema(type=openapi.TYPE_OBJECT),
+                        'estimated_completion': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
+                        'on_track': openapi.Schema(type=openapi.TYPE_BOOLEAN),
+                    },
+                ),
+            ),
+            status.HTTP_400_BAD_REQUEST: GeneralFailedResponseSerializer,
+        }
+    )
+    @action(detail=False, methods=['post'], url_path='plan')
+    def plan(self, request, *args, **kwargs):
+        """Plan the production needed for the target aircraft counts."""
+        serializer = PlanRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            plan = get_production_plan(**serializer.validated_data)
+        except PlanningError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data=plan)
+
+    @swagger_auto_schema(
+        method='get',
+        operation_summary="Search",
+        operation_description="Search parts (with the aircraft they went into), aircraft (with who assembled them), "
+                              "users and teams at once. Matches are ranked exact, from the start, then anywhere; "
+                              "categories not answered within the latency budget are listed in timed_out",
+        manual_parameters=[
+            openapi.Parameter(
+                'q',
+                openapi.IN_QUERY,
+                description=f"Text to search, at least {SEARCH_MIN_LENGTH} characters",
+                type=openapi.TYPE_STRING,
+                required=True
+            ),
+            openapi.Parameter(
+                'limit',
+                openapi.IN_QUERY,
+                description=f"Results of every category (default {SEARCH_LIMIT}, at most {SEARCH_MAX_LIMIT})",
+                type=openapi.TYPE_INTEGER,
+                required=False
+            ),
+        ],
+        responses={
+            status.HTTP_200_OK: openapi.Response(
+                description="Success",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'query': openapi.Schema(type=openapi.TYPE_STRING),
+                        'results': openapi.Schema(
+                            type=openapi.TYPE_ARRAY,
+                            items=openapi.Schema(
+                                type=openapi.TYPE_OBJECT,
+                                properties={
+                                    'category': openapi.Schema(type=openapi.TYPE_STRING),
+                                    'id': openapi.Schema(type=openapi.TYPE_INTEGER),
+                                    'label': openapi.Schema(type=openapi.TYPE_STRING),
+                                    'description': openapi.Schema(type=openapi.TYPE_STRING),
+                                    'score': openapi.Schema(type=openapi.TYPE_INTEGER),
+                                },
+                            ),
+                        ),
+                        'timed_out': openapi.Schema(
+                            type=openapi.TYPE_ARRAY,
+                            items=openapi.Schema(type=openapi.TYPE_STRING),
+                        ),
+                        'elapsed_ms': openapi.Schema(type=openapi.TYPE_NUMBER),
+                    },
+                ),
+            ),
+            status.HTTP_400_BAD_REQUEST: GeneralFailedResponseSerializer,
+        }
+    )
+    @action(detail=False, methods=['get'], url_path='search')
+    def search(self, request, *args, **kwargs):
+        """Search parts, aircraft, users and teams."""
+        text = request.query_params.get('q', '').strip()
+        if len(text) < SEARCH_MIN_LENGTH:
+            return Response(
+                {"detail": f"Search text must be at least {SEARCH_MIN_LENGTH} characters"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limit = min(int(request.query_params.get('limit', SEARCH_LIMIT)), SEARCH_MAX_LIMIT)
+        except ValueError:
+            return Response({"detail": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1:
+            return Response({"detail": "limit must be positive"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data=global_search(text, limit))
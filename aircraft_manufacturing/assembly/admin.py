@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Aircraft, AircraftPart, AircraftType, AircraftPartRequirement
+from .models import Aircraft, AircraftPart, AircraftType, AircraftPartRequirement, PartComponent, Reservation
 
 
 @admin.register(AircraftType)
@@ -27,7 +27,7 @@ class AircraftAdmin(admin.ModelAdmin):
 
 @admin.register(AircraftPart)
 class AircraftPartAdmin(admin.ModelAdmin):
-    list_display = ['aircraft', 'part', 'created_at']
+    list_display = ['aircraft', 'part', 'quantity', 'created_at']
     list_filter = ['aircraft__aircraft_type', 'part__part_type', 'created_at']
     search_fields = ['aircraft__aircraft_type__name', 'part__part_type__name']
     date_hierarchy = 'created_at'
@@ -39,4 +39,19 @@ class AircraftPartRequirementAdmin(admin.ModelAdmin):
     list_display = ['aircraft_type', 'part_type', 'quantity', 'created_at']
     list_filter = ['aircraft_type', 'part_type', 'created_at']
     search_fields = ['aircraft_type__name', 'part_type__name']
-    date_hierarchy = 'created_at'
\ No newline at end of file
+    date_hierarchy = 'created_at'
+
+
+@admin.register(PartComponent)
+class PartComponentAdmin(admin.ModelAdmin):
+    list_display = ['part_type', 'component', 'quantity', 'created_at']
+    list_filter = ['part_type', 'component']
+    search_fields = ['part_type__name', 'component__name']
+
+
+@admin.register(Reservation)
+class ReservationAdmin(admin.ModelAdmin):
+    list_display = ['aircraft_type', 'owner', 'expires_at', 'created_at']
+    list_filter = ['aircraft_type', 'expires_at']
+    search_fields = ['aircraft_type__name', 'owner__user__username']
+    date_hierarchy = 'expires_at'
@@ -0,0 +1,570 @@
+"""Server side allocation of parts for aircraft assembly."""
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from django.db import connection, transaction
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Subquery, Sum, Value, When, Window
+from django.db.models.functions import RowNumber
+from accounts.models import TeamMember
+from aircraft_manufacturing.serials import format_serial, random_serial
+from django.utils import timezone
+from inventory.models import AVAILABLE_PARTS, Part
+from .bom import get_leaf_requirements
+from .constants import AIRCRAFT_SERIAL_PREFIX
+from .models import Aircraft, AircraftPart, AircraftType, Reservation
+
+# Selection rounds before giving up on parts taken by concurrent assemblies
+CLAIM_ATTEMPTS = 3
+
+
+class AllocationError(Exception):
+    """Raised when the stock cannot cover the requirements of an aircraft."""
+
+    def __init__(self, message: str, missing_parts: Optional[List[dict]] = None):
+        super().__init__(message)
+        self.missing_parts = missing_parts or []
+
+
+def get_requirements(aircraft_type: AircraftType) -> Dict[int, int]:
+    """Get the required quantity per leaf part type id for the aircraft type, sub-assemblies exploded."""
+    return get_leaf_requirements(aircraft_type.pk)
+
+
+def split_lot_requirements(requirements: Dict[int, int]) -> Tuple[Dict[int, int], Dict[int, int]]:
+    """Split the requirements into those of serialized and those of lot-tracked part types."""
+    from inventory.models import PartType
+
+    lot_type_ids = set(PartType.objects.filter(id__in=requirements, is_lot_tracked=True).values_list('id', flat=True))
+    return (
+        {part_type_id: quantity for part_type_id, quantity in requirements.items() if part_type_id not in lot_type_ids},
+        {part_type_id: quantity for part_type_id, quantity in requirements.items() if part_type_id in lot_type_ids},
+    )
+
+
+def select_oldest_parts(aircraft_type: AircraftType, requirements: Dict[int, int], count: int = 1,
+                        exclude: Iterable[int] = ()) -> Dict[int, List[int]]:
+    """
+    Select the oldest available parts covering the requirements of count aircraft in one query.
+
+    Where the database allows LIMIT inside compound statements this is a UNION ALL
+    of one index range scan per part type, otherwise parts are numbered per part
+    type with ROW_NUMBER() and the first quantity * count of each type are kept.
+    Parts in exclude are left out. Returns part ids grouped by part type id, oldest first.
+    """
+    if not requirements:
+        return {}
+    candidates = Part.objects.filter(AVAILABLE_PARTS, aircraft_type=aircraft_type)
+    if exclude:
+        candidates = candidates.exclude(id__in=list(exclude))
+    if connection.features.supports_slicing_ordering_in_compound:
+        queries = [
+            candidates.filter(part_type_id=part_type_id).order_by('created_at', 'id').values_list(
+                'part_type_id', 'id'
+            )[:quantity * count]
+            for part_type_id, quantity in requirements.items()
+        ]
+        selected = queries[0].union(*queries[1:], all=True)
+    else:
+        selected = candidates.filter(part_type_id__in=requirements).annotate(
+            position=Window(RowNumber(), partition_by=F('part_type_id'), order_by=[F('created_at').asc(), F('id').asc()]),
+            needed=Case(
+                *[When(part_type_id=part_type_id, then=Value(quantity * count))
+                  for part_type_id, quantity in requirements.items()],
+                output_field=IntegerField(),
+            ),
+        ).filter(position__lte=F('needed')).values_list('part_type_id', 'id').order_by('part_type_id', 'position')
+
+    parts = {part_type_id: [] for part_type_id in requirements}
+    for part_type_id, part_id in selected:
+        parts[part_type_id].append(part_id)
+    return parts
+
+
+def select_oldest_lots(aircraft_type: AircraftType, units: Dict[int, int],
+                       exclude: Iterable[int] = ()) -> Dict[int, List[Tuple[int, int]]]:
+    """
+    Select the oldest available lots covering the units of each lot-tracked part type in one query.
+
+    A running total of the remaining quantity per part type, SUM() OVER the lots in
+    age order, keeps the lots until the units are covered. Lots in exclude are left
+    out. Returns (lot id, units to take) grouped by part type id, oldest first.
+    """
+    lots = Part.objects.filter(AVAILABLE_PARTS, aircraft_type=aircraft_type, part_type_id__in=units, quantity__gt=0)
+    if exclude:
+        lots = lots.exclude(id__in=list(exclude))
+    lots = lots.annotate(
+        covered=Window(Sum('quantity'), partition_by=F('part_type_id'), order_by=[F('created_at').asc(), F('id').asc()]),
+        needed=Case(
+            *[When(part_type_id=part_type_id, then=Value(needed)) for part_type_id, needed in units.items()],
+            output_field=IntegerField(),
+        ),
+    ).filter(covered__lt=F('needed') + F('quantity')).values_list(
+        'part_type_id', 'id', 'quantity', 'covered', 'needed'
+    ).order_by('part_type_id', 'covered')
+
+    selected = {part_type_id: [] for part_type_id in units}
+    for part_type_id, lot_id, quantity, covered, needed in lots:
+        selected[part_type_id].append((lot_id, min(quantity, needed - (covered - quantity))))
+    return selected
+
+
+def count_lot_units(parts: Dict[int, List[Tuple[int, int]]]) -> Dict[int, int]:
+    """Sum the units taken from the lots of each part type."""
+    return {part_type_id: sum(quantity for _, quantity in lots) for part_type_id, lots in parts.items()}
+
+
+def get_missing_parts(requirements: Dict[int, int], available: Dict[int, int], count: int = 1) -> List[dict]:
+    """Describe the part types whose available parts or units do not cover the requirements."""
+    from inventory.models import PartType
+
+    short = {
+        part_type_id: quantity * count
+        for part_type_id, quantity in requirements.items()
+        if available.get(part_type_id, 0) < quantity * count
+    }
+    names = dict(PartType.objects.filter(id__in=short).values_list('id', 'name'))
+    return [
+        {'type': names[part_type_id], 'required': required, 'available': available.get(part_type_id, 0)}
+        for part_type_id, required in short.items()
+    ]
+
+
+def get_mismatched_parts(requirements: Dict[int, int], selected: Dict[int, int]) -> List[dict]:
+    """Describe the part types whose selected parts are short of, over or not in the requirements."""
+    from inventory.models import PartType
+
+    mismatched = sorted(
+        part_type_id for part_type_id in set(requirements) | set(selected)
+        if selected.get(part_type_id, 0) != requirements.get(part_type_id, 0)
+    )
+    names = dict(PartType.objects.filter(id__in=mismatched).values_list('id', 'name'))
+    return [
+        {
+            'type': names[part_type_id],
+            'required': requirements.get(part_type_id, 0),
+            'available': selected.get(part_type_id, 0),
+        }
+        for part_type_id in mismatched
+    ]
+
+
+def release_expired_holds(aircraft_type: AircraftType) -> int:
+    """
+    Release the parts of the aircraft type held by expired reservations and return their number.
+
+    Allocation runs this first, so expired kits are not held out of stock until the
+    release_reservations sweep removes them. The expired reservations are left to the sweep.
+    """
+    return Part.objects.filter(
+        reservation__in=Reservation.objects.filter(aircraft_type=aircraft_type, expires_at__lte=timezone.now()),
+        is_used=False,
+    ).update(reservation=None)
+
+
+def update_available_parts(part_ids: List[int], assignments: str, params: list,
+                           aircraft_type: Optional[AircraftType] = None,
+                           reservation: Optional[Reservation] = None,
+                           condition: str = "", condition_params: Iterable = ()) -> List[int]:
+    """
+    Apply the SET assignments to the parts which are still available and return their ids.
+
+    This is a single conditional UPDATE ... RETURNING. Available means unused and not
+    reserved, or reserved by the given reservation, and matching the extra SQL
+    condition when given. Where the database supports it
+    the rows are picked with FOR UPDATE SKIP LOCKED, so parts held by a concurrent
+    assembly are skipped instead of waited on and the caller can pick others.
+    """
+    if not part_ids:
+        return []
+    table = connection.ops.quote_name(Part._meta.db_table)
+    candidates = f"SELECT id FROM {table} WHERE id IN ({', '.join(['%s'] * len(part_ids))}) AND is_used = %s"
+    candidate_params = [*part_ids, False]
+    if reservation is None:
+        candidates += " AND reservation_id IS NULL"
+    else:
+        candidates += " AND reservation_id = %s"
+        candidate_params.append(reservation.pk)
+    if aircraft_type is not None:
+        candidates += " AND aircraft_type_id = %s"
+        candidate_params.append(aircraft_type.pk)
+    if condition:
+        candidates += f" AND {condition}"
+        candidate_params.extend(condition_params)
+    if connection.features.has_select_for_update_skip_locked:
+        candidates += " FOR UPDATE SKIP LOCKED"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {table} SET {assignments} WHERE id IN ({candidates}) RETURNING id",
+            [*params, *candidate_params]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def claim_parts(part_ids: List[int], aircraft_type: Optional[AircraftType] = None,
+                reservation: Optional[Reservation] = None) -> List[int]:
+    """Mark the available serialized parts as used and return the claimed ids."""
+    return update_available_parts(
+        part_ids, "is_used = %s, reservation_id = NULL", [True], aircraft_type=aircraft_type, reservation=reservation,
+        condition="quantity IS NULL"
+    )
+
+
+def reserve_parts(part_ids: List[int], reservation: Reservation) -> List[int]:
+    """Hold the available serialized parts for the reservation and return the reserved ids."""
+    return update_available_parts(
+        part_ids, "reservation_id = %s", [reservation.pk], aircraft_type=reservation.aircraft_type,
+        condition="quantity IS NULL"
+    )
+
+
+def take_lot_units(units: Dict[int, int], aircraft_type: Optional[AircraftType] = None) -> List[int]:
+    """
+    Take units from the remaining quantity of available lots and return the ids of the lots taken from.
+
+    Every lot is decremented in the same conditional UPDATE, so a lot never goes below
+    zero and is marked as used once it is empty. Lots which no longer hold the units
+    or are held by a concurrent assembly are left unchanged.
+    """
+    if not units:
+        return []
+    taken = f"CASE id {' '.join(['WHEN %s THEN %s'] * len(units))} END"
+    taken_params = [value for lot_id, quantity in units.items() for value in (lot_id, quantity)]
+    return update_available_parts(
+        list(units), f"quantity = quantity - {taken}, is_used = (quantity = {taken})", taken_params * 2,
+        aircraft_type=aircraft_type, condition=f"quantity >= {taken}", condition_params=taken_params
+    )
+
+
+def claim_oldest_parts(aircraft_type: AircraftType, requirements: Dict[int, int], count: int = 1,
+                       selected: Optional[Dict[int, List[int]]] = None,
+                       claim: Callable[[List[int]], List[int]] = claim_parts) -> Dict[int, List[int]]:
+    """
+    Claim the oldest available parts covering the requirements of count aircraft.
+
+    Parts are claimed with the claim function, claim_parts unless reserving them.
+    The first round uses the already selected parts when given. When some of the
+    parts were taken by a concurrent assembly only the shortfall is selected again,
+    leaving the skipped parts out, up to CLAIM_ATTEMPTS times. Returns the claimed
+    part ids grouped by part type id, raises AllocationError when the stock is short.
+    """
+    claimed = {part_type_id: [] for part_type_id in requirements}
+    skipped = set()
+    for _ in range(CLAIM_ATTEMPTS):
+        shortfall = {
+            part_type_id: quantity * count - len(claimed[part_type_id])
+            for part_type_id, quantity in requirements.items()
+            if len(claimed[part_type_id]) < quantity * count
+        }
+        if not shortfall:
+            break
+        if selected is not None:
+            parts = {part_type_id: selected.get(part_type_id, [])[:need] for part_type_id, need in shortfall.items()}
+            selected = None
+        else:
+            # The shortfall per type is passed as a requirement of a single aircraft
+            parts = select_oldest_parts(aircraft_type, shortfall, exclude=skipped)
+        found = {
+            part_type_id: len(claimed[part_type_id]) + len(parts.get(part_type_id, []))
+            for part_type_id in requirements
+        }
+        missing_parts = get_missing_parts(requirements, found, count)
+        if missing_parts:
+            raise AllocationError(f"Not enough parts to assemble {aircraft_type.name}", missing_parts)
+
+        part_ids = [part_id for type_part_ids in parts.values() for part_id in type_part_ids]
+        claimed_ids = set(claim(part_ids))
+        skipped.update(set(part_ids) - claimed_ids)
+        for part_type_id, type_part_ids in parts.items():
+            claimed[part_type_id].extend(part_id for part_id in type_part_ids if part_id in claimed_ids)
+    else:
+        if any(len(claimed[part_type_id]) < quantity * count for part_type_id, quantity in requirements.items()):
+            raise AllocationError("Parts are being allocated by other assemblies, please try again")
+    return claimed
+
+
+def claim_oldest_lots(aircraft_type: AircraftType, requirements: Dict[int, int],
+                      count: int = 1) -> Dict[int, List[Tuple[int, int]]]:
+    """
+    Take the units of lot-tracked part types covering the requirements of count aircraft from the oldest lots.
+
+    Lots changed or held by a concurrent assembly are skipped and the shortfall is
+    selected again, up to CLAIM_ATTEMPTS times, as when claiming serialized parts.
+    Returns (lot id, units taken) grouped by part type id, raises AllocationError
+    when the remaining quantities are short.
+    """
+    claimed = {part_type_id: {} for part_type_id in requirements}
+    skipped = set()
+    for _ in range(CLAIM_ATTEMPTS):
+        shortfall = {
+            part_type_id: quantity * count - sum(claimed[part_type_id].values())
+            for part_type_id, quantity in requirements.items()
+            if sum(claimed[part_type_id].values()) < quantity * count
+        }
+        if not shortfall:
+            break
+        lots = select_oldest_lots(aircraft_type, shortfall, exclude=skipped)
+        selected_units = count_lot_units(lots)
+        found = {
+            part_type_id: sum(claimed[part_type_id].values()) + selected_units.get(part_type_id, 0)
+            for part_type_id in requirements
+        }
+        missing_parts = get_missing_parts(requirements, found, count)
+        if missing_parts:
+            raise AllocationError(f"Not enough parts to assemble {aircraft_type.name}", missing_parts)
+
+        units = {lot_id: quantity for type_lots in lots.values() for lot_id, quantity in type_lots}
+        taken_ids = set(take_lot_units(units, aircraft_type=aircraft_type))
+        skipped.update(set(units) - taken_ids)
+        for part_type_id, type_lots in lots.items():
+            for lot_id, quantity in type_lots:
+                if lot_id in taken_ids:
+                    claimed[part_type_id][lot_id] = claimed[part_type_id].get(lot_id, 0) + quantity
+    else:
+        if any(sum(claimed[part_type_id].values()) < quantity * count for part_type_id, quantity in requirements.items()):
+            raise AllocationError("Parts are being allocated by other assemblies, please try again")
+    return {part_type_id: list(lots.items()) for part_type_id, lots in claimed.items()}
+
+
+def slice_lot_units(lots: List[Tuple[int, int]], start: int, stop: int) -> List[Tuple[int, int]]:
+    """Get the (lot id, units) covering the taken units start to stop, counted across the lots in order."""
+    sliced = []
+    offset = 0
+    for lot_id, quantity in lots:
+        low, high = max(start, offset), min(stop, offset + quantity)
+        if low < high:
+            sliced.append((lot_id, high - low))
+        offset += quantity
+    return sliced
+
+
+def get_part_links(aircraft: Aircraft, part_ids: Iterable[int],
+                   lots: Iterable[Tuple[int, int]] = ()) -> List[AircraftPart]:
+    """Build the links of an aircraft to its serialized parts and to the quantities taken from lots."""
+    return [AircraftPart(aircraft=aircraft, part_id=part_id) for part_id in part_ids] + [
+        AircraftPart(aircraft=aircraft, part_id=lot_id, quantity=quantity) for lot_id, quantity in lots
+    ]
+
+
+@transaction.atomic
+def assemble_aircraft(aircraft_type: AircraftType, owner: TeamMember) -> Aircraft:
+    """
+    Assemble an aircraft from the oldest unused parts of its type.
+
+    Parts are selected, claimed and linked to the new aircraft in one transaction,
+    lot-tracked part types are taken from the oldest lots. Nothing is written when
+    the stock is short.
+    """
+    requirements = get_requirements(aircraft_type)
+    if not requirements:
+        raise AllocationError(f"{aircraft_type.name} has no part requirements")
+
+    release_expired_holds(aircraft_type)
+    serialized, lot_tracked = split_lot_requirements(requirements)
+    claimed = claim_oldest_parts(aircraft_type, serialized)
+    lots = claim_oldest_lots(aircraft_type, lot_tracked)
+    aircraft = Aircraft(aircraft_type=aircraft_type, owner=owner)
+    aircraft.save()
+    AircraftPart.objects.bulk_create(get_part_links(
+        aircraft,
+        [part_id for type_part_ids in claimed.values() for part_id in type_part_ids],
+        [lot for type_lots in lots.values() for lot in type_lots]
+    ))
+    return aircraft
+
+
+@transaction.atomic
+def assemble_reserved(reservation: Reservation, owner: TeamMember) -> Aircraft:
+    """
+    Assemble an aircraft from the parts held by a reservation, which is removed.
+
+    Lots are not held by reservations, lot-tracked part types are taken from the
+    oldest lots now. Nothing is written when the reservation has expired or its
+    parts no longer match the requirements per part type, e.g. after an import
+    changed their type.
+    """
+    if reservation.expires_at <= timezone.now():
+        raise AllocationError("The reservation has expired")
+    serialized, lot_tracked = split_lot_requirements(get_requirements(reservation.aircraft_type))
+    part_ids = claim_parts(
+        list(reservation.parts.values_list('id', flat=True)),
+        aircraft_type=reservation.aircraft_type,
+        reservation=reservation
+    )
+    claimed = dict(Part.objects.filter(id__in=part_ids).values_list('part_type_id').annotate(
+        count=Count('id')
+    ).order_by())
+    mismatched = get_mismatched_parts(serialized, claimed)
+    if mismatched:
+        raise AllocationError("The reservation does not hold all required parts anymore", mismatched)
+    lots = claim_oldest_lots(reservation.aircraft_type, lot_tracked)
+
+    aircraft = Aircraft(aircraft_type=reservation.aircraft_type, owner=owner)
+    aircraft.save()
+    AircraftPart.objects.bulk_create(get_part_links(
+        aircraft, part_ids, [lot for type_lots in lots.values() for lot in type_lots]
+    ))
+    reservation.delete()
+    return aircraft
+
+
+@transaction.atomic
+def assemble_from_parts(aircraft_type: AircraftType, owner: TeamMember, part_ids: List[int],
+                        fill_missing: bool = False) -> Aircraft:
+    """
+    Assemble an aircraft from explicitly selected parts.
+
+    Every part has to be serialized, unused, not reserved, belong to the aircraft
+    type and not be held by a concurrent assembly, and the parts of each type have
+    to match the serialized requirements exactly, otherwise nothing is written.
+    With fill_missing, part types selected short of their requirement are completed
+    with the oldest available parts instead. Lot-tracked part types are taken from
+    the oldest lots.
+    """
+    part_ids = list(dict.fromkeys(part_ids))
+    release_expired_holds(aircraft_type)
+    claimed_ids = set(claim_parts(part_ids, aircraft_type=aircraft_type))
+    unavailable = [part_id for part_id in part_ids if part_id not in claimed_ids]
+    if unavailable:
+        raise AllocationError(
+            f"Parts {', '.join(map(str, unavailable))} are used, reserved, held by another assembly, "
+            f"lots or do not belong to {aircraft_type.name}"
+        )
+    serialized, lot_tracked = split_lot_requirements(get_requirements(aircraft_type))
+    selected = dict(Part.objects.filter(id__in=part_ids).values_list('part_type_id').annotate(
+        count=Count('id')
+    ).order_by())
+    remaining = {}
+    if fill_missing:
+        remaining = {
+            part_type_id: quantity - selected.get(part_type_id, 0)
+            for part_type_id, quantity in serialized.items()
+            if selected.get(part_type_id, 0) < quantity
+        }
+    # Parts over the requirement, or of a type not required, are never filled
+    mismatched = get_mismatched_parts(serialized, {**selected, **{
+        part_type_id: serialized[part_type_id] for part_type_id in remaining
+    }})
+    if mismatched:
+        raise AllocationError(f"The selected parts do not match the requirements of {aircraft_type.name}", mismatched)
+    if remaining:
+        filled = claim_oldest_parts(aircraft_type, remaining)
+        part_ids += [part_id for type_part_ids in filled.values() for part_id in type_part_ids]
+    lots = claim_oldest_lots(aircraft_type, lot_tracked)
+
+    aircraft = Aircraft(aircraft_type=aircraft_type, owner=owner)
+    aircraft.save()
+    AircraftPart.objects.bulk_create(get_part_links(
+        aircraft, part_ids, [lot for type_lots in lots.values() for lot in type_lots]
+    ))
+    return aircraft
+
+
+def create_serials(count: int) -> List[int]:
+    """Generate unused integer aircraft serials, checking collisions with one query per round."""
+    serials = set()
+    while len(serials) < count:
+        candidates = {random_serial() for _ in range(count - len(serials))}
+        candidates -= set(Aircraft.objects.filter(serial__in=candidates).values_list('serial', flat=True))
+        serials |= candidates
+    return list(serials)
+
+
+@transaction.atomic
+def assemble_batch(aircraft_type: AircraftType, owner: TeamMember, count: int) -> Tuple[List[Aircraft], List[dict]]:
+    """
+    Assemble up to count aircraft of a type from the oldest unused parts.
+
+    Parts for all of them are selected in one query and claimed together, as many
+    aircraft as the stock allows are built. Units of lot-tracked part types are
+    taken from the oldest lots for all of them at once. Aircraft and their part links
+    are created with bulk_create in one transaction. Returns the built aircraft and
+    the missing parts of the aircraft which could not be built.
+    """
+    requirements = get_requirements(aircraft_type)
+    if not requirements:
+        raise AllocationError(f"{aircraft_type.name} has no part requirements")
+
+    release_expired_holds(aircraft_type)
+    serialized, lot_tracked = split_lot_requirements(requirements)
+    parts = select_oldest_parts(aircraft_type, serialized, count)
+    available = {part_type_id: len(part_ids) for part_type_id, part_ids in parts.items()}
+    available.update(Part.objects.filter(
+        AVAILABLE_PARTS, aircraft_type=aircraft_type, part_type_id__in=lot_tracked
+    ).values_list('part_type_id').annotate(units=Sum('quantity')).order_by())
+    missing_parts = get_missing_parts(requirements, available, count)
+    buildable = min(min(available.get(part_type_id, 0) // quantity, count) for part_type_id, quantity in requirements.items())
+    if not buildable:
+        raise AllocationError(f"Not enough parts to assemble {aircraft_type.name}", missing_parts)
+
+    claimed = claim_oldest_parts(aircraft_type, serialized, buildable, selected=parts)
+    lots = claim_oldest_lots(aircraft_type, lot_tracked, buildable)
+    Aircraft(aircraft_type=aircraft_type, owner=owner).check_create_perm()
+    aircraft = Aircraft.objects.bulk_create([
+        Aircraft(
+            aircraft_type=aircraft_type,
+            owner=owner,
+            serial=serial,
+            serial_number=format_serial(AIRCRAFT_SERIAL_PREFIX, serial)
+        )
+        for serial in create_serials(buildable)
+    ])
+    # Consecutive slices of each part type's oldest parts and lot units go to each aircraft
+    AircraftPart.objects.bulk_create([
+        link
+        for index, built in enumerate(aircraft)
+        for link in get_part_links(
+            built,
+            [
+                part_id
+                for part_type_id, quantity in serialized.items()
+                for part_id in claimed[part_type_id][index * quantity:(index + 1) * quantity]
+            ],
+            [
+                lot
+                for part_type_id, quantity in lot_tracked.items()
+                for lot in slice_lot_units(lots[part_type_id], index * quantity, (index + 1) * quantity)
+            ]
+        )
+    ])
+
+    # bulk_create skips the signals keeping the daily assembly rollup
+    from analytics.rollups import record_assembly
+    transaction.on_commit(lambda: record_assembly(aircraft[0], delta=len(aircraft)))
+    return aircraft, missing_parts
+
+
+@transaction.atomic
+def disassemble_aircraft(aircraft_ids: List[int]) -> Tuple[int, int]:
+    """
+    Return the parts of the aircraft to stock and delete the aircraft.
+
+    The serialized parts are released with one UPDATE and the quantities taken from
+    lots are added back with another, the part links and the aircraft are then
+    removed with one set-based DELETE each instead of a delete per aircraft. The daily
+    assembly rollup is adjusted per day and aircraft type once the transaction commits.
+    Returns the number of deleted aircraft and released parts and lots.
+    """
+    if not aircraft_ids:
+        return 0, 0
+    from analytics.rollups import get_assembly_days, record_assembly_days
+    days = get_assembly_days(Aircraft.objects.filter(id__in=aircraft_ids))
+
+    links = AircraftPart.objects.filter(aircraft_id__in=aircraft_ids)
+    lot_links = links.filter(quantity__isnull=False)
+    released = Part.objects.filter(id__in=links.filter(quantity__isnull=True).values('part_id')).update(is_used=False)
+    released += Part.objects.filter(id__in=lot_links.values('part_id')).update(
+        quantity=F('quantity') + Subquery(
+            lot_links.filter(part_id=OuterRef('id')).values('part_id').annotate(total=Sum('quantity')).values('total')
+        ),
+        is_used=False
+    )
+    links.delete()
+    with connection.cursor() as cursor:
+        # A queryset delete would load every aircraft to send its delete signals
+        cursor.execute(
+            f"DELETE FROM {connection.ops.quote_name(Aircraft._meta.db_table)} "
+            f"WHERE id IN ({', '.join(['%s'] * len(aircraft_ids))})",
+            list(aircraft_ids)
+        )
+        deleted = cursor.rowcount
+
+    transaction.on_commit(lambda: record_assembly_days(days, sign=-1))
+    return deleted, released
@@ -1,6 +1,6 @@
 """Configuration for assembly app."""
 from django.apps import AppConfig
-from django.db.models.signals import post_migrate
+from django.db.models.signals import post_delete, post_migrate, post_save
 from aircraft_manufacturing.logger import django_logger
 from .constants import DEFAULT_AIRCRAFT_REQUIRED_PARTS
 from django.conf import settings
@@ -49,6 +49,12 @@ class AssemblyConfig(AppConfig):
         Connect signals when the app is ready.
         This method is called once when Django starts.
         """
+        from .bom import invalidate_bom_cache
+
+        # Cached bill of materials explosions depend on these models
+        for sender in ('assembly.AircraftType', 'assembly.AircraftPartRequirement', 'assembly.PartComponent'):
+            post_save.connect(invalidate_bom_cache, sender=sender, dispatch_uid=f'bom_saved_{sender}')
+            post_delete.connect(invalidate_bom_cache, sender=sender, dispatch_uid=f'bom_deleted_{sender}')
 
         if getattr(settings, 'SKIP_INITIAL_DATA', False):
             return
@@ -0,0 +1,157 @@
+"""Explosion of the multi-level bill of materials into leaf part requirements."""
+from collections import defaultdict
+from typing import Dict, Optional
+from django.core.cache import cache
+from django.db import connection
+from .constants import BOM_CACHE_TIMEOUT, MAX_BOM_DEPTH
+from .models import AircraftPartRequirement, PartComponent
+
+BOM_CACHE_VERSION_KEY = 'assembly:bom:version'
+
+
+def get_bom_version() -> str:
+    """
+    Get the version of the bill of materials which cached explosions are keyed on.
+
+    The version is read from the database, the row counts and last updates of the
+    requirements and components, so a change made by any process is seen by all of
+    them even with a per-process cache. Writes through queryset update() do not touch
+    updated_at and are only picked up after invalidate_bom_cache or the timeout.
+    """
+    cache.add(BOM_CACHE_VERSION_KEY, 1, timeout=None)
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(" UNION ALL ".join(
+            f"SELECT COUNT(*), MAX(updated_at) FROM {quote(model._meta.db_table)}"
+            for model in (AircraftPartRequirement, PartComponent)
+        ))
+        state = cursor.fetchall()
+    return ':'.join(str(value) for row in state for value in row) + f":{cache.get(BOM_CACHE_VERSION_KEY, 1)}"
+
+
+def invalidate_bom_cache(**kwargs):
+    """Signal handler dropping every cached explosion of this process when the bill of materials changes."""
+    try:
+        cache.incr(BOM_CACHE_VERSION_KEY)
+    except ValueError:
+        cache.add(BOM_CACHE_VERSION_KEY, 1, timeout=None)
+
+
+def _explode_with_cte(aircraft_type_id: int) -> Dict[int, int]:
+    """Explode the requirements with a single recursive CTE."""
+    quote = connection.ops.quote_name
+    requirements = quote(AircraftPartRequirement._meta.db_table)
+    components = quote(PartComponent._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"WITH RECURSIVE bom (part_type_id, quantity, depth) AS ("
+            f"SELECT part_type_id, quantity, 1 FROM {requirements} WHERE aircraft_type_id = %s AND quantity > 0 "
+            f"UNION ALL "
+            f"SELECT c.component_id, bom.quantity * c.quantity, bom.depth + 1 FROM bom "
+            f"JOIN {components} c ON c.part_type_id = bom.part_type_id WHERE bom.depth < %s"
+            f") SELECT part_type_id, SUM(quantity) FROM bom WHERE NOT EXISTS ("
+            f"SELECT 1 FROM {components} c WHERE c.part_type_id = bom.part_type_id"
+            f") GROUP BY part_type_id",
+            [aircraft_type_id, MAX_BOM_DEPTH]
+        )
+        return {part_type_id: int(quantity) for part_type_id, quantity in cursor.fetchall()}
+
+
+def _explode_iteratively(aircraft_type_id: int) -> Dict[int, int]:
+    """Explode the requirements level by level from the components loaded with one query."""
+    components = defaultdict(list)
+    for part_type_id, component_id, quantity in PartComponent.objects.values_list(
+        'part_type_id', 'component_id', 'quantity'
+    ):
+        components[part_type_id].append((component_id, quantity))
+
+    level = dict(AircraftPartRequirement.objects.filter(
+        aircraft_type_id=aircraft_type_id, quantity__gt=0
+    ).values_list('part_type_id', 'quantity'))
+    leaves = defaultdict(int)
+    for _ in range(MAX_BOM_DEPTH):
+        next_level = defaultdict(int)
+        for part_type_id, quantity in level.items():
+            if part_type_id not in components:
+                leaves[part_type_id] += quantity
+                continue
+            for component_id, component_quantity in components[part_type_id]:
+                next_level[component_id] += quantity * component_quantity
+        if not next_level:
+            break
+        level = next_level
+    return dict(leaves)
+
+
+def explode_requirements(aircraft_type_id: int) -> Dict[int, int]:
+    """Get the leaf part types and quantities needed for one aircraft of the type, uncached."""
+    if connection.vendor == 'postgresql':
+        return _explode_with_cte(aircraft_type_id)
+    return _explode_iteratively(aircraft_type_id)
+
+
+def get_leaf_requirements(aircraft_type_id: int, version: Optional[str] = None) -> Dict[int, int]:
+    """
+    Get the leaf part type id -> quantity requirements of the aircraft type, cached.
+
+    Callers exploding many aircraft types read the version once and pass it on.
+    """
+    key = f"assembly:bom:{version or get_bom_version()}:{aircraft_type_id}"
+    requirements = cache.get(key)
+    if requirements is None:
+        requirements = explode_requirements(aircraft_type_id)
+        cache.set(key, requirements, timeout=BOM_CACHE_TIMEOUT)
+    return requirements
+
+
+def get_required_parts(aircraft_type_id: int) -> Dict[str, int]:
+    """Get the leaf requirements of the aircraft type keyed by part type name."""
+    from inventory.models import PartType
+
+    requirements = get_leaf_requirements(aircraft_type_id)
+    names = dict(PartType.objects.filter(id__in=requirements).values_list('id', 'name'))
+    return {names[part_type_id]: quantity for part_type_id, quantity in sorted(requirements.items())}
+
+
+def get_requirements_summary() -> Dict[str, dict]:
+    """
+    Get whether each aircraft type can be assembled from the available parts, keyed by aircraft type name.
+
+    Leaf requirements come from the cached explosions. The stock of every aircraft type
+    is one query grouped by (aircraft type, part type) ids, and the part type names
+    of all requirements are looked up once, so the query count does not grow with
+    the number of aircraft types.
+    """
+    from django.db.models import Sum
+    from inventory.models import AVAILABLE_PARTS, PART_UNITS, Part, PartType
+    from .models import AircraftType
+
+    aircraft_types = list(AircraftType.objects.values_list('id', 'name').order_by('id'))
+    version = get_bom_version()
+    requirements = {
+        aircraft_type_id: get_leaf_requirements(aircraft_type_id, version) for aircraft_type_id, _ in aircraft_types
+    }
+    stock = defaultdict(dict)
+    for aircraft_type_id, part_type_id, count in Part.objects.filter(AVAILABLE_PARTS).values_list(
+        'aircraft_type_id', 'part_type_id'
+    ).annotate(count=Sum(PART_UNITS)).order_by():
+        stock[aircraft_type_id][part_type_id] = count
+    part_type_ids = {part_type_id for required in requirements.values() for part_type_id in required}
+    names = dict(PartType.objects.filter(id__in=part_type_ids).values_list('id', 'name')) if part_type_ids else {}
+
+    summary = {}
+    for aircraft_type_id, aircraft_type_name in aircraft_types:
+        required = sorted(requirements[aircraft_type_id].items())
+        available = stock[aircraft_type_id]
+        missing_parts = [
+            {'type': names[part_type_id], 'required': quantity, 'available': available.get(part_type_id, 0)}
+            for part_type_id, quantity in required
+            if available.get(part_type_id, 0) < quantity
+        ]
+        summary[aircraft_type_name] = {
+            'id': aircraft_type_id,
+            'can_assemble': not missing_parts,
+            'missing_parts': missing_parts,
+            'required_parts': {names[part_type_id]: quantity for part_type_id, quantity in required},
+        }
+    return summary
@@ -3,6 +3,9 @@ from dataclasses import dataclass
 from typing import List, Tuple, Dict
 from inventory.constants import DefaultPartTypes
 
+# Prefix of the aircraft serial numbers, followed by the base36 digits of the integer serial
+AIRCRAFT_SERIAL_PREFIX = 'A-'
+
 # Aircraft types, not dynamic as expected
 @dataclass(frozen=True)
 class DefaultAircraftTypes:
@@ -37,4 +40,36 @@ DEFAULT_AIRCRAFT_REQUIRED_PARTS: Dict[str, Dict[str, int]] = {
         DefaultPartTypes.TAIL: 1,
         DefaultPartTypes.AVIONICS: 2
     }
-} 
\ No newline at end of file
+} 
+
+# Columns of the aircraft export, one row per used part, as (header, queryset lookup) pairs
+AIRCRAFT_EXPORT_COLUMNS = [
+    ('id', 'id'),
+    ('serial_number', 'serial_number'),
+    ('aircraft_type', 'aircraft_type__name'),
+    ('owner', 'owner__user__username'),
+    ('owner_team', 'owner__team__name'),
+    ('created_at', 'created_at'),
+    ('part_serial_number', 'used_parts__part__serial_number'),
+    ('part_type', 'used_parts__part__part_type__name'),
+    ('part_owner', 'used_parts__part__owner__user__username'),
+]
+
+# Maximum number of aircraft assembled by one batch request
+MAX_BATCH_AIRCRAFT = 100
+
+# Serial numbers traced by one request, looked up in IN queries of TRACE_CHUNK_SIZE
+MAX_TRACE_SERIALS = 5000
+TRACE_CHUNK_SIZE = 500
+
+# Part kit reservations, in minutes
+DEFAULT_RESERVATION_MINUTES = 60
+MAX_RESERVATION_MINUTES = 24 * 60
+# Expired reservations released per transaction by the sweeper
+RESERVATION_SWEEP_BATCH_SIZE = 1000
+
+# Deepest sub-assembly nesting followed when exploding the bill of materials
+MAX_BOM_DEPTH = 10
+# Exploded requirements are cached per aircraft type and bill of materials version,
+# which is read from the database. The timeout frees the entries of old versions
+BOM_CACHE_TIMEOUT = 5 * 60
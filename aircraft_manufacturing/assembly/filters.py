@@ -1,5 +1,7 @@
 from django_filters import rest_framework as django_filters
 from accounts.models import Team
+from aircraft_manufacturing.serials import get_serial_prefix_q
+from .constants import AIRCRAFT_SERIAL_PREFIX
 from .models import Aircraft, AircraftType
 
 
@@ -17,11 +19,18 @@ class AircraftTypeFilter(django_filters.FilterSet):
 class AircraftFilter(django_filters.FilterSet):
     aircraft_type = django_filters.ModelChoiceFilter(queryset=AircraftType.objects.all())
     aircraft_type_name = django_filters.CharFilter(field_name='aircraft_type__name', lookup_expr='icontains')
-    serial_number = django_filters.CharFilter(lookup_expr='icontains')
+    serial_number = django_filters.CharFilter(method='filter_serial_number')
     assembled_after = django_filters.DateTimeFilter(field_name='created_at', lookup_expr='gte')
     assembled_before = django_filters.DateTimeFilter(field_name='created_at', lookup_expr='lte')
 
     class Meta:
         model = Aircraft
         fields = ['aircraft_type', 'aircraft_type_name', 'serial_number', 
-                 'assembled_after', 'assembled_before']
\ No newline at end of file
+                 'assembled_after', 'assembled_before']
+
+    def filter_serial_number(self, queryset, name, value):
+        """Match serials typed from their start on the integer serial index, other text anywhere in the string"""
+        serial_q = get_serial_prefix_q(AIRCRAFT_SERIAL_PREFIX, value)
+        if serial_q is None:
+            return queryset.filter(serial_number__icontains=value)
+        return queryset.filter(serial_q)
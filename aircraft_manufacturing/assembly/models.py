@@ -2,7 +2,8 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 from django.db import models
 from django.db import transaction
-import uuid
+from aircraft_manufacturing.serials import format_serial, parse_serial, random_serial
+from .constants import AIRCRAFT_SERIAL_PREFIX
 if TYPE_CHECKING:
     from accounts.models import TeamMember
 
@@ -27,18 +28,32 @@ class AircraftPart(models.Model):
         related_name='used_parts',
         help_text="Aircraft model"
     )
-    part = models.OneToOneField(
+    part = models.ForeignKey(
         'inventory.Part',
         on_delete=models.PROTECT,
         related_name='used_in',
         help_text="Part of the aircraft"
     )
+    quantity = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Quantity taken from a lot, empty for serialized parts"
+    )
     created_at = models.DateTimeField(auto_now_add=True, help_text="Date and time of creation")
 
     class Meta:
         ordering = ['created_at']
         verbose_name = 'Aircraft Part'
         verbose_name_plural = 'Aircraft Parts'
+        constraints = [
+            # A serialized part is used in one aircraft only, a lot is shared by many
+            models.UniqueConstraint(
+                fields=['part'],
+                condition=models.Q(quantity__isnull=True),
+                name='aircraft_part_serialized_unique'
+            ),
+            models.UniqueConstraint(fields=['aircraft', 'part'], name='aircraft_part_unique'),
+        ]
 
     def __str__(self):
         return f"{self.part.part_type.name} for {self.aircraft.aircraft_type.name} - {self.aircraft.serial_number}"
@@ -47,9 +62,18 @@ class Aircraft(models.Model):
     """Aircraft model representing assembled aircrafts"""
     aircraft_type = models.ForeignKey(AircraftType, on_delete=models.PROTECT, help_text="Type of the aircraft")
     serial_number = models.CharField(max_length=64, unique=True, help_text="Serial number of the aircraft")
+    # Not unique itself: serial_number is the unique key, the import upserts on it and it also
+    # covers serial numbers in other formats. The display form maps to one integer and back.
+    serial = models.BigIntegerField(
+        db_index=True,
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Integer value of the serial number, empty for serial numbers in another format"
+    )
     parts = models.ManyToManyField('inventory.Part', through=AircraftPart, related_name='used_in_aircraft', help_text="Parts used in the aircraft")
     owner = models.ForeignKey('accounts.TeamMember', on_delete=models.PROTECT, help_text="Team member who created the aircraft")
-    created_at = models.DateTimeField(auto_now_add=True, help_text="Date and time of creation")
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True, help_text="Date and time of creation")
     updated_at = models.DateTimeField(auto_now=True, help_text="Date and time of last update")
 
     def __str__(self):
@@ -63,8 +87,9 @@ class Aircraft(models.Model):
             raise PermissionError("Have no permission to assemble aircraft")
 
     def create_serial_number(self) -> str:
-        self.serial_number = f"A-{uuid.uuid4().hex[:8].upper()}"
-        if Aircraft.objects.filter(serial_number=self.serial_number).exists():
+        self.serial = random_serial()
+        self.serial_number = format_serial(AIRCRAFT_SERIAL_PREFIX, self.serial)
+        if Aircraft.objects.filter(serial=self.serial).exists():
             self.create_serial_number()
 
     @transaction.atomic
@@ -72,8 +97,23 @@ class Aircraft(models.Model):
         self.check_create_perm()
         if not self.serial_number:
             self.create_serial_number()
+        elif self.serial is None:
+            self.serial = parse_serial(AIRCRAFT_SERIAL_PREFIX, self.serial_number)
         super().save(*args, **kwargs)
 
+class Reservation(models.Model):
+    """Kit of parts held for an aircraft which will be assembled later"""
+    aircraft_type = models.ForeignKey(AircraftType, on_delete=models.CASCADE, help_text="Type of the aircraft to assemble")
+    owner = models.ForeignKey('accounts.TeamMember', on_delete=models.CASCADE, help_text="Team member who reserved the parts")
+    expires_at = models.DateTimeField(db_index=True, help_text="Date and time the parts are released")
+    created_at = models.DateTimeField(auto_now_add=True, help_text="Date and time of creation")
+
+    class Meta:
+        ordering = ['expires_at']
+
+    def __str__(self):
+        return f"{self.aircraft_type.name} kit until {self.expires_at:%Y-%m-%d %H:%M}"
+
 class AircraftPartRequirement(models.Model):
     """Model to store required parts for each aircraft type"""
     aircraft_type = models.ForeignKey(AircraftType, on_delete=models.CASCADE, help_text="Type of the aircraft")
@@ -88,3 +128,46 @@ class AircraftPartRequirement(models.Model):
 
     def __str__(self):
         return f"{self.aircraft_type.name} - {self.part_type.name} ({self.quantity})"
+
+
+class PartComponent(models.Model):
+    """Model to store the components a sub-assembly part type is built from"""
+    part_type = models.ForeignKey(
+        'inventory.PartType',
+        on_delete=models.CASCADE,
+        related_name='components',
+        help_text="Sub-assembly part type"
+    )
+    component = models.ForeignKey(
+        'inventory.PartType',
+        on_delete=models.PROTECT,
+        related_name='component_of',
+        help_text="Part type the sub-assembly is built from"
+    )
+    quantity = models.PositiveIntegerField(help_text="Number of components required")
+    created_at = models.DateTimeField(auto_now_add=True, help_text="Date and time of creation")
+    updated_at = models.DateTimeField(auto_now=True, help_text="Date and time of last update")
+
+    class Meta:
+        unique_together = ['part_type', 'component']
+        ordering = ['part_type', 'component']
+
+    def __str__(self):
+        return f"{self.part_type.name} - {self.component.name} ({self.quantity})"
+
+    def clean(self):
+        """Validate that the component does not contain the sub-assembly itself"""
+        from django.core.exceptions import ValidationError
+
+        reachable = {self.component_id}
+        while reachable:
+            if self.part_type_id in reachable:
+                raise ValidationError(f"{self.component.name} cannot be a component of {self.part_type.name}, "
+                                      f"it would contain itself")
+            reachable = set(PartComponent.objects.filter(
+                part_type_id__in=reachable
+            ).values_list('component_id', flat=True))
+
+    def save(self, *args, **kwargs):
+        self.clean()
+        super().save(*args, **kwargs)
@@ -0,0 +1,66 @@
+"""Part kit reservations holding parts for a later assembly."""
+from datetime import timedelta
+from typing import Callable, List, Optional
+from django.db import transaction
+from django.utils import timezone
+from accounts.models import TeamMember
+from inventory.models import Part
+from .allocation import (
+    AllocationError, claim_oldest_parts, get_requirements, release_expired_holds, reserve_parts, split_lot_requirements
+)
+from .constants import RESERVATION_SWEEP_BATCH_SIZE
+from .models import AircraftType, Reservation
+
+
+@transaction.atomic
+def reserve_kit(aircraft_type: AircraftType, owner: TeamMember, minutes: int) -> Reservation:
+    """
+    Reserve the oldest available parts covering the requirements of one aircraft.
+
+    The parts are marked with one conditional UPDATE per selection round, as when
+    claiming them for an assembly. Lots are shared by many aircraft and not held,
+    their units are taken on assembly. Nothing is written when the stock is short.
+    """
+    requirements = get_requirements(aircraft_type)
+    if not requirements:
+        raise AllocationError(f"{aircraft_type.name} has no part requirements")
+    serialized, _ = split_lot_requirements(requirements)
+    release_expired_holds(aircraft_type)
+
+    reservation = Reservation.objects.create(
+        aircraft_type=aircraft_type,
+        owner=owner,
+        expires_at=timezone.now() + timedelta(minutes=minutes),
+    )
+    claim_oldest_parts(aircraft_type, serialized, claim=lambda part_ids: reserve_parts(part_ids, reservation))
+    return reservation
+
+
+@transaction.atomic
+def release_reservations(reservation_ids: List[int]) -> int:
+    """Release the parts of the reservations with one UPDATE, remove them and return the released parts."""
+    released = Part.objects.filter(reservation_id__in=reservation_ids).update(reservation=None)
+    Reservation.objects.filter(id__in=reservation_ids).delete()
+    return released
+
+
+def release_expired_reservations(batch_size: int = RESERVATION_SWEEP_BATCH_SIZE,
+                                 progress: Optional[Callable[[int, int], None]] = None) -> int:
+    """
+    Release the reservations which have expired, batch_size of them per transaction.
+
+    Returns the number of released reservations, progress is called with the
+    reservations and parts released by each batch.
+    """
+    now = timezone.now()
+    total = 0
+    while True:
+        reservation_ids = list(
+            Reservation.objects.filter(expires_at__lte=now).order_by('expires_at').values_list('id', flat=True)[:batch_size]
+        )
+        if not reservation_ids:
+            return total
+        released = release_reservations(reservation_ids)
+        total += len(reservation_ids)
+        if progress:
+            progress(len(reservation_ids), released)
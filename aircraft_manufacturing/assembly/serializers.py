@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import Aircraft, AircraftPart, AircraftType
+from .constants import DEFAULT_RESERVATION_MINUTES, MAX_BATCH_AIRCRAFT, MAX_RESERVATION_MINUTES, MAX_TRACE_SERIALS
+from .models import Aircraft, AircraftPart, AircraftType, Reservation
 from accounts.utils import get_user_display_name
 from typing import Optional
 
@@ -32,6 +33,19 @@ class AircraftSerializer(serializers.ModelSerializer):
     used_parts = AircraftPartSerializer(many=True, read_only=True)
     owner_name = serializers.SerializerMethodField()
     owner_team = serializers.CharField(source='owner.team.name', read_only=True)
+    reservation = serializers.IntegerField(
+        write_only=True,
+        required=False,
+        allow_null=True,
+        min_value=1,
+        help_text="ID of an own reservation to assemble the aircraft from"
+    )
+    fill_parts = serializers.BooleanField(
+        write_only=True,
+        required=False,
+        default=False,
+        help_text="Complete the selected parts with the oldest available parts where fewer than required are selected"
+    )
     
     class Meta:
         model = Aircraft
@@ -45,6 +59,8 @@ class AircraftSerializer(serializers.ModelSerializer):
             'owner_name',
             'owner_team',
             'used_parts',
+            'reservation',
+            'fill_parts',
             'created_at', 
             'updated_at'
         ]
@@ -60,4 +76,85 @@ class AircraftSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         team_member = getattr(request.user, 'teammember', None)
         validated_data['owner'] = team_member
-        return super().create(validated_data)
\ No newline at end of file
+        validated_data.pop('reservation', None)
+        validated_data.pop('fill_parts', None)
+        return super().create(validated_data)
+
+
+class BatchAssemblySerializer(serializers.Serializer):
+    """Serializer validating a batch assembly request"""
+    aircraft_type = serializers.PrimaryKeyRelatedField(queryset=AircraftType.objects.all())
+    count = serializers.IntegerField(
+        min_value=1,
+        max_value=MAX_BATCH_AIRCRAFT,
+        help_text="Number of aircraft to assemble"
+    )
+
+
+
+class DisassembleSerializer(serializers.Serializer):
+    """Serializer validating the aircraft to disassemble"""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        min_length=1,
+        max_length=MAX_BATCH_AIRCRAFT,
+        help_text="IDs of the aircraft to disassemble"
+    )
+
+
+class TraceSerializer(serializers.Serializer):
+    """Serializer validating the serial numbers to trace"""
+    parts = serializers.ListField(
+        child=serializers.CharField(max_length=64),
+        max_length=MAX_TRACE_SERIALS,
+        required=False,
+        default=list,
+        help_text="Part serial numbers to map to the aircraft they went into"
+    )
+    aircraft = serializers.ListField(
+        child=serializers.CharField(max_length=64),
+        max_length=MAX_TRACE_SERIALS,
+        required=False,
+        default=list,
+        help_text="Aircraft serial numbers to map to their parts"
+    )
+
+    def validate(self, attrs):
+        if not attrs['parts'] and not attrs['aircraft']:
+            raise serializers.ValidationError("Part or aircraft serial numbers are required")
+        return attrs
+
+
+class ReservationSerializer(serializers.ModelSerializer):
+    """Serializer for Reservation model"""
+    aircraft_type_name = serializers.CharField(source='aircraft_type.name', read_only=True)
+    owner_name = serializers.SerializerMethodField()
+    parts = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+    minutes = serializers.IntegerField(
+        write_only=True,
+        min_value=1,
+        max_value=MAX_RESERVATION_MINUTES,
+        default=DEFAULT_RESERVATION_MINUTES,
+        help_text="Minutes the parts are held for"
+    )
+
+    class Meta:
+        model = Reservation
+        fields = [
+            'id',
+            'aircraft_type',
+            'aircraft_type_name',
+            'owner',
+            'owner_name',
+            'parts',
+            'minutes',
+            'expires_at',
+            'created_at'
+        ]
+        read_only_fields = ['owner', 'expires_at', 'created_at']
+
+    def get_owner_name(self, obj: Reservation) -> Optional[str]:
+        """Get the owner's display name"""
+        if obj.owner and obj.owner.user:
+            return get_user_display_name(obj.owner.user)
+        return None
@@ -0,0 +1,306 @@
+import threading
+from datetime import timedelta
+from unittest import skipUnless
+from django.contrib.auth.models import User
+from django.db import connection, connections
+from django.db.models import Count
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from accounts.constants import TeamTypes
+from accounts.models import Team, TeamMember, TeamType
+from assembly.allocation import (
+    AllocationError, assemble_aircraft, assemble_batch, assemble_from_parts, assemble_reserved, claim_parts,
+    disassemble_aircraft, take_lot_units
+)
+from assembly.models import Aircraft, AircraftPart, AircraftPartRequirement, AircraftType, Reservation
+from assembly.reservations import release_expired_reservations, reserve_kit
+from inventory.models import Part, PartType, TeamPartPermission
+
+
+class AllocationDataMixin:
+    """Teams, an aircraft type requiring two wings and a body, and a helper producing parts"""
+    def create_allocation_data(self):
+        assembly_type = TeamType.objects.create(name=TeamTypes.ASSEMBLY)
+        assembly_team = Team.objects.create(team_type=assembly_type, name="Test Assembly Team")
+        self.assembly_member = TeamMember.objects.create(
+            team=assembly_team, user=User.objects.create_user(username="assembly_user")
+        )
+        producer_type = TeamType.objects.create(name=TeamTypes.WING)
+        producer_team = Team.objects.create(team_type=producer_type, name="Test Producer Team")
+        self.producer_member = TeamMember.objects.create(
+            team=producer_team, user=User.objects.create_user(username="producer_user")
+        )
+
+        self.aircraft_type = AircraftType.objects.create(name="Test Aircraft Type")
+        self.other_aircraft_type = AircraftType.objects.create(name="Other Aircraft Type")
+        self.wing_type = PartType.objects.create(name="WING")
+        self.body_type = PartType.objects.create(name="BODY")
+        for part_type in (self.wing_type, self.body_type):
+            TeamPartPermission.objects.create(team_type=producer_type, part_type=part_type, can_create=True)
+        AircraftPartRequirement.objects.create(aircraft_type=self.aircraft_type, part_type=self.wing_type, quantity=2)
+        AircraftPartRequirement.objects.create(aircraft_type=self.aircraft_type, part_type=self.body_type, quantity=1)
+
+    def create_parts(self, part_type, count, aircraft_type=None):
+        """Create unused parts of the given type owned by the producer"""
+        return [
+            Part.objects.create(
+                part_type=part_type,
+                aircraft_type=aircraft_type or self.aircraft_type,
+                owner=self.producer_member
+            )
+            for _ in range(count)
+        ]
+
+
+class ClaimPartsTests(AllocationDataMixin, TestCase):
+    def setUp(self):
+        self.create_allocation_data()
+
+    def test_claim_skips_used_and_other_type_parts(self):
+        """Test that only unused parts of the aircraft type are claimed"""
+        wings = self.create_parts(self.wing_type, 3)
+        other = self.create_parts(self.wing_type, 1, aircraft_type=self.other_aircraft_type)
+        Part.objects.filter(id=wings[0].id).update(is_used=True)
+
+        claimed = claim_parts([part.id for part in wings + other], aircraft_type=self.aircraft_type)
+        self.assertEqual(sorted(claimed), [wings[1].id, wings[2].id])
+        self.assertEqual(claim_parts([part.id for part in wings]), [])
+        self.assertFalse(Part.objects.get(id=other[0].id).is_used)
+
+    def test_assemble_from_unavailable_parts(self):
+        """Test that selected parts which are used or of another type write nothing"""
+        wings = self.create_parts(self.wing_type, 2)
+        body = self.create_parts(self.body_type, 1, aircraft_type=self.other_aircraft_type)
+
+        with self.assertRaises(AllocationError):
+            assemble_from_parts(self.aircraft_type, self.assembly_member, [part.id for part in wings + body])
+        self.assertFalse(Aircraft.objects.exists())
+        self.assertFalse(Part.objects.filter(is_used=True).exists())
+
+        body = self.create_parts(self.body_type, 1)
+        aircraft = assemble_from_parts(self.aircraft_type, self.assembly_member, [part.id for part in wings + body])
+        self.assertEqual(aircraft.parts.count(), 3)
+        with self.assertRaises(AllocationError):
+            assemble_from_parts(self.aircraft_type, self.assembly_member, [wings[0].id])
+
+
+
+class LotAllocationTests(AllocationDataMixin, TestCase):
+    def setUp(self):
+        self.create_allocation_data()
+        self.rivet_type = PartType.objects.create(name="RIVET", is_lot_tracked=True)
+        TeamPartPermission.objects.create(
+            team_type=self.producer_member.team.team_type, part_type=self.rivet_type, can_create=True
+        )
+        AircraftPartRequirement.objects.create(aircraft_type=self.aircraft_type, part_type=self.rivet_type, quantity=50)
+
+    def create_lots(self, *quantities):
+        """Create lots of rivets, oldest first"""
+        return [
+            Part.objects.create(
+                part_type=self.rivet_type,
+                aircraft_type=self.aircraft_type,
+                owner=self.producer_member,
+                quantity=quantity
+            )
+            for quantity in quantities
+        ]
+
+    def test_assemble_takes_units_from_oldest_lots(self):
+        """Test that lot units are decremented across the oldest lots and linked with their quantities"""
+        self.create_parts(self.wing_type, 2)
+        self.create_parts(self.body_type, 1)
+        first, second, third = self.create_lots(30, 40, 40)
+
+        aircraft = assemble_aircraft(self.aircraft_type, self.assembly_member)
+        self.assertEqual(
+            sorted(aircraft.used_parts.filter(quantity__isnull=False).values_list('part_id', 'quantity')),
+            [(first.id, 30), (second.id, 20)]
+        )
+        self.assertEqual(
+            list(Part.objects.filter(part_type=self.rivet_type).order_by('id').values_list('quantity', 'is_used')),
+            [(0, True), (20, False), (40, False)]
+        )
+        self.assertEqual(Part.objects.filter(is_used=True).count(), 4)
+
+        # A lot never goes below zero
+        self.assertEqual(take_lot_units({third.id: 41}), [])
+        self.assertEqual(Part.objects.get(id=third.id).quantity, 40)
+
+    def test_short_lots_write_nothing(self):
+        """Test that missing lot units are reported and nothing is claimed"""
+        self.create_parts(self.wing_type, 2)
+        self.create_parts(self.body_type, 1)
+        self.create_lots(30)
+
+        with self.assertRaises(AllocationError) as context:
+            assemble_aircraft(self.aircraft_type, self.assembly_member)
+        self.assertEqual(context.exception.missing_parts, [{'type': 'RIVET', 'required': 50, 'available': 30}])
+        self.assertFalse(Part.objects.filter(is_used=True).exists())
+        self.assertEqual(Part.objects.get(part_type=self.rivet_type).quantity, 30)
+
+    def test_batch_and_disassembly(self):
+        """Test that a batch splits the taken units per aircraft and disassembly returns them to the lots"""
+        self.create_parts(self.wing_type, 6)
+        self.create_parts(self.body_type, 3)
+        lots = self.create_lots(60, 60, 10)
+
+        aircraft, missing_parts = assemble_batch(self.aircraft_type, self.assembly_member, 3)
+        self.assertEqual(len(aircraft), 2)
+        self.assertEqual(missing_parts, [{'type': 'RIVET', 'required': 150, 'available': 130}])
+        self.assertEqual(
+            [sorted(built.used_parts.filter(quantity__isnull=False).values_list('part_id', 'quantity'))
+             for built in aircraft],
+            [[(lots[0].id, 50)], [(lots[0].id, 10), (lots[1].id, 40)]]
+        )
+
+        deleted, released = disassemble_aircraft([built.id for built in aircraft])
+        self.assertEqual(deleted, 2)
+        self.assertEqual(released, 6 + 2)
+        self.assertEqual(
+            list(Part.objects.filter(part_type=self.rivet_type).order_by('id').values_list('quantity', 'is_used')),
+            [(60, False), (60, False), (10, False)]
+        )
+
+    def test_lots_cannot_be_selected_or_reserved(self):
+        """Test that lots are not claimed as parts and kits hold serialized parts only"""
+        wings = self.create_parts(self.wing_type, 2)
+        body = self.create_parts(self.body_type, 1)
+        lots = self.create_lots(50)
+
+        with self.assertRaises(AllocationError):
+            assemble_from_parts(self.aircraft_type, self.assembly_member, [part.id for part in wings + body + lots])
+        reservation = reserve_kit(self.aircraft_type, self.assembly_member, minutes=30)
+        self.assertEqual(reservation.parts.count(), 3)
+        self.assertIsNone(Part.objects.get(id=lots[0].id).reservation_id)
+
+        # The lot units are taken when the kit is assembled
+        aircraft = assemble_reserved(reservation, self.assembly_member)
+        self.assertEqual(aircraft.used_parts.get(part_id=lots[0].id).quantity, 50)
+        self.assertTrue(Part.objects.get(id=lots[0].id).is_used)
+
+
+class ReservationSweepTests(AllocationDataMixin, TestCase):
+    def setUp(self):
+        self.create_allocation_data()
+
+    def test_release_expired_reservations(self):
+        """Test that the sweeper releases only expired reservations, in batches"""
+        self.create_parts(self.wing_type, 6)
+        self.create_parts(self.body_type, 3)
+        reservations = [reserve_kit(self.aircraft_type, self.assembly_member, minutes=30) for _ in range(3)]
+        Reservation.objects.filter(id__in=[reservation.id for reservation in reservations[:2]]).update(
+            expires_at=timezone.now() - timedelta(minutes=1)
+        )
+
+        batches = []
+        released = release_expired_reservations(batch_size=1, progress=lambda *batch: batches.append(batch))
+        self.assertEqual(released, 2)
+        self.assertEqual(batches, [(1, 3), (1, 3)])
+        self.assertEqual(list(Reservation.objects.values_list('id', flat=True)), [reservations[2].id])
+        self.assertEqual(Part.objects.filter(reservation__isnull=False).count(), 3)
+
+        # Released parts can be allocated again, the remaining kit is held
+        assemble_aircraft(self.aircraft_type, self.assembly_member)
+        self.assertEqual(Part.objects.filter(reservation__isnull=False, is_used=False).count(), 3)
+
+
+    def test_expired_holds_are_allocated_before_the_sweep(self):
+        """Test that parts of an expired kit are allocated without waiting for the sweeper"""
+        self.create_parts(self.wing_type, 2)
+        self.create_parts(self.body_type, 1)
+        reservation = reserve_kit(self.aircraft_type, self.assembly_member, minutes=30)
+        with self.assertRaises(AllocationError):
+            assemble_aircraft(self.aircraft_type, self.assembly_member)
+
+        Reservation.objects.filter(id=reservation.id).update(expires_at=timezone.now() - timedelta(minutes=1))
+        aircraft = assemble_aircraft(self.aircraft_type, self.assembly_member)
+        self.assertEqual(aircraft.used_parts.count(), 3)
+        self.assertFalse(Part.objects.filter(reservation__isnull=False).exists())
+        # The expired reservation itself is left to the sweeper
+        self.assertEqual(release_expired_reservations(), 1)
+
+
+class ReservedAssemblyTests(AllocationDataMixin, TestCase):
+    def setUp(self):
+        self.create_allocation_data()
+
+    def test_reserved_parts_changed_type(self):
+        """Test that a kit whose parts changed type is rejected per part type and nothing is written"""
+        self.create_parts(self.wing_type, 2)
+        self.create_parts(self.body_type, 1)
+        reservation = reserve_kit(self.aircraft_type, self.assembly_member, minutes=30)
+        wing = reservation.parts.filter(part_type=self.wing_type).first()
+        Part.objects.filter(id=wing.id).update(part_type=self.body_type)
+
+        with self.assertRaises(AllocationError) as context:
+            assemble_reserved(reservation, self.assembly_member)
+        self.assertEqual(context.exception.missing_parts, [
+            {'type': 'WING', 'required': 2, 'available': 1},
+            {'type': 'BODY', 'required': 1, 'available': 2},
+        ])
+        self.assertFalse(Aircraft.objects.exists())
+        self.assertFalse(Part.objects.filter(is_used=True).exists())
+        self.assertEqual(Part.objects.filter(reservation=reservation).count(), 3)
+
+
+@skipUnless(connection.vendor == 'postgresql', "Concurrent claiming needs row level locks")
+class ConcurrentAllocationTests(AllocationDataMixin, TransactionTestCase):
+    """Stress test assembling from a shared stock in parallel threads"""
+    THREADS = 8
+    ATTEMPTS = 6
+    STOCK = 30
+
+    def setUp(self):
+        self.create_allocation_data()
+        self.create_parts(self.wing_type, self.STOCK * 2)
+        self.create_parts(self.body_type, self.STOCK)
+
+    def test_no_double_allocation(self):
+        """Test that parallel assemblies never share a part and never wait on each other's locks"""
+        start = threading.Barrier(self.THREADS)
+        assembled = []
+        errors = []
+
+        def assemble():
+            try:
+                with connection.cursor() as cursor:
+                    # Any wait on a row lock fails fast instead of piling up
+                    cursor.execute("SET lock_timeout = '10ms'")
+                start.wait()
+                for _ in range(self.ATTEMPTS):
+                    try:
+                        assembled.append(assemble_aircraft(self.aircraft_type, self.assembly_member).id)
+                    except AllocationError:
+                        pass
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=assemble) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertGreater(len(assembled), 0)
+        # Assemblies given up under contention leave their parts available
+        while True:
+            try:
+                assembled.append(assemble_aircraft(self.aircraft_type, self.assembly_member).id)
+            except AllocationError:
+                break
+
+        self.assertEqual(len(assembled), self.STOCK)
+        self.assertEqual(AircraftPart.objects.count(), self.STOCK * 3)
+        self.assertEqual(AircraftPart.objects.values('part_id').distinct().count(), self.STOCK * 3)
+        self.assertEqual(Part.objects.filter(is_used=True).count(), self.STOCK * 3)
+        parts_per_aircraft = AircraftPart.objects.values('aircraft_id', 'part__part_type_id').annotate(
+            total=Count('id')
+        ).values_list('part__part_type_id', 'total')
+        self.assertEqual(
+            set(parts_per_aircraft),
+            {(self.wing_type.id, 2), (self.body_type.id, 1)}
+        )
@@ -0,0 +1,67 @@
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import TestCase
+from assembly.bom import (
+    _explode_iteratively, explode_requirements, get_leaf_requirements, get_required_parts, invalidate_bom_cache
+)
+from assembly.models import AircraftPartRequirement, AircraftType, PartComponent
+from inventory.models import PartType
+
+
+class BillOfMaterialsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        """An aircraft made of wings and an avionics bay, whose sensor pack has its own components"""
+        cls.aircraft_type = AircraftType.objects.create(name="Test Aircraft Type")
+        cls.wing, cls.bay, cls.computer, cls.sensors, cls.lens, cls.cable = [
+            PartType.objects.create(name=name) for name in ('WING', 'AVIONICS', 'COMPUTER', 'SENSORS', 'LENS', 'CABLE')
+        ]
+        AircraftPartRequirement.objects.create(aircraft_type=cls.aircraft_type, part_type=cls.wing, quantity=2)
+        AircraftPartRequirement.objects.create(aircraft_type=cls.aircraft_type, part_type=cls.bay, quantity=2)
+        PartComponent.objects.create(part_type=cls.bay, component=cls.computer, quantity=1)
+        PartComponent.objects.create(part_type=cls.bay, component=cls.sensors, quantity=2)
+        PartComponent.objects.create(part_type=cls.bay, component=cls.cable, quantity=1)
+        PartComponent.objects.create(part_type=cls.sensors, component=cls.lens, quantity=3)
+        PartComponent.objects.create(part_type=cls.sensors, component=cls.cable, quantity=2)
+
+    def setUp(self):
+        # Rolled back changes of other tests do not send the invalidating signals
+        invalidate_bom_cache()
+
+    def test_explode_into_leaf_requirements(self):
+        """Test that nested sub-assemblies multiply down to leaf part types on every database"""
+        expected = {self.wing.id: 2, self.computer.id: 2, self.lens.id: 12, self.cable.id: 10}
+        self.assertEqual(explode_requirements(self.aircraft_type.id), expected)
+        self.assertEqual(_explode_iteratively(self.aircraft_type.id), expected)
+        self.assertEqual(
+            get_required_parts(self.aircraft_type.id),
+            {'WING': 2, 'COMPUTER': 2, 'LENS': 12, 'CABLE': 10}
+        )
+
+    def test_cache_invalidated_on_change(self):
+        """Test that the cached explosion is reused and dropped when the bill of materials changes"""
+        self.assertEqual(get_leaf_requirements(self.aircraft_type.id)[self.lens.id], 12)
+        # Only the version is read
+        with self.assertNumQueries(1):
+            get_leaf_requirements(self.aircraft_type.id)
+
+        PartComponent.objects.filter(part_type=self.sensors, component=self.lens).get().delete()
+        self.assertNotIn(self.lens.id, get_leaf_requirements(self.aircraft_type.id))
+        AircraftPartRequirement.objects.filter(part_type=self.wing).update(quantity=4)
+        AircraftPartRequirement.objects.get(part_type=self.wing).save()
+        self.assertEqual(get_leaf_requirements(self.aircraft_type.id)[self.wing.id], 4)
+
+    def test_cache_invalidated_by_other_processes(self):
+        """Test that a change without the invalidating signal, as made by another process, is seen through the version"""
+        self.assertEqual(get_leaf_requirements(self.aircraft_type.id)[self.wing.id], 2)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {PartComponent._meta.db_table} WHERE part_type_id = %s AND component_id = %s",
+                [self.sensors.id, self.lens.id]
+            )
+        self.assertNotIn(self.lens.id, get_leaf_requirements(self.aircraft_type.id))
+
+    def test_cycles_rejected(self):
+        """Test that a sub-assembly cannot contain itself"""
+        with self.assertRaises(ValidationError):
+            PartComponent.objects.create(part_type=self.lens, component=self.bay, quantity=1)
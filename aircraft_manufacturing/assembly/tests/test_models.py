@@ -79,7 +79,7 @@ class AircraftTests(TestCase):
             aircraft_type=self.aircraft_type,
             owner=self.team_member
         )
-        self.assertRegex(aircraft.serial_number, r'^A-[A-F0-9]{8}$')
+        self.assertRegex(aircraft.serial_number, r'^A-[0-9A-Z]{8}$')
 
     def test_aircraft_str(self):
         """Test the string representation of an aircraft"""
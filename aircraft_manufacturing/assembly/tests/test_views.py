@@ -1,12 +1,23 @@
+import csv
+import io
+import json
+from datetime import timedelta
+from django.db import connection
 from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from django.contrib.auth.models import User
 from rest_framework import status
 from rest_framework.test import APITestCase
 from accounts.models import TeamType, Team, TeamMember
 from accounts.constants import TeamTypes
-from assembly.models import Aircraft, AircraftType
-from inventory.models import Part, PartType
+from analytics.models import DailyAssembly
+from assembly.constants import AIRCRAFT_EXPORT_COLUMNS
+from assembly.models import Aircraft, AircraftPartRequirement, AircraftType, Reservation
+from aircraft_manufacturing.multiget import MULTI_GET_MAX_IDS
+from assembly.traceability import trace_parts
+from inventory.models import Part, PartType, TeamPartPermission
 
 class AircraftTypeViewSetTests(APITestCase, TransactionTestCase):
     # No need to test, as this is not public API
@@ -121,4 +132,440 @@ class AircraftViewSetTests(APITestCase, TransactionTestCase):
         url = self.get_api_url('assembly:aircraft-requirements')
         self.client.force_authenticate(user=self.regular_user)
         response = self.client.get(url)
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+class AssemblyAPITestCase(APITestCase):
+    """Base test case with a producer team, an assembly team and an aircraft type with requirements"""
+    @classmethod
+    def setUpTestData(cls):
+        """Set up data for all test methods"""
+        cls.assembly_type = TeamType.objects.create(name=TeamTypes.ASSEMBLY)
+        cls.assembly_team = Team.objects.create(team_type=cls.assembly_type, name="Test Assembly Team")
+        cls.assembly_user = User.objects.create_user(username="assembly_user", password="password")
+        cls.assembly_member = TeamMember.objects.create(team=cls.assembly_team, user=cls.assembly_user)
+
+        cls.producer_type = TeamType.objects.create(name=TeamTypes.WING)
+        cls.producer_team = Team.objects.create(team_type=cls.producer_type, name="Test Producer Team")
+        cls.producer_user = User.objects.create_user(username="producer_user", password="password")
+        cls.producer_member = TeamMember.objects.create(team=cls.producer_team, user=cls.producer_user)
+
+        cls.aircraft_type = AircraftType.objects.create(name="Test Aircraft Type")
+        cls.wing_type = PartType.objects.create(name="WING")
+        cls.body_type = PartType.objects.create(name="BODY")
+        for part_type in (cls.wing_type, cls.body_type):
+            TeamPartPermission.objects.create(team_type=cls.producer_type, part_type=part_type, can_create=True)
+        AircraftPartRequirement.objects.create(aircraft_type=cls.aircraft_type, part_type=cls.wing_type, quantity=2)
+        AircraftPartRequirement.objects.create(aircraft_type=cls.aircraft_type, part_type=cls.body_type, quantity=1)
+
+    def get_api_url(self, viewname, **kwargs):
+        """Helper method to generate versioned API URLs"""
+        kwargs['version'] = 'v1'
+        return reverse(viewname, kwargs=kwargs)
+
+    def read_json(self, response):
+        """Read the body of a streamed JSON response"""
+        self.assertEqual(response['Content-Type'], 'application/json')
+        return json.loads(b''.join(response.streaming_content))
+
+    def create_parts(self, part_type, count, aircraft_type=None):
+        """Create unused parts of the given type owned by the producer"""
+        return [
+            Part.objects.create(
+                part_type=part_type,
+                aircraft_type=aircraft_type or self.aircraft_type,
+                owner=self.producer_member
+            )
+            for _ in range(count)
+        ]
+
+    def create_aircraft(self):
+        """Assemble an aircraft from freshly produced parts"""
+        parts = self.create_parts(self.wing_type, 2) + self.create_parts(self.body_type, 1)
+        aircraft = Aircraft.objects.create(aircraft_type=self.aircraft_type, owner=self.assembly_member)
+        aircraft.parts.set(parts)
+        Part.objects.filter(id__in=[part.id for part in parts]).update(is_used=True)
+        return aircraft
+
+
+class AircraftExportTests(AssemblyAPITestCase):
+    def test_export_aircraft_csv(self):
+        """Test that the aircraft export streams one row per used part"""
+        aircraft = self.create_aircraft()
+        url = self.get_api_url('assembly:aircraft-export')
+
+        self.client.force_authenticate(user=self.assembly_user)
+        response = self.client.get(url, {'serial_number': aircraft.serial_number})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual({row['serial_number'] for row in rows}, {aircraft.serial_number})
+        self.assertEqual(sorted(row['part_type'] for row in rows), ['BODY', 'WING', 'WING'])
+
+        response = self.client.get(url, {'serial_number': 'missing'})
+        self.assertEqual(b''.join(response.streaming_content).decode().strip(), ','.join(
+            header for header, _ in AIRCRAFT_EXPORT_COLUMNS
+        ))
+
+
+class AircraftAutoAllocateTests(AssemblyAPITestCase):
+    def test_auto_allocate_oldest_parts(self):
+        """Test that sending only the aircraft type assembles it from the oldest unused parts"""
+        wings = self.create_parts(self.wing_type, 3)
+        bodies = self.create_parts(self.body_type, 1)
+        for age, part in enumerate(wings):
+            Part.objects.filter(id=part.id).update(created_at=timezone.now() - timedelta(days=age + 1))
+
+        self.client.force_authenticate(user=self.assembly_user)
+        url = self.get_api_url('assembly:aircraft-list')
+        response = self.client.post(url, {'aircraft_type': self.aircraft_type.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        used = {part['part'] for part in response.data['used_parts']}
+        self.assertEqual(used, {wings[1].id, wings[2].id, bodies[0].id})
+        self.assertEqual(Part.objects.filter(is_used=True).count(), 3)
+        self.assertFalse(Part.objects.get(id=wings[0].id).is_used)
+
+    def test_auto_allocate_missing_parts(self):
+        """Test that a short stock returns the missing parts and writes nothing"""
+        self.create_parts(self.wing_type, 1)
+        self.create_parts(self.body_type, 1)
+
+        self.client.force_authenticate(user=self.assembly_user)
+        url = self.get_api_url('assembly:aircraft-list')
+        response = self.client.post(url, {'aircraft_type': self.aircraft_type.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['missing_parts'], [{'type': 'WING', 'required': 2, 'available': 1}])
+        self.assertFalse(Aircraft.objects.exists())
+        self.assertFalse(Part.objects.filter(is_used=True).exists())
+
+    def test_selected_used_parts_rejected(self):
+        """Test that selected parts are only claimed when all of them are still unused"""
+        wings = self.create_parts(self.wing_type, 2)
+        bodies = self.create_parts(self.body_type, 1)
+        Part.objects.filter(id=wings[0].id).update(is_used=True)
+
+        self.client.force_authenticate(user=self.assembly_user)
+        url = self.get_api_url('assembly:aircraft-list')
+        data = {
+            'aircraft_type': self.aircraft_type.id,
+            'parts': {'WING_ids': [part.id for part in wings], 'BODY_ids': [part.id for part in bodies]},
+        }
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Aircraft.objects.exists())
+        self.assertEqual(Part.objects.filter(is_used=True).count(), 1)
+
+
+    def test_selected_parts_must_match_requirements(self):
+        """Test that too few selected parts, or parts of a type not required, write nothing"""
+        wings = self.create_parts(self.wing_type, 2)
+        bodies = self.create_parts(self.body_type, 1)
+        tail_type = PartType.objects.create(name="TAIL")
+        TeamPartPermission.objects.create(team_type=self.producer_type, part_type=tail_type, can_create=True)
+        tails = self.create_parts(tail_type, 1)
+
+        self.client.force_authenticate(user=self.assembly_user)
+        url = self.get_api_url('assembly:aircraft-list')
+        response = self.client.post(url, {
+            'aircraft_type': self.aircraft_type.id, 'parts': {'WING_ids': [wings[0].id]},
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(sorted(response.data['missing_parts'], key=lambda part: part['type']), [
+            {'type': 'BODY', 'required': 1, 'available': 0},
+            {'type': 'WING', 'required': 2, 'available': 1},
+        ])
+
+        response = self.client.post(url, {
+            'aircraft_type': self.aircraft_type.id,
+            'parts': {
+                'WING_ids': [part.id for part in wings],
+                'BODY_ids': [part.id for part in bodies],
+                'TAIL_ids': [part.id for part in tails],
+            },
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['missing_parts'], [{'type': 'TAIL', 'required': 0, 'available': 1}])
+        self.assertFalse(Aircraft.objects.exists())
+        self.assertFalse(Part.objects.filter(is_used=True).exists())
+
+    def test_selected_parts_filled_with_oldest(self):
+        """Test that fill_parts completes a partial selection with the oldest available parts"""
+        wings = self.create_parts(self.wing_type, 3)
+        bodies = self.create_parts(self.body_type, 1)
+
+        self.client.force_authenticate(user=self.assembly_user)
+        url = self.get_api_url('assembly:aircraft-list')
+        response = self.client.post(url, {
+            'aircraft_type': self.aircraft_type.id, 'parts': {'WING_ids': [wings[2].id]}, 'fill_parts': True,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        used = {part['part'] for part in response.data['used_parts']}
+        self.assertEqual(len(used), 3)
+        self.assertIn(wings[2].id, used)
+        self.assertIn(bodies[0].id, used)
+
+        # Parts over the requirement are not trimmed by filling
+        more_wings = self.create_parts(self.wing_type, 3)
+        self.create_parts(self.body_type, 1)
+        response = self.client.post(url, {
+            'aircraft_type': self.aircraft_type.id,
+            'parts': {'WING_ids': [part.id for part in more_wings]},
+            'fill_parts': True,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['missing_parts'], [{'type': 'WING', 'required': 2, 'available': 3}])
+
+class AircraftBatchTests(AssemblyAPITestCase):
+    def test_batch_builds_what_the_stock_allows(self):
+        """Test that a batch builds as many aircraft as possible and reports the shortfall"""
+        wings = self.create_parts(self.wing_type, 5)
+        self.create_parts(self.body_type, 3)
+
+        self.client.force_authenticate(user=self.assembly_user)
+        url = self.get_api_url('assembly:aircraft-batch')
+        response = self.client.post(url, {'aircraft_type': self.aircraft_type.id, 'count': 3}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['requested'], 3)
+        self.assertEqual(response.data['built'], 2)
+        self.assertEqual(response.data['missing_parts'], [{'type': 'WING', 'required': 6, 'available': 5}])
+        self.assertEqual(Aircraft.objects.count(), 2)
+        self.assertEqual(len({aircraft['serial_number'] for aircraft in response.data['aircraft']}), 2)
+        for aircraft in response.data['aircraft']:
+            types = sorted(part['part_details']['part_type_name'] for part in aircraft['used_parts'])
+            self.assertEqual(types, ['BODY', 'WING', 'WING'])
+        self.assertEqual(Part.objects.filter(is_used=True).count(), 6)
+        self.assertFalse(Part.objects.get(id=wings[4].id).is_used)
+
+    def test_batch_without_stock(self):
+        """Test that a batch which cannot build any aircraft writes nothing"""
+        self.create_parts(self.wing_type, 4)
+
+        self.client.force_authenticate(user=self.assembly_user)
+        url = self.get_api_url('assembly:aircraft-batch')
+        response = self.client.post(url, {'aircraft_type': self.aircraft_type.id, 'count': 2}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['missing_parts'], [{'type': 'BODY', 'required': 2, 'available': 0}])
+        self.assertFalse(Aircraft.objects.exists())
+
+        response = self.client.post(url, {'aircraft_type': self.aircraft_type.id, 'count': 0}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ReservationViewSetTests(AssemblyAPITestCase):
+    def reserve(self):
+        """Reserve a kit for the test aircraft type"""
+        url = self.get_api_url('assembly:reservation-list')
+        return self.client.post(url, {'aircraft_type': self.aircraft_type.id, 'minutes': 30}, format='json')
+
+    def test_reserved_parts_are_not_available(self):
+        """Test that reserved parts are held out of allocation and the availability endpoints"""
+        self.create_parts(self.wing_type, 3)
+        self.create_parts(self.body_type, 1)
+
+        self.client.force_authenticate(user=self.assembly_user)
+        response = self.reserve()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['parts']), 3)
+        self.assertEqual(Part.objects.filter(reservation__isnull=False).count(), 3)
+
+        response = self.client.get(self.get_api_url('inventory:parts-available-parts', aircraft_id=self.aircraft_type.id))
+        self.assertFalse(response.data['can_assemble'])
+        response = self.client.get(self.get_api_url('assembly:aircraft-requirements'))
+        self.assertEqual(len(self.read_json(response)[self.aircraft_type.name]['parts']), 1)
+        response = self.client.get(self.get_api_url('inventory:parts-inventory-status'))
+        self.assertEqual(response.data[self.aircraft_type.name]['WING'], {'total': 3, 'available': 1, 'reserved': 2, 'used': 0})
+
+        response = self.client.post(self.get_api_url('assembly:aircraft-list'), {'aircraft_type': self.aircraft_type.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.reserve().status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_assemble_and_release_reservation(self):
+        """Test that a reservation is assembled from its parts, and releasing one frees the parts"""
+        self.create_parts(self.wing_type, 4)
+        self.create_parts(self.body_type, 2)
+
+        self.client.force_authenticate(user=self.assembly_user)
+        first = self.reserve().data
+        second = self.reserve().data
+
+        url = self.get_api_url('assembly:aircraft-list')
+        response = self.client.post(url, {'aircraft_type': self.aircraft_type.id, 'reservation': first['id']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(sorted(part['part'] for part in response.data['used_parts']), sorted(first['parts']))
+        self.assertFalse(Reservation.objects.filter(id=first['id']).exists())
+
+        response = self.client.delete(self.get_api_url('assembly:reservation-detail', pk=second['id']))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Part.objects.filter(reservation__isnull=False).exists())
+        self.assertEqual(Part.objects.filter(is_used=False).count(), 3)
+
+
+    def test_assemble_reservation_validation(self):
+        """Test that a malformed reservation or one of another member is rejected without a server error"""
+        self.create_parts(self.wing_type, 2)
+        self.create_parts(self.body_type, 1)
+        self.client.force_authenticate(user=self.assembly_user)
+        reservation = self.reserve().data
+
+        url = self.get_api_url('assembly:aircraft-list')
+        response = self.client.post(url, {'aircraft_type': self.aircraft_type.id, 'reservation': 'abc'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('reservation', response.data)
+
+        other_user = User.objects.create_user(username="other_assembler", password="password")
+        TeamMember.objects.create(team=self.assembly_team, user=other_user)
+        self.client.force_authenticate(user=other_user)
+        response = self.client.post(url, {'aircraft_type': self.aircraft_type.id, 'reservation': reservation['id']},
+                                    format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(Reservation.objects.filter(id=reservation['id']).exists())
+        self.assertFalse(Aircraft.objects.exists())
+
+    def test_reservation_of_another_member(self):
+        """Test that another assembler can neither see nor release a reservation"""
+        self.create_parts(self.wing_type, 2)
+        self.create_parts(self.body_type, 1)
+        self.client.force_authenticate(user=self.assembly_user)
+        reservation = self.reserve().data
+
+        other_user = User.objects.create_user(username="other_assembler", password="password")
+        TeamMember.objects.create(team=self.assembly_team, user=other_user)
+        self.client.force_authenticate(user=other_user)
+        url = self.get_api_url('assembly:reservation-detail', pk=reservation['id'])
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.delete(url).status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(self.get_api_url('assembly:reservation-list'))
+        self.assertEqual(response.data['recordsTotal'], 0)
+        self.assertEqual(Part.objects.filter(reservation=reservation['id']).count(), 3)
+
+        self.client.force_authenticate(user=self.assembly_user)
+        self.assertEqual(self.client.delete(url).status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Part.objects.filter(reservation__isnull=False).exists())
+
+
+class AircraftDisassembleTests(AssemblyAPITestCase):
+    def test_disassemble_many(self):
+        """Test that disassembling returns every part to stock and adjusts the assembly rollup"""
+        with self.captureOnCommitCallbacks(execute=True):
+            aircraft = [self.create_aircraft() for _ in range(3)]
+        self.assertEqual(DailyAssembly.objects.get().count, 3)
+
+        self.client.force_authenticate(user=self.assembly_user)
+        url = self.get_api_url('assembly:aircraft-disassemble')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, {'ids': [aircraft[0].id, aircraft[1].id, 0, 999999]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, {'ids': [aircraft[0].id, aircraft[1].id, 999999]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'disassembled': 2, 'released_parts': 6, 'not_found': [999999]})
+        self.assertEqual(list(Aircraft.objects.values_list('id', flat=True)), [aircraft[2].id])
+        self.assertEqual(Part.objects.filter(is_used=True).count(), 3)
+        self.assertEqual(DailyAssembly.objects.get().count, 1)
+
+    def test_destroy_releases_parts(self):
+        """Test that deleting an aircraft no longer leaves its parts marked as used"""
+        aircraft = self.create_aircraft()
+
+        self.client.force_authenticate(user=self.assembly_user)
+        response = self.client.delete(self.get_api_url('assembly:aircraft-detail', pk=aircraft.id))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Aircraft.objects.exists())
+        self.assertFalse(Part.objects.filter(is_used=True).exists())
+
+
+class AircraftTraceTests(AssemblyAPITestCase):
+    def test_trace_parts_and_aircraft(self):
+        """Test that serial numbers are traced in both directions in chunked queries, unknown ones map to null"""
+        aircraft = self.create_aircraft()
+        used = list(aircraft.parts.order_by('id'))
+        unused = self.create_parts(self.wing_type, 1)[0]
+        serial_numbers = [part.serial_number for part in used] + [unused.serial_number, 'P-MISSING']
+
+        self.client.force_authenticate(user=self.producer_user)
+        url = self.get_api_url('assembly:aircraft-trace')
+        with self.assertNumQueries(1):
+            response = self.client.post(url, {'parts': serial_numbers}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(response.data['parts']), serial_numbers)
+        self.assertEqual(response.data['parts'][used[0].serial_number]['aircraft'], [{
+            'id': aircraft.id,
+            'serial_number': aircraft.serial_number,
+            'owner': 'assembly_user',
+            'team': 'Test Assembly Team',
+            'quantity': None,
+        }])
+        self.assertEqual(response.data['parts'][unused.serial_number]['aircraft'], [])
+        self.assertIsNone(response.data['parts']['P-MISSING'])
+        self.assertEqual(response.data['aircraft'], {})
+        with self.assertNumQueries(3):
+            self.assertEqual(trace_parts(serial_numbers, chunk_size=2), response.data['parts'])
+
+        response = self.client.post(url, {'aircraft': [aircraft.serial_number, 'A-MISSING']}, format='json')
+        traced = response.data['aircraft'][aircraft.serial_number]
+        self.assertEqual(traced['owner'], 'assembly_user')
+        self.assertEqual([part['serial_number'] for part in traced['parts']], [part.serial_number for part in used])
+        self.assertIsNone(response.data['aircraft']['A-MISSING'])
+
+        response = self.client.post(url, {'parts': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AircraftMultiGetTests(AssemblyAPITestCase):
+    def test_multi_get_in_request_order(self):
+        """Test that aircraft are fetched by id in the requested order with the missing ids marked"""
+        first, second = self.create_aircraft(), self.create_aircraft()
+        url = self.get_api_url('assembly:aircraft-multi')
+
+        self.client.force_authenticate(user=self.producer_user)
+        response = self.client.get(url, {'ids': f"{second.id},999999,{first.id}"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row and row['id'] for row in response.data['results']], [second.id, None, first.id])
+        self.assertEqual(response.data['not_found'], [999999])
+        self.assertEqual(len(response.data['results'][0]['used_parts']), 3)
+
+        response = self.client.post(url, {'ids': [first.id, first.id]}, format='json')
+        self.assertEqual([row['id'] for row in response.data['results']], [first.id, first.id])
+        response = self.client.post(url, {'ids': list(range(1, MULTI_GET_MAX_IDS + 2))}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(url, {'ids': 'a,b'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AircraftRequirementsTests(AssemblyAPITestCase):
+    def get_summary(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.get_api_url('assembly:aircraft-requirements'), {'summary': 'true'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data, len(queries)
+
+    def test_summary_matches_full_requirements(self):
+        """Test that the summary agrees with the full response and its queries do not grow with the aircraft types"""
+        self.create_parts(self.wing_type, 3)
+        self.create_parts(self.body_type, 1)
+        self.client.force_authenticate(user=self.assembly_user)
+
+        full = self.read_json(self.client.get(self.get_api_url('assembly:aircraft-requirements')))
+        summary, queries = self.get_summary()
+        self.assertEqual(summary[self.aircraft_type.name]['id'], self.aircraft_type.id)
+        for key in ('can_assemble', 'missing_parts', 'required_parts'):
+            self.assertEqual(summary[self.aircraft_type.name][key], full[self.aircraft_type.name][key])
+        self.assertNotIn('parts', summary[self.aircraft_type.name])
+
+        for name in ('Second Type', 'Third Type'):
+            aircraft_type = AircraftType.objects.create(name=name)
+            AircraftPartRequirement.objects.create(aircraft_type=aircraft_type, part_type=self.body_type, quantity=2)
+            self.create_parts(self.body_type, 1, aircraft_type=aircraft_type)
+        self.get_summary()
+        summary, more_queries = self.get_summary()
+        self.assertEqual(more_queries, queries)
+        self.assertEqual(summary['Second Type']['missing_parts'], [{'type': 'BODY', 'required': 2, 'available': 1}])
+
+        # Parts of a single type on demand
+        response = self.client.get(self.get_api_url('assembly:aircraft-requirements'),
+                                   {'aircraft_type': self.aircraft_type.id})
+        data = self.read_json(response)
+        self.assertEqual(list(data), [self.aircraft_type.name])
+        self.assertEqual(len(data[self.aircraft_type.name]['parts']), 4)
+        response = self.client.get(self.get_api_url('assembly:aircraft-requirements'), {'aircraft_type': 'x'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
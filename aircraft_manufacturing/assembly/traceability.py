@@ -0,0 +1,81 @@
+"""Batch traceability between part serial numbers and the aircraft they went into."""
+from typing import Dict, Iterator, List, Optional
+from inventory.models import Part
+from .constants import TRACE_CHUNK_SIZE
+from .models import Aircraft
+
+
+def iter_chunks(serial_numbers: List[str], chunk_size: int) -> Iterator[List[str]]:
+    """Split the serial numbers into lists of at most chunk_size."""
+    for start in range(0, len(serial_numbers), chunk_size):
+        yield serial_numbers[start:start + chunk_size]
+
+
+def trace_parts(serial_numbers: List[str], chunk_size: int = TRACE_CHUNK_SIZE) -> Dict[str, Optional[dict]]:
+    """
+    Map part serial numbers to the aircraft they went into, with who assembled them.
+
+    Each chunk is one IN query left joined through the aircraft part links, so unused
+    parts have no aircraft and a lot lists every aircraft it was taken for. Serial
+    numbers of no part map to None, in the order given.
+    """
+    serial_numbers = list(dict.fromkeys(serial_numbers))
+    traced = dict.fromkeys(serial_numbers)
+    for chunk in iter_chunks(serial_numbers, chunk_size):
+        for row in Part.objects.filter(serial_number__in=chunk).values(
+            'id', 'serial_number', 'part_type__name', 'aircraft_type__name', 'is_used',
+            'used_in__quantity', 'used_in__aircraft_id', 'used_in__aircraft__serial_number',
+            'used_in__aircraft__owner__user__username', 'used_in__aircraft__owner__team__name',
+        ).order_by('id', 'used_in__id'):
+            part = traced[row['serial_number']]
+            if part is None:
+                part = traced[row['serial_number']] = {
+                    'id': row['id'],
+                    'part_type': row['part_type__name'],
+                    'aircraft_type': row['aircraft_type__name'],
+                    'is_used': row['is_used'],
+                    'aircraft': [],
+                }
+            if row['used_in__aircraft_id'] is not None:
+                part['aircraft'].append({
+                    'id': row['used_in__aircraft_id'],
+                    'serial_number': row['used_in__aircraft__serial_number'],
+                    'owner': row['used_in__aircraft__owner__user__username'],
+                    'team': row['used_in__aircraft__owner__team__name'],
+                    'quantity': row['used_in__quantity'],
+                })
+    return traced
+
+
+def trace_aircraft(serial_numbers: List[str], chunk_size: int = TRACE_CHUNK_SIZE) -> Dict[str, Optional[dict]]:
+    """
+    Map aircraft serial numbers to all of their parts, with who assembled them.
+
+    Each chunk is one IN query left joined through the aircraft part links. Serial
+    numbers of no aircraft map to None, in the order given.
+    """
+    serial_numbers = list(dict.fromkeys(serial_numbers))
+    traced = dict.fromkeys(serial_numbers)
+    for chunk in iter_chunks(serial_numbers, chunk_size):
+        for row in Aircraft.objects.filter(serial_number__in=chunk).values(
+            'id', 'serial_number', 'aircraft_type__name', 'owner__user__username', 'owner__team__name',
+            'used_parts__quantity', 'used_parts__part_id', 'used_parts__part__serial_number',
+            'used_parts__part__part_type__name',
+        ).order_by('id', 'used_parts__part_id'):
+            aircraft = traced[row['serial_number']]
+            if aircraft is None:
+                aircraft = traced[row['serial_number']] = {
+                    'id': row['id'],
+                    'aircraft_type': row['aircraft_type__name'],
+                    'owner': row['owner__user__username'],
+                    'team': row['owner__team__name'],
+                    'parts': [],
+                }
+            if row['used_parts__part_id'] is not None:
+                aircraft['parts'].append({
+                    'id': row['used_parts__part_id'],
+                    'serial_number': row['used_parts__part__serial_number'],
+                    'part_type': row['used_parts__part__part_type__name'],
+                    'quantity': row['used_parts__quantity'],
+                })
+    return traced
@@ -4,6 +4,7 @@ from . import views
 app_name = 'assembly'
 router = DefaultRouter()
 router.register('aircraft', views.AircraftViewSet, basename='aircraft')
+router.register('reservations', views.ReservationViewSet, basename='reservation')
 # router.register('aircraft-types', views.AircraftTypeViewSet, basename='aircraft-type')
 
 urlpatterns = router.urls
\ No newline at end of file
@@ -2,17 +2,30 @@ from rest_framework import viewsets, permissions, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters import rest_framework as django_filters
-from django.db.models import Prefetch, Count
+from django.db.models import Prefetch, Sum
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from accounts.permissions import IsMemberOfAssemblyTeam, IsSuperUserOrReadOnly
 from aircraft_manufacturing.responses import GeneralFailedResponseSerializer
-from .models import Aircraft, AircraftType, AircraftPart, AircraftPartRequirement
-from .serializers import AircraftSerializer, AircraftTypeSerializer
+from .models import Aircraft, AircraftType, AircraftPart, Reservation
+from .allocation import (
+    AllocationError, assemble_aircraft, assemble_batch, assemble_from_parts, assemble_reserved, disassemble_aircraft
+)
+from .bom import get_required_parts, get_requirements_summary
+from .reservations import release_reservations, reserve_kit
+from .traceability import trace_aircraft, trace_parts
+from .serializers import (
+    AircraftSerializer, AircraftTypeSerializer, BatchAssemblySerializer, DisassembleSerializer, ReservationSerializer,
+    TraceSerializer
+)
 from inventory.serializers import PartSerializer
-from inventory.models import Part
+from inventory.models import AVAILABLE_PARTS, PART_UNITS, Part
 from aircraft_manufacturing.pagination import DataTablePagination
+from aircraft_manufacturing.multiget import MultiGetMixin
 from .filters import AircraftFilter, AircraftTypeFilter
+from .constants import AIRCRAFT_EXPORT_COLUMNS
+from aircraft_manufacturing.exports import EXPORT_PARAMETERS, streaming_export_response
+from aircraft_manufacturing.streaming import JSONObjectStream, iter_serialized, streaming_json_response
 from django.db import transaction
 from rest_framework.exceptions import MethodNotAllowed
 
@@ -88,7 +101,7 @@ class AircraftTypeViewSet(viewsets.ModelViewSet):
         return super().destroy(request, *args, **kwargs)
 
 
-class AircraftViewSet(viewsets.ModelViewSet):
+class AircraftViewSet(MultiGetMixin, viewsets.ModelViewSet):
     """Manage aircraft assembly operations."""
     serializer_class = AircraftSerializer
     permission_classes = [permissions.IsAuthenticated, IsMemberOfAssemblyTeam]
@@ -101,6 +114,8 @@ class AircraftViewSet(viewsets.ModelViewSet):
     ordering_fields = ['created_at']
     ordering = ['-created_at']
     http_method_names = ['head', 'get', 'post', 'delete']
+    # Lookups taking their input in a POST body, checked as reads by the permissions
+    read_only_actions = MultiGetMixin.read_only_actions + ('trace',)
 
     def get_queryset(self):
         if getattr(self, 'swagger_fake_view', False):
@@ -161,7 +176,10 @@ class AircraftViewSet(viewsets.ModelViewSet):
 
     @swagger_auto_schema(
         operation_summary="Create aircraft",
-        operation_description="Create a new aircraft",
+        operation_description="Create a new aircraft. When only the aircraft type is sent, the oldest "
+                              "available parts are allocated automatically, selected parts have to be unused, "
+                              "belong to the aircraft type and match its requirements, unless fill_parts completes "
+                              "them with the oldest parts. An own reservation assembles the aircraft from its parts.",
         request_body=AircraftSerializer,
         responses={
             status.HTTP_201_CREATED: AircraftSerializer,
@@ -181,34 +199,48 @@ class AircraftViewSet(viewsets.ModelViewSet):
         # Create aircraft
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        
-        # Save aircraft with assembly team
-        aircraft = serializer.save()
-                
-        # Collect all part IDs
-        part_ids = []
-        aircraft_parts = []
-        parts_data = request.data.get('parts', {})
-        
-        for part_type, type_part_ids in parts_data.items():
-            if not type_part_ids:
-                continue
-            # Remove _ids suffix to get part type name
-            part_type = part_type.replace('_ids', '')  
-            for part_id in type_part_ids:
-                part_ids.append(part_id)
-                aircraft_parts.append(
-                    AircraftPart(
-                        aircraft=aircraft,
-                        part_id=part_id
-                    )
+
+        # Collect the selected part IDs, without any the server allocates them
+        try:
+            part_ids = [
+                int(part_id)
+                for type_part_ids in (request.data.get('parts') or {}).values()
+                for part_id in (type_part_ids or [])
+            ]
+        except (AttributeError, TypeError, ValueError):
+            return Response(
+                {"detail": "parts must map part types to lists of part IDs"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        aircraft_type = serializer.validated_data['aircraft_type']
+        reservation = None
+        reservation_id = serializer.validated_data.get('reservation')
+        if reservation_id:
+            # Reservations are held for the member who made them
+            reservation = Reservation.objects.filter(
+                pk=reservation_id, aircraft_type=aircraft_type, owner=team_member
+            ).select_related('aircraft_type').first()
+            if not reservation:
+                return Response(
+                    {"detail": f"Invalid reservation for {aircraft_type.name}: {reservation_id}"},
+                    status=status.HTTP_400_BAD_REQUEST
                 )
-        
-        if part_ids:
-            AircraftPart.objects.bulk_create(aircraft_parts)
-            Part.objects.filter(id__in=part_ids).update(is_used=True)
+        try:
+            if reservation:
+                aircraft = assemble_reserved(reservation, team_member)
+            elif part_ids:
+                aircraft = assemble_from_parts(
+                    aircraft_type, team_member, part_ids, fill_missing=serializer.validated_data['fill_parts']
+                )
+            else:
+                aircraft = assemble_aircraft(aircraft_type, team_member)
+        except AllocationError as e:
+            return Response(
+                {"detail": str(e), "missing_parts": e.missing_parts},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        serializer = self.get_serializer(aircraft)
+        serializer = self.get_serializer(self.get_queryset().get(pk=aircraft.pk))
         headers = self.get_success_headers(serializer.data)
         return Response(
             serializer.data,
@@ -257,19 +289,220 @@ class AircraftViewSet(viewsets.ModelViewSet):
 
     @swagger_auto_schema(
         operation_summary="Delete aircraft",
-        operation_description="Delete a specific aircraft",
+        operation_description="Delete a specific aircraft, its parts are returned to stock",
         responses={
             status.HTTP_204_NO_CONTENT: openapi.Response(description='No content'),
             status.HTTP_404_NOT_FOUND: GeneralFailedResponseSerializer,
         }
     )
     def destroy(self, request, *args, **kwargs):
-        return super().destroy(request, *args, **kwargs)    
+        aircraft = self.get_object()
+        disassemble_aircraft([aircraft.pk])
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @swagger_auto_schema(
+        method='post',
+        operation_summary="Disassemble aircraft",
+        operation_description="Delete the given aircraft and return all of their parts to stock in one transaction",
+        request_body=DisassembleSerializer,
+        responses={
+            status.HTTP_200_OK: openapi.Response(
+                description="Disassembled aircraft and released parts",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        "disassembled": openapi.Schema(type=openapi.TYPE_INTEGER),
+                        "released_parts": openapi.Schema(type=openapi.TYPE_INTEGER),
+                        "not_found": openapi.Schema(
+                            type=openapi.TYPE_ARRAY,
+                            items=openapi.Schema(type=openapi.TYPE_INTEGER)
+                        ),
+                    },
+                ),
+            ),
+            status.HTTP_400_BAD_REQUEST: GeneralFailedResponseSerializer,
+        }
+    )
+    @action(detail=False, methods=['post'], url_path='disassemble', pagination_class=None, filterset_class=None)
+    def disassemble(self, request, *args, **kwargs):
+        """Disassemble one or many aircraft."""
+        serializer = DisassembleSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = list(dict.fromkeys(serializer.validated_data['ids']))
+        found = set(Aircraft.objects.filter(id__in=ids).values_list('id', flat=True))
+
+        disassembled, released = disassemble_aircraft([pk for pk in ids if pk in found])
+        return Response({
+            "disassembled": disassembled,
+            "released_parts": released,
+            "not_found": [pk for pk in ids if pk not in found],
+        })
+
+    @swagger_auto_schema(
+        method='post',
+        operation_summary="Assemble a batch of aircraft",
+        operation_description="Assemble up to count aircraft of a type from the oldest available parts in one "
+                              "transaction. As many aircraft as the stock allows are built, the parts missing "
+                              "for the rest are returned.",
+        request_body=BatchAssemblySerializer,
+        responses={
+            status.HTTP_201_CREATED: openapi.Response(
+                description="Built aircraft and the missing parts",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        "requested": openapi.Schema(type=openapi.TYPE_INTEGER),
+                        "built": openapi.Schema(type=openapi.TYPE_INTEGER),
+                        "aircraft": openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT)),
+                        "missing_parts": openapi.Schema(
+                            type=openapi.TYPE_ARRAY,
+                            items=openapi.Schema(
+                                type=openapi.TYPE_OBJECT,
+                                properties={
+                                    "type": openapi.Schema(type=openapi.TYPE_STRING),
+                                    "required": openapi.Schema(type=openapi.TYPE_INTEGER),
+                                    "available": openapi.Schema(type=openapi.TYPE_INTEGER),
+                                },
+                            ),
+                        ),
+                    },
+                ),
+            ),
+            status.HTTP_400_BAD_REQUEST: GeneralFailedResponseSerializer,
+        }
+    )
+    @action(detail=False, methods=['post'], url_path='batch', pagination_class=None, filterset_class=None)
+    def batch(self, request, *args, **kwargs):
+        """Assemble several aircraft of the same type at once."""
+        team_member = getattr(request.user, 'teammember', None)
+        if not team_member:
+            return Response(
+                {"detail": "You are not a member of any team"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = BatchAssemblySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        count = serializer.validated_data['count']
+        try:
+            aircraft, missing_parts = assemble_batch(serializer.validated_data['aircraft_type'], team_member, count)
+        except AllocationError as e:
+            return Response(
+                {"detail": str(e), "missing_parts": e.missing_parts},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = self.get_queryset().filter(pk__in=[built.pk for built in aircraft]).order_by('id')
+        return Response(
+            {
+                "requested": count,
+                "built": len(aircraft),
+                "aircraft": self.get_serializer(queryset, many=True).data,
+                "missing_parts": missing_parts,
+            },
+            status=status.HTTP_201_CREATED
+        )
+
+    @swagger_auto_schema(
+        method='post',
+        operation_summary="Trace parts and aircraft",
+        operation_description="Map part serial numbers to the aircraft they went into with who assembled them, "
+                              "and aircraft serial numbers to all of their parts. Unknown serial numbers map to null",
+        request_body=TraceSerializer,
+        responses={
+            status.HTTP_200_OK: openapi.Response(
+                description="Traced serial numbers",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        "parts": openapi.Schema(
+                            type=openapi.TYPE_OBJECT,
+                            additionalProperties=openapi.Schema(
+                                type=openapi.TYPE_OBJECT,
+                                x_nullable=True,
+                                properties={
+                                    "id": openapi.Schema(type=openapi.TYPE_INTEGER),
+                                    "part_type": openapi.Schema(type=openapi.TYPE_STRING),
+                                    "aircraft_type": openapi.Schema(type=openapi.TYPE_STRING),
+                                    "is_used": openapi.Schema(type=openapi.TYPE_BOOLEAN),
+                                    "aircraft": openapi.Schema(
+                                        type=openapi.TYPE_ARRAY,
+                                        items=openapi.Schema(type=openapi.TYPE_OBJECT)
+                                    ),
+                                },
+                            ),
+                        ),
+                        "aircraft": openapi.Schema(
+                            type=openapi.TYPE_OBJECT,
+                            additionalProperties=openapi.Schema(
+                                type=openapi.TYPE_OBJECT,
+                                x_nullable=True,
+                                properties={
+                                    "id": openapi.Schema(type=openapi.TYPE_INTEGER),
+                                    "aircraft_type": openapi.Schema(type=openapi.TYPE_STRING),
+                                    "owner": openapi.Schema(type=openapi.TYPE_STRING),
+                                    "team": openapi.Schema(type=openapi.TYPE_STRING),
+                                    "parts": openapi.Schema(
+                                        type=openapi.TYPE_ARRAY,
+                                        items=openapi.Schema(type=openapi.TYPE_OBJECT)
+                                    ),
+                                },
+                            ),
+                        ),
+                    },
+                ),
+            ),
+            status.HTTP_400_BAD_REQUEST: GeneralFailedResponseSerializer,
+        }
+    )
+    @action(detail=False, methods=['post'], url_path='trace', pagination_class=None, filterset_class=None)
+    def trace(self, request, *args, **kwargs):
+        """Trace part and aircraft serial numbers in both directions."""
+        serializer = TraceSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({
+            "parts": trace_parts(serializer.validated_data['parts']),
+            "aircraft": trace_aircraft(serializer.validated_data['aircraft']),
+        })
+
+    @swagger_auto_schema(
+        method='get',
+        operation_summary="Export aircraft",
+        operation_description="Stream all aircraft matching the list filters as CSV or NDJSON, one row per used part",
+        manual_parameters=EXPORT_PARAMETERS,
+        responses={
+            status.HTTP_200_OK: openapi.Response(description="CSV or NDJSON file, optionally gzip compressed"),
+            status.HTTP_400_BAD_REQUEST: GeneralFailedResponseSerializer,
+        }
+    )
+    @action(detail=False, methods=['get'], url_path='export', pagination_class=None)
+    def export(self, request, *args, **kwargs):
+        """Stream filtered aircraft with their parts without pagination."""
+        queryset = self.filter_queryset(self.get_queryset())
+        return streaming_export_response(request, queryset, AIRCRAFT_EXPORT_COLUMNS, filename='aircraft')
 
     @swagger_auto_schema(
         method='get',
         operation_summary="Get part requirements",
-        operation_description="Get the required parts for each aircraft type",
+        operation_description="Get the required parts for each aircraft type. With summary=true only whether "
+                              "each type can be assembled is returned, its parts are fetched on demand from "
+                              "/inventory/parts/available/<aircraft_type>/.",
+        manual_parameters=[
+            openapi.Parameter(
+                'summary',
+                openapi.IN_QUERY,
+                description="Return can_assemble, missing_parts and required_parts of each type without the parts",
+                type=openapi.TYPE_BOOLEAN,
+                required=False
+            ),
+            openapi.Parameter(
+                'aircraft_type',
+                openapi.IN_QUERY,
+                description="Aircraft type ID to return the requirements of, all types by default",
+                type=openapi.TYPE_INTEGER,
+                required=False
+            ),
+        ],
         responses={
             status.HTTP_200_OK: openapi.Response(
                 description="Success",
@@ -303,24 +536,25 @@ class AircraftViewSet(viewsets.ModelViewSet):
                     ),
                 ),
             ),
+            status.HTTP_400_BAD_REQUEST: GeneralFailedResponseSerializer,
         }
     )
     @action(detail=False, methods=['get'], url_path='requirements', pagination_class=None, filterset_class=None)
-    def requirements(self, *args, **kwargs):
+    def requirements(self, request, *args, **kwargs):
         """Get the required parts for each aircraft type."""
-        def get_required_parts(aircraft_type):
+        if request.query_params.get('summary', 'false').lower() == 'true':
+            return Response(data=get_requirements_summary())
+
+        def get_type_requirements(aircraft_type):
             """Get required parts for aircraft type"""        
-            # Get required parts from database
-            required_parts = {
-                req.part_type.name: req.quantity
-                for req in AircraftPartRequirement.objects.filter(aircraft_type=aircraft_type)
-            }
+            # Get required leaf parts, sub-assemblies are exploded into their components
+            required_parts = get_required_parts(aircraft_type.pk)
             
-            # Get available parts
+            # Get available parts, reserved ones are held for other assemblies
             available_parts = Part.objects.filter(
-                aircraft_type=aircraft_type,
-                is_used=False
-            ).select_related('part_type').values('part_type__name').annotate(count=Count('id'))
+                AVAILABLE_PARTS,
+                aircraft_type=aircraft_type
+            ).select_related('part_type').values('part_type__name').annotate(count=Sum(PART_UNITS))
             
             available_parts_dict = {
                 part['part_type__name']: part['count']
@@ -336,18 +570,119 @@ class AircraftViewSet(viewsets.ModelViewSet):
             
             # Get all available parts for this aircraft type
             parts = Part.objects.filter(
-                aircraft_type=aircraft_type,
-                is_used=False
+                AVAILABLE_PARTS,
+                aircraft_type=aircraft_type
             ).select_related('part_type').order_by('part_type__name', 'created_at')
             
             return {
                 'can_assemble': len(missing_parts) == 0,
                 'missing_parts': missing_parts,
                 'required_parts': required_parts,
-                'parts': PartSerializer(parts, many=True).data,
+                'parts': iter_serialized(parts, PartSerializer),
                 'detail': None
             }
-        requirements = {}
-        for aircraft_type in AircraftType.objects.all():
-            requirements[aircraft_type.name] = get_required_parts(aircraft_type=aircraft_type)
-        return Response(data=requirements)
\ No newline at end of file
+        aircraft_types = AircraftType.objects.all()
+        aircraft_type_id = request.query_params.get('aircraft_type')
+        if aircraft_type_id is not None:
+            try:
+                aircraft_types = [aircraft_types.get(id=aircraft_type_id)]
+            except (ValueError, AircraftType.DoesNotExist):
+                return Response(
+                    {"detail": f"Invalid aircraft type: {aircraft_type_id}"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        # Types are checked and their parts serialized while the response is sent
+        return streaming_json_response(JSONObjectStream(
+            (aircraft_type.name, get_type_requirements(aircraft_type=aircraft_type))
+            for aircraft_type in aircraft_types
+        ))
+
+class ReservationViewSet(viewsets.ModelViewSet):
+    """Reserve kits of parts for aircraft assembled later."""
+    serializer_class = ReservationSerializer
+    permission_classes = [permissions.IsAuthenticated, IsMemberOfAssemblyTeam]
+    pagination_class = DataTablePagination
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = ['expires_at', 'created_at']
+    ordering = ['expires_at']
+    http_method_names = ['head', 'get', 'post', 'delete']
+
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return Reservation.objects.none()
+
+        # Reservations are held for the member who made them, like in the assembly
+        return Reservation.objects.filter(owner__user=self.request.user).select_related(
+            'aircraft_type',
+            'owner__user',
+        ).prefetch_related('parts')
+
+    @swagger_auto_schema(
+        operation_summary="List reservations",
+        operation_description="Get a paginated list of the own part kit reservations",
+        responses={
+            status.HTTP_200_OK: ReservationSerializer,
+            status.HTTP_400_BAD_REQUEST: GeneralFailedResponseSerializer,
+        }
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @swagger_auto_schema(
+        operation_summary="Reserve a kit of parts",
+        operation_description="Hold the oldest available parts for one aircraft of the type for the given minutes",
+        request_body=ReservationSerializer,
+        responses={
+            status.HTTP_201_CREATED: ReservationSerializer,
+            status.HTTP_400_BAD_REQUEST: GeneralFailedResponseSerializer,
+        }
+    )
+    def create(self, request, *args, **kwargs):
+        team_member = getattr(request.user, 'teammember', None)
+        if not team_member:
+            return Response(
+                {"detail": "You are not a member of any team"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            reservation = reserve_kit(
+                serializer.validated_data['aircraft_type'],
+                team_member,
+                serializer.validated_data['minutes']
+            )
+        except AllocationError as e:
+            return Response(
+                {"detail": str(e), "missing_parts": e.missing_parts},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = self.get_serializer(self.get_queryset().get(pk=reservation.pk))
+        headers = self.get_success_headers(serializer.data)
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+
+    @swagger_auto_schema(
+        operation_summary="Get reservation details",
+        operation_description="Get a reservation with its parts",
+        responses={
+            status.HTTP_200_OK: ReservationSerializer,
+            status.HTTP_404_NOT_FOUND: GeneralFailedResponseSerializer,
+        }
+    )
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @swagger_auto_schema(
+        operation_summary="Release reservation",
+        operation_description="Release the parts of a reservation",
+        responses={
+            status.HTTP_204_NO_CONTENT: openapi.Response(description='No content'),
+            status.HTTP_404_NOT_FOUND: GeneralFailedResponseSerializer,
+        }
+    )
+    def destroy(self, request, *args, **kwargs):
+        reservation = self.get_object()
+        release_reservations([reservation.pk])
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -138,142 +138,100 @@ function viewAircraft(id) {
     });
 }
 
-function loadAvailableParts(aircraftType) {
-    // Clear and hide previous state
-    $(".part-select").empty().prop("disabled", true);
-    $("#availablePartsSection").hide();
-    $("#assemblyStatus").removeClass("alert-danger alert-success").hide();
-    $("#assembleButton").prop("disabled", true);
-
-    $.get(`/api/v1/inventory/parts/available/${aircraftType}/`, function (data) {
-        if (!data.can_assemble) {
-            // Show error message with missing parts details
-            let message = "<strong>Cannot assemble aircraft:</strong><br>";
-            message += "<ul class='mb-0'>";
-            data.missing_parts.forEach((part) => {
-                message += `<li>${part.type}: Have ${part.available} of ${part.required} required</li>`;
-            });
-            message += "</ul>";
-
-            $("#assemblyStatus").addClass("alert-danger").html(message).show();
-            return;
-        }
-
-        // Show success message
-        $("#assemblyStatus")
-            .addClass("alert-success")
-            .html(`<strong>Ready to assemble:</strong> All required parts are available.`)
-            .show();
-
-        const partsByType = {};
-        data.parts.forEach((part) => {
-            if (!partsByType[part.type]) {
-                partsByType[part.type] = [];
-            }
-            partsByType[part.type].push(part);
-        });
-
-        // Main area to show available parts
-        const availablePartsSection = $("#availablePartsSection");
-        availablePartsSection.empty().show();
-
-        // Add required parts to the form
+function prepareAssembly(aircraftType) {
+    // Parts are allocated by the server unless specific ones are picked
+    $("#assemblyStatus")
+        .removeClass("alert-danger alert-success")
+        .addClass("alert-info")
+        .html("The oldest available parts will be allocated automatically, or pick specific parts below. Slots left empty get the oldest available parts.")
+        .show();
+    $("#assembleButton").prop("disabled", !aircraftType);
+
+    const picker = $("#partPicker").empty();
+    $.get(`/api/v1/inventory/parts/available/${aircraftType}/`, { include_parts: false }, function (data) {
         Object.entries(data.required_parts).forEach(([type, requiredCount]) => {
-            const typeLower = type.toLowerCase();
-
-            // Add a container for each part type
-            const container = $(`
-        <div class="mb-3">
-            <label class="form-label">${type}</label>
-            <div id="${typeLower}PartsContainer"></div>
-        </div>
-    `);
-
-            availablePartsSection.append(container);
-
-            const containerDiv = container.find(`#${typeLower}PartsContainer`);
-
-            // Add select elements for each required part
+            const container = $(`<div class="mb-3"><label class="form-label">${type}</label></div>`);
             for (let i = 0; i < requiredCount; i++) {
-                const select = $("<select>")
-                    .addClass("form-select part-select mb-2")
-                    .attr("id", `${typeLower}Part${i + 1}`)
-                    .attr("data-type", typeLower);
-
-                select.append('<option value="">Select Part</option>');
-
-                // Add available parts as options
-                const availableParts = partsByType[type] || [];
-                availableParts.forEach((part) => {
-                    select.append(
-                        `<option value="${part.id}">${part.type} (${new Date(
-                            part.created_at,
-                        ).toLocaleString()})</option>`,
-                    );
-                });
-
-                // Update available parts when a part is selected
-                select.on("change", function () {
-                    updateAvailableParts(type, availableParts);
-                });
-
-                containerDiv.append(select);
+                container.append(createPartTypeahead(aircraftType, type, `${type.toLowerCase()}Part${i + 1}`));
             }
+            picker.append(container);
         });
-
-        // Show available parts section
-        $("#availablePartsSection").show();
-
-        // Check if all parts are selected
-        checkAssembleButton();
-    }).fail(function (xhr) {
-        $("#assemblyStatus")
-            .addClass("alert-danger")
-            .html("<strong>Error:</strong> Failed to load available parts.")
-            .show();
     });
 }
 
-function updateAvailableParts(type, allParts) {
-    // Get all select elements for this part type
-    const selects = $(`[data-type="${type.toLowerCase()}"]`);
+function createPartTypeahead(aircraftType, type, id) {
+    // Suggestions are fetched as the serial number is typed, a bounded list per request
+    const input = $("<input>")
+        .addClass("form-control part-typeahead mb-2")
+        .attr({ id: id, list: `${id}Options`, placeholder: "Serial number (oldest part if empty)", autocomplete: "off" })
+        .attr("data-type", type);
+    const options = $("<datalist>").attr("id", `${id}Options`);
+    const feedback = $("<div>").addClass("invalid-feedback mb-2").text("Pick a suggested part or clear the field");
+    const partIds = {};
+    let timer;
+
+    function resolve() {
+        // Typed text only counts once it matches a suggested part, otherwise the slot blocks assembly
+        const value = input.val().trim().toUpperCase();
+        input.removeAttr("data-part-id");
+        if (partIds[value]) {
+            input.attr("data-part-id", partIds[value]);
+        }
+        input.toggleClass("is-invalid", value !== "" && !partIds[value]);
+        updateAssembleButton();
+        return value;
+    }
 
-    // Get all selected values
-    const selectedValues = new Set();
-    selects.each(function () {
-        const value = $(this).val();
-        if (value) selectedValues.add(value);
+    input.on("input", function () {
+        const value = resolve();
+        clearTimeout(timer);
+        if (!value || partIds[value]) {
+            return;
+        }
+        timer = setTimeout(function () {
+            $.get("/api/v1/inventory/parts/typeahead/", { aircraft_type: aircraftType, part_type: type, q: value }, function (data) {
+                options.empty();
+                data.results.forEach((part) => {
+                    partIds[part.serial_number] = part.id;
+                    options.append(new Option(new Date(part.created_at).toLocaleString(), part.serial_number));
+                });
+                resolve();
+            });
+        }, 250);
     });
+    return $("<div>").append(input, feedback, options);
+}
 
-    // Update each select
-    selects.each(function () {
-        const currentSelect = $(this);
-        const currentValue = currentSelect.val();
-
-        // Store current selection
-        currentSelect.empty().append('<option value="">Select Part</option>');
+function updateAssembleButton() {
+    // Unresolved serial numbers would silently fall back to the oldest parts, so they block assembly
+    const invalid = $(".part-typeahead.is-invalid").length > 0;
+    $("#assembleButton").prop("disabled", !$("#aircraftType").val() || invalid);
+}
 
-        // Rebuild options
-        allParts.forEach((part) => {
-            const isSelected = selectedValues.has(part.id.toString());
-            if (!isSelected || currentValue === part.id.toString()) {
-                const option = `<option value="${part.id}" ${currentValue === part.id.toString() ? "selected" : ""}>
-          ${part.type} - Created: ${new Date(part.created_at).toLocaleString()}
-        </option>`;
-                currentSelect.append(option);
-            }
-        });
+function getPickedParts() {
+    // The same part typed into two slots is sent once, the server fills the other slot
+    const parts = {};
+    $(".part-typeahead[data-part-id]").each(function () {
+        const type = $(this).attr("data-type");
+        const partId = parseInt($(this).attr("data-part-id"), 10);
+        parts[type] = parts[type] || [];
+        if (!parts[type].includes(partId)) {
+            parts[type].push(partId);
+        }
     });
-
-    checkAssembleButton();
+    return parts;
 }
 
-function checkAssembleButton() {
-    // Check if all required parts are selected
-    const allSelected = $(".part-select")
-        .toArray()
-        .every((select) => $(select).val());
-    $("#assembleButton").prop("disabled", !allSelected);
+function showMissingParts(response) {
+    let message = `<strong>Cannot assemble aircraft:</strong> ${response.detail}`;
+    if (response.missing_parts && response.missing_parts.length) {
+        message += "<ul class='mb-0'>";
+        response.missing_parts.forEach((part) => {
+            message += `<li>${part.type}: Have ${part.available} of ${part.required} required</li>`;
+        });
+        message += "</ul>";
+    }
+    $("#assemblyStatus").removeClass("alert-info alert-success").addClass("alert-danger").html(message).show();
 }
 
 function assembleAircraft() {
@@ -282,37 +240,10 @@ function assembleAircraft() {
         alert("Please select an aircraft type");
         return;
     }
-
-    // Collect selected parts by type
-    const parts = {};
-    const selectedParts = new Set();
-    let hasError = false;
-
-    $(".part-select").each(function () {
-        const type = $(this).data("type");
-        const value = $(this).val();
-
-        if (!value) {
-            alert("Please select all required parts");
-            hasError = true;
-            return false;
-        }
-
-        if (selectedParts.has(value)) {
-            alert("Each part can only be used once");
-            hasError = true;
-            return false;
-        }
-
-        selectedParts.add(value);
-        // wing_ids, body_ids etc.
-        if (!parts[`${type.toLowerCase()}_ids`]) {
-            parts[`${type.toLowerCase()}_ids`] = [];
-        }
-        parts[`${type.toLowerCase()}_ids`].push(value);
-    });
-
-    if (hasError) return;
+    if ($(".part-typeahead.is-invalid").length) {
+        $(".part-typeahead.is-invalid").first().focus();
+        return;
+    }
 
     // Show loading state
     $("#assembleButton")
@@ -325,7 +256,9 @@ function assembleAircraft() {
         contentType: "application/json",
         data: JSON.stringify({
             aircraft_type: aircraftType,
-            parts: parts,
+            parts: getPickedParts(),
+            // Slots left empty are filled by the server, picked parts must still match the requirements
+            fill_parts: true,
         }),
         success: function () {
             $("#assembleAircraftModal").modal("hide");
@@ -333,7 +266,8 @@ function assembleAircraft() {
             refreshAllComponents("parts");
             // Reset form
             $("#assembleAircraftForm")[0].reset();
-            $("#availablePartsSection").hide();
+            $("#assemblyStatus").hide();
+            $("#partPicker").empty();
             $("#assembleButton").prop("disabled", true).html("Assemble");
         },
         error: function (xhr) {
@@ -342,8 +276,12 @@ function assembleAircraft() {
 
             // Show error message
             const response = xhr.responseJSON || {};
-            let errorMessage = "Error assembling aircraft";
+            if (response.missing_parts) {
+                showMissingParts(response);
+                return;
+            }
 
+            let errorMessage = "Error assembling aircraft";
             if (response.detail) {
                 errorMessage = response.detail;
             } else if (typeof response === "object") {
@@ -26,18 +26,14 @@ function initializeComponents() {
     $("#aircraftType").on("change", function () {
         const aircraftType = $(this).val();
         if (aircraftType) {
-            loadAvailableParts(aircraftType);
+            prepareAssembly(aircraftType);
         } else {
-            $("#availablePartsSection").hide();
+            $("#assemblyStatus").hide();
+            $("#partPicker").empty();
             $("#assembleButton").prop("disabled", true);
         }
     });
 
-    // Event handler for part selection
-    $(".part-select").on("change", function () {
-        checkAssembleButton();
-    });
-
     // Initial load of inventory status
     loadInventoryStatus();
 }
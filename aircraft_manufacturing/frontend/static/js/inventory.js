@@ -25,6 +25,7 @@ function loadInventoryStatus() {
                     <th>Part Type</th>
                     <th class="text-center">Total</th>
                     <th class="text-center">Available</th>
+                    <th class="text-center">Reserved</th>
                     <th class="text-center">Used</th>
                   </tr>
                 </thead>
@@ -39,6 +40,9 @@ function loadInventoryStatus() {
             <td class="text-center">
               <span class="badge bg-success">${status.available}</span>
             </td>
+            <td class="text-center">
+              <span class="badge bg-warning">${status.reserved}</span>
+            </td>
             <td class="text-center">
               <span class="badge bg-secondary">${status.used}</span>
             </td>
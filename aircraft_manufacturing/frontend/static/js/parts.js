@@ -51,9 +51,13 @@ function initPartsTable() {
                 name: "is_used",
                 orderable: false,
                 responsivePriority: 1,
-                render: function (data) {
-                    return data
-                        ? '<span class="badge bg-secondary">Used</span>'
+                render: function (data, type, row) {
+                    if (data) {
+                        return '<span class="badge bg-secondary">Used</span>';
+                    }
+                    // Lots show their remaining quantity
+                    return row.quantity !== null
+                        ? `<span class="badge bg-success">Available (${row.quantity} left)</span>`
                         : '<span class="badge bg-success">Available</span>';
                 },
             },
@@ -4,8 +4,8 @@ from .models import Part, PartType, TeamPartPermission
 
 @admin.register(PartType)
 class PartTypeAdmin(admin.ModelAdmin):
-    list_display = ['name', 'description', 'created_at', 'updated_at']
-    list_filter = ['created_at']
+    list_display = ['name', 'description', 'is_lot_tracked', 'created_at', 'updated_at']
+    list_filter = ['is_lot_tracked', 'created_at']
     search_fields = ['name', 'description']
     date_hierarchy = 'created_at'
 
@@ -20,7 +20,7 @@ class TeamPartPermissionAdmin(admin.ModelAdmin):
 
 @admin.register(Part)
 class PartAdmin(admin.ModelAdmin):
-    list_display = ['part_type', 'aircraft_type', 'owner', 'is_used', 'created_at']
+    list_display = ['part_type', 'aircraft_type', 'owner', 'is_used', 'quantity', 'created_at']
     list_filter = ['part_type', 'aircraft_type', 'owner__team', 'is_used', 'created_at']
     search_fields = ['part_type__name', 'aircraft_type__name', 'owner__user__username']
     date_hierarchy = 'created_at'
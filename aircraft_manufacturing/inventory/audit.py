@@ -0,0 +1,164 @@
+"""Online consistency audit of part usage flags against aircraft part links."""
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Q, QuerySet, Sum
+from django.db.models.functions import Coalesce
+from assembly.bom import get_bom_version, get_leaf_requirements
+from assembly.models import Aircraft, AircraftPart, AircraftType
+from .models import Part
+
+AUDIT_CHUNK_SIZE = 10000
+# Only the first offending ids are kept for the report, the counters cover everything
+AUDIT_MAX_SAMPLES = 20
+
+# Part checks as (name, description, predicate, fix) where fix is the update applied by --fix
+PART_CHECKS = [
+    (
+        'used_without_aircraft',
+        "Parts marked as used without an aircraft",
+        # The usage of lots follows their remaining quantity, checked below
+        Q(is_used=True, quantity__isnull=True) & ~Exists(AircraftPart.objects.filter(part_id=OuterRef('id'))),
+        {'is_used': False},
+    ),
+    (
+        'unused_in_aircraft',
+        "Parts used in an aircraft but not marked as used",
+        Q(is_used=False, quantity__isnull=True) & Exists(AircraftPart.objects.filter(part_id=OuterRef('id'))),
+        {'is_used': True, 'reservation': None},
+    ),
+    (
+        'used_lot_not_empty',
+        "Lots marked as used with a remaining quantity",
+        Q(is_used=True, quantity__gt=0),
+        {'is_used': False},
+    ),
+    (
+        'empty_lot_unused',
+        "Empty lots not marked as used",
+        Q(is_used=False, quantity=0),
+        {'is_used': True},
+    ),
+    (
+        'used_and_reserved',
+        "Used parts still held by a reservation",
+        Q(is_used=True, reservation__isnull=False),
+        {'reservation': None},
+    ),
+]
+
+
+@dataclass
+class AuditCheck:
+    """Mismatches found (and fixed) by one check."""
+    description: str
+    found: int = 0
+    fixed: int = 0
+    samples: List[int] = field(default_factory=list)
+
+    def add(self, ids: List[int]):
+        self.found += len(ids)
+        self.samples.extend(ids[:AUDIT_MAX_SAMPLES - len(self.samples)])
+
+
+@dataclass
+class AuditResult:
+    """Counters of an audit run."""
+    parts: int = 0
+    aircraft: int = 0
+    checks: Dict[str, AuditCheck] = field(default_factory=dict)
+
+    def check(self, name: str, description: str) -> AuditCheck:
+        return self.checks.setdefault(name, AuditCheck(description))
+
+    @property
+    def mismatches(self) -> int:
+        return sum(check.found for check in self.checks.values())
+
+
+def iter_id_ranges(queryset: QuerySet, chunk_size: int) -> Iterator[Tuple[int, int, int]]:
+    """
+    Yield (first id, last id, rows) ranges covering the queryset in id order.
+
+    Each range is found with an index-only keyset query, so no scan grows with the
+    table size and no lock is held between chunks.
+    """
+    last_id = 0
+    while True:
+        ids = list(queryset.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            return
+        yield ids[0], ids[-1], len(ids)
+        last_id = ids[-1]
+
+
+def audit_parts(result: AuditResult, first_id: int, last_id: int, fix: bool):
+    """Run the part checks on a range of parts with one anti-join query each."""
+    parts = Part.objects.filter(id__gte=first_id, id__lte=last_id)
+    for name, description, predicate, update in PART_CHECKS:
+        check = result.check(name, description)
+        ids = list(parts.filter(predicate).values_list('id', flat=True))
+        check.add(ids)
+        if fix and ids:
+            # The predicate is applied again so rows changed since the read are left alone
+            with transaction.atomic():
+                check.fixed += Part.objects.filter(predicate, id__in=ids).update(**update)
+
+
+def audit_aircraft(result: AuditResult, first_id: int, last_id: int, requirements: Dict[int, Dict[int, int]]):
+    """Check a range of aircraft against their part requirements with one grouped query."""
+    aircraft = dict(Aircraft.objects.filter(id__gte=first_id, id__lte=last_id).values_list('id', 'aircraft_type_id'))
+    counts = defaultdict(dict)
+    wrong_type = set()
+    for aircraft_id, part_type_id, total, foreign in AircraftPart.objects.filter(
+        aircraft_id__gte=first_id, aircraft_id__lte=last_id
+    ).values('aircraft_id', 'part__part_type_id').annotate(
+        # Links to lots carry the quantity taken, links to serialized parts one part each
+        total=Sum(Coalesce('quantity', 1)),
+        foreign=Count('id', filter=~Q(part__aircraft_type_id=F('aircraft__aircraft_type_id'))),
+    ).values_list('aircraft_id', 'part__part_type_id', 'total', 'foreign').order_by():
+        counts[aircraft_id][part_type_id] = total
+        if foreign:
+            wrong_type.add(aircraft_id)
+
+    result.check('aircraft_part_quantities', "Aircraft whose parts do not match the requirements").add([
+        aircraft_id for aircraft_id, aircraft_type_id in aircraft.items()
+        if counts.get(aircraft_id, {}) != requirements.get(aircraft_type_id, {})
+    ])
+    result.check('aircraft_part_types', "Aircraft with parts of another aircraft type").add(sorted(wrong_type))
+
+
+def audit_inventory(fix: bool = False, chunk_size: int = AUDIT_CHUNK_SIZE, pause: float = 0,
+                    progress: Optional[Callable[[str, AuditResult], None]] = None) -> AuditResult:
+    """
+    Compare part usage flags with the aircraft part links and aircraft with their leaf requirements.
+
+    Parts and aircraft are scanned in keyset ordered id ranges, each checked with
+    set-based (anti-)joins. Fixes are conditional updates in one short transaction per
+    chunk, so the audit can run against a live database. Aircraft mismatches are
+    only reported. pause seconds are slept between chunks to limit the load.
+    """
+    result = AuditResult()
+    for first_id, last_id, rows in iter_id_ranges(Part.objects.all(), chunk_size):
+        audit_parts(result, first_id, last_id, fix)
+        result.parts += rows
+        if progress:
+            progress('parts', result)
+        if pause:
+            time.sleep(pause)
+
+    version = get_bom_version()
+    requirements = {
+        aircraft_type_id: get_leaf_requirements(aircraft_type_id, version)
+        for aircraft_type_id in AircraftType.objects.values_list('id', flat=True)
+    }
+    for first_id, last_id, rows in iter_id_ranges(Aircraft.objects.all(), chunk_size):
+        audit_aircraft(result, first_id, last_id, requirements)
+        result.aircraft += rows
+        if progress:
+            progress('aircraft', result)
+        if pause:
+            time.sleep(pause)
+    return result
@@ -1,8 +1,29 @@
 from dataclasses import dataclass
 
+# Prefix of the part serial numbers, followed by the base36 digits of the integer serial
+PART_SERIAL_PREFIX = 'P-'
+# Parts returned by the serial number typeahead of the part picker, by default and at most
+TYPEAHEAD_LIMIT = 10
+TYPEAHEAD_MAX_LIMIT = 50
+# Available parts listed per part type by one page of the assembly check, at most
+AVAILABLE_PARTS_MAX_PER_TYPE = 500
+
 @dataclass(frozen=True)
 class DefaultPartTypes:
     WING: str = 'WING'
     BODY: str = 'BODY'
     TAIL: str = 'TAIL'
-    AVIONICS: str = 'AVIONICS'
\ No newline at end of file
+    AVIONICS: str = 'AVIONICS'
+
+# Columns of the parts export, as (header, queryset lookup) pairs
+PART_EXPORT_COLUMNS = [
+    ('id', 'id'),
+    ('serial_number', 'serial_number'),
+    ('part_type', 'part_type__name'),
+    ('aircraft_type', 'aircraft_type__name'),
+    ('quantity', 'quantity'),
+    ('owner', 'owner__user__username'),
+    ('owner_team', 'owner__team__name'),
+    ('is_used', 'is_used'),
+    ('created_at', 'created_at'),
+]
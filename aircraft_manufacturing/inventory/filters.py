@@ -28,6 +28,7 @@ class TeamPartPermissionFilter(django_filters.FilterSet):
 
 
 class PartFilter(django_filters.FilterSet):
+    serial_number = django_filters.CharFilter(lookup_expr='icontains')
     part_type = django_filters.CharFilter(field_name='part_type__name')
     part_type_name = django_filters.CharFilter(field_name='part_type__name', lookup_expr='icontains')
     aircraft_type = django_filters.ModelChoiceFilter(queryset=AircraftType.objects.all())
@@ -40,6 +41,6 @@ class PartFilter(django_filters.FilterSet):
 
     class Meta:
         model = Part
-        fields = ['part_type', 'part_type_name', 'aircraft_type', 'aircraft_type_name',
+        fields = ['serial_number', 'part_type', 'part_type_name', 'aircraft_type', 'aircraft_type_name',
                  'owner_team_type_name', 'owner_team_name',
                  'is_used', 'created_at_after', 'created_at_before']
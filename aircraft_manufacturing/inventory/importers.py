@@ -0,0 +1,302 @@
+"""Bulk import of already serialised parts from legacy station systems."""
+import csv
+import io
+import json
+from datetime import date, datetime, timezone as datetime_timezone
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from accounts.models import TeamMember
+from assembly.models import AircraftPart, AircraftType
+from aircraft_manufacturing.serials import parse_serial
+from .constants import PART_SERIAL_PREFIX
+from .models import Part, PartType, TeamPartPermission
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+IMPORT_CONFLICT_ACTIONS = ('skip', 'update')
+IMPORT_CHUNK_SIZE = 5000
+# Only the first errors are reported back, the counters still cover every row
+IMPORT_MAX_ERRORS = 100
+
+STAGING_TABLE = 'inventory_part_import'
+STAGING_COLUMNS = ('serial_number', 'serial', 'part_type_id', 'aircraft_type_id', 'owner_id', 'created_at')
+
+# (serial_number, serial, part_type_id, aircraft_type_id, owner_id, created_at)
+ImportRow = Tuple[str, Optional[int], int, int, int, datetime]
+
+
+class PartImportError(ValueError):
+    """Raised when the import file itself cannot be read."""
+
+
+@dataclass
+class ImportResult:
+    """Counters and the first validation errors of an import run."""
+    rows: int = 0
+    invalid: int = 0
+    imported: int = 0
+    skipped: int = 0
+    errors: List[dict] = field(default_factory=list)
+    # Range of production days touched by the import
+    first_day: Optional[date] = None
+    last_day: Optional[date] = None
+
+    def add_error(self, line: int, message: str):
+        self.invalid += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append({'line': line, 'detail': message})
+
+    def add_days(self, rows: List[ImportRow]):
+        self.add_dates([row[-1] for row in rows])
+
+    def add_dates(self, values: List[datetime]):
+        days = [timezone.localdate(value) for value in values]
+        if not days:
+            return
+        self.first_day = min(days + ([self.first_day] if self.first_day else []))
+        self.last_day = max(days + ([self.last_day] if self.last_day else []))
+
+    def as_dict(self) -> dict:
+        return {
+            'rows': self.rows,
+            'invalid': self.invalid,
+            'imported': self.imported,
+            'skipped': self.skipped,
+            'errors': self.errors,
+        }
+
+
+class ImportLookups:
+    """Reference data loaded once per import so rows are validated without queries."""
+
+    def __init__(self):
+        self.part_types: Dict[str, int] = dict(PartType.objects.values_list('name', 'id'))
+        # Lots need a quantity, the import only carries serialized parts
+        self.lot_tracked: Set[int] = set(PartType.objects.filter(is_lot_tracked=True).values_list('id', flat=True))
+        self.aircraft_types: Dict[str, int] = dict(AircraftType.objects.values_list('name', 'id'))
+        self.owners: Dict[str, Tuple[int, int]] = {
+            username: (member_id, team_type_id)
+            for member_id, username, team_type_id in TeamMember.objects.values_list(
+                'id', 'user__username', 'team__team_type_id'
+            )
+        }
+        self.permissions: Set[Tuple[int, int]] = set(
+            TeamPartPermission.objects.filter(can_create=True).values_list('team_type_id', 'part_type_id')
+        )
+
+    def validate(self, record: dict) -> ImportRow:
+        """Validate a single record and return it as a staging row."""
+        serial_number = str(record.get('serial_number') or '').strip()
+        if not serial_number:
+            raise ValueError("serial_number is required")
+        if len(serial_number) > Part._meta.get_field('serial_number').max_length:
+            raise ValueError(f"serial_number is too long: {serial_number}")
+
+        part_type_id = self.part_types.get(record.get('part_type'))
+        if part_type_id is None:
+            raise ValueError(f"Unknown part type: {record.get('part_type')}")
+        if part_type_id in self.lot_tracked:
+            raise ValueError(f"{record.get('part_type')} parts are produced in lots and cannot be imported")
+        aircraft_type_id = self.aircraft_types.get(record.get('aircraft_type'))
+        if aircraft_type_id is None:
+            raise ValueError(f"Unknown aircraft type: {record.get('aircraft_type')}")
+
+        owner = self.owners.get(record.get('owner'))
+        if owner is None:
+            raise ValueError(f"Unknown owner: {record.get('owner')}")
+        owner_id, team_type_id = owner
+        if (team_type_id, part_type_id) not in self.permissions:
+            raise ValueError(f"Owner {record.get('owner')} cannot create {record.get('part_type')} parts")
+
+        created_at = timezone.now()
+        if record.get('created_at'):
+            created_at = parse_datetime(str(record['created_at']))
+            if created_at is None:
+                raise ValueError(f"Invalid created_at: {record['created_at']}")
+            if timezone.is_naive(created_at):
+                created_at = timezone.make_aware(created_at)
+        serial = parse_serial(PART_SERIAL_PREFIX, serial_number)
+        return serial_number, serial, part_type_id, aircraft_type_id, owner_id, created_at
+
+
+def iter_records(stream: Iterable[str], file_format: str) -> Iterator[Tuple[int, dict]]:
+    """Yield (line number, record) pairs from a CSV or NDJSON text stream."""
+    if file_format == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+        return
+
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield line_number, None
+            continue
+        yield line_number, record if isinstance(record, dict) else None
+
+
+def get_import_format(filename: str, file_format: Optional[str] = None) -> str:
+    """Resolve the import format from an explicit value or the file extension."""
+    file_format = (file_format or filename.rsplit('.', 1)[-1]).lower()
+    if file_format == 'jsonl':
+        file_format = 'ndjson'
+    if file_format not in IMPORT_FORMATS:
+        raise PartImportError(f"Unsupported import format: {file_format}")
+    return file_format
+
+
+def _load_staging(cursor, rows: List[ImportRow]):
+    """Fill the staging table, through COPY FROM on PostgreSQL."""
+    table = connection.ops.quote_name(STAGING_TABLE)
+    columns = ', '.join(STAGING_COLUMNS)
+    adapt_datetime = connection.ops.adapt_datetimefield_value
+    rows = [row[:-1] + (adapt_datetime(row[-1]),) for row in rows]
+    if connection.vendor == 'postgresql':
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE {table} (serial_number varchar(64) NOT NULL, serial bigint NULL, "
+            f"part_type_id bigint NOT NULL, aircraft_type_id bigint NOT NULL, owner_id bigint NOT NULL, "
+            f"created_at timestamptz NOT NULL) ON COMMIT DROP"
+        )
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        cursor.cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN WITH CSV", buffer)
+        return
+
+    cursor.execute(f"DROP TABLE IF EXISTS temp.{table}")
+    cursor.execute(
+        f"CREATE TEMPORARY TABLE {table} (serial_number varchar(64) NOT NULL, serial bigint NULL, "
+        f"part_type_id bigint NOT NULL, aircraft_type_id bigint NOT NULL, owner_id bigint NOT NULL, "
+        f"created_at datetime NOT NULL)"
+    )
+    cursor.executemany(f"INSERT INTO {table} ({columns}) VALUES (%s, %s, %s, %s, %s, %s)", rows)
+
+
+def _updatable_condition() -> str:
+    """SQL condition on inventory_part of the existing parts an import may rewrite."""
+    quote = connection.ops.quote_name
+    part_table = quote(Part._meta.db_table)
+    # Parts used in an aircraft, lots (even partly used ones) and reserved parts are never rewritten
+    return (
+        f"{part_table}.is_used = %s AND {part_table}.quantity IS NULL AND {part_table}.reservation_id IS NULL "
+        f"AND NOT EXISTS (SELECT 1 FROM {quote(AircraftPart._meta.db_table)} "
+        f"WHERE {quote(AircraftPart._meta.db_table)}.part_id = {part_table}.id)"
+    )
+
+
+def _to_datetime(value) -> datetime:
+    """Convert a raw datetime column value to an aware datetime on every database."""
+    if isinstance(value, str):
+        value = parse_datetime(value)
+    if timezone.is_naive(value):
+        # SQLite stores datetimes as naive UTC
+        value = timezone.make_aware(value, datetime_timezone.utc)
+    return value
+
+
+def _get_updated_range(cursor) -> List[datetime]:
+    """Get the earliest and latest current created_at of the existing parts the staging rows will update."""
+    quote = connection.ops.quote_name
+    part_table = quote(Part._meta.db_table)
+    cursor.execute(
+        f"SELECT MIN({part_table}.created_at), MAX({part_table}.created_at) FROM {part_table} "
+        f"JOIN {quote(STAGING_TABLE)} staged ON staged.serial_number = {part_table}.serial_number "
+        f"WHERE {_updatable_condition()}",
+        [False]
+    )
+    return [_to_datetime(value) for value in cursor.fetchone() if value is not None]
+
+
+def _merge_staging(cursor, on_conflict: str) -> int:
+    """Merge the staging table into inventory_part and return the number of merged rows."""
+    quote = connection.ops.quote_name
+    part_table = quote(Part._meta.db_table)
+    conflict = "DO NOTHING"
+    if on_conflict == 'update':
+        conflict = (
+            "DO UPDATE SET part_type_id = excluded.part_type_id, aircraft_type_id = excluded.aircraft_type_id, "
+            "owner_id = excluded.owner_id, created_at = excluded.created_at, updated_at = excluded.updated_at "
+            f"WHERE {_updatable_condition()}"
+        )
+    cursor.execute(
+        f"INSERT INTO {part_table} (serial_number, serial, part_type_id, aircraft_type_id, owner_id, is_used, created_at, "
+        f"updated_at) SELECT serial_number, serial, part_type_id, aircraft_type_id, owner_id, %s, created_at, %s "
+        f"FROM {quote(STAGING_TABLE)} "
+        f"WHERE true ON CONFLICT (serial_number) {conflict} RETURNING id",
+        [False, connection.ops.adapt_datetimefield_value(timezone.now())] + ([False] if on_conflict == 'update' else [])
+    )
+    return len(cursor.fetchall())
+
+
+def load_rows(rows: List[ImportRow], on_conflict: str = 'skip') -> Tuple[int, List[datetime]]:
+    """
+    Load validated rows through the staging table in a single transaction.
+
+    Returns the number of merged rows and the earliest and latest created_at the
+    updated parts had before the import, whose production days change as well.
+    """
+    # The same serial twice in one statement would make ON CONFLICT DO UPDATE fail
+    rows = list({row[0]: row for row in rows}.values())
+    with transaction.atomic(), connection.cursor() as cursor:
+        _load_staging(cursor, rows)
+        updated_range = _get_updated_range(cursor) if on_conflict == 'update' else []
+        merged = _merge_staging(cursor, on_conflict)
+        if connection.vendor != 'postgresql':
+            cursor.execute(f"DROP TABLE temp.{connection.ops.quote_name(STAGING_TABLE)}")
+    return merged, updated_range
+
+
+def import_parts(stream: Iterable[str], file_format: str, on_conflict: str = 'skip',
+                 chunk_size: int = IMPORT_CHUNK_SIZE, progress=None) -> ImportResult:
+    """
+    Validate and import parts from a CSV or NDJSON text stream.
+
+    Records are expected to have serial_number, part_type, aircraft_type, owner (username)
+    and an optional created_at. Part types produced in lots are rejected. The stream is processed in chunks, each one validated
+    against preloaded lookups and merged in its own transaction. Updates skip parts
+    which are used, lots or reserved. The production rollups of the imported days,
+    and of the days updated parts were produced on before, are rebuilt at the end.
+    """
+    if on_conflict not in IMPORT_CONFLICT_ACTIONS:
+        raise PartImportError(f"Unsupported conflict action: {on_conflict}")
+
+    lookups = ImportLookups()
+    result = ImportResult()
+    records = iter_records(stream, file_format)
+    try:
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+            valid_rows = []
+            for line_number, record in chunk:
+                result.rows += 1
+                if record is None:
+                    result.add_error(line_number, "Invalid record")
+                    continue
+                try:
+                    valid_rows.append(lookups.validate(record))
+                except ValueError as e:
+                    result.add_error(line_number, str(e))
+            if valid_rows:
+                merged, updated_range = load_rows(valid_rows, on_conflict=on_conflict)
+                result.imported += merged
+                result.skipped += len(valid_rows) - merged
+                result.add_days(valid_rows)
+                result.add_dates(updated_range)
+            if progress:
+                progress(result)
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise PartImportError(f"Could not read import file: {e}")
+
+    # Rows are inserted in bulk without model signals, rebuild the affected production days
+    if result.imported:
+        from analytics.rollups import recompute_rollups
+        recompute_rollups(result.first_day, result.last_day)
+    return result
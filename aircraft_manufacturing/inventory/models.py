@@ -1,14 +1,20 @@
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.core.exceptions import ValidationError
 from accounts.models import TeamMember, TeamType
+from aircraft_manufacturing.serials import format_serial, parse_serial, random_serial
 from assembly.models import AircraftType
-import uuid
+from .constants import PART_SERIAL_PREFIX
 
 
 class PartType(models.Model):
     """Model to store part types"""
     name = models.CharField(max_length=64, unique=True, help_text="Name of the part type")
     description = models.TextField(blank=True, help_text="Description of the part type")
+    is_lot_tracked = models.BooleanField(
+        default=False,
+        help_text="Whether parts of this type are produced in lots with a quantity instead of one serialized part each"
+    )
     created_at = models.DateTimeField(auto_now_add=True, help_text="Date and time of creation")
     updated_at = models.DateTimeField(auto_now=True, help_text="Date and time of last update")
 
@@ -35,21 +41,73 @@ class TeamPartPermission(models.Model):
         ordering = ['team_type', 'part_type']
 
 
+# Parts which can still be allocated, also the condition of the part_available_idx index.
+# Lots are marked as used once their remaining quantity is consumed.
+# Parts of expired reservations are released by allocation before it selects (release_expired_holds).
+AVAILABLE_PARTS = models.Q(is_used=False, reservation__isnull=True)
+
+# Units held by a part row, the remaining quantity of a lot or one serialized part
+PART_UNITS = Coalesce(models.F('quantity'), 1)
+
+
 class Part(models.Model):
     """Part model representing aircraft components"""
     part_type = models.ForeignKey(PartType, on_delete=models.PROTECT, help_text="Type of the part")
     aircraft_type = models.ForeignKey(AircraftType, on_delete=models.PROTECT, help_text="Type of the aircraft this part belongs to")
     owner = models.ForeignKey(TeamMember, on_delete=models.SET_NULL, null=True, help_text="Team member who produced this part")
-    is_used = models.BooleanField(default=False, help_text="Whether this part is used in an aircraft")
+    is_used = models.BooleanField(default=False, help_text="Whether this part is used in an aircraft, or the lot used up")
+    quantity = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Remaining quantity of a lot, empty for serialized parts"
+    )
     serial_number = models.CharField(max_length=64, unique=True, help_text="Serial number of the part", null=True)
-    created_at = models.DateTimeField(auto_now_add=True, help_text="Date and time of creation")
+    # Not unique itself: serial_number is the unique key, the import upserts on it and it also
+    # covers serial numbers in other formats. The display form maps to one integer and back.
+    serial = models.BigIntegerField(
+        db_index=True,
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Integer value of the serial number, empty for serial numbers in another format"
+    )
+    reservation = models.ForeignKey(
+        'assembly.Reservation',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='parts',
+        help_text="Reservation holding this part for a later assembly"
+    )
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True, help_text="Date and time of creation")
     updated_at = models.DateTimeField(auto_now=True, help_text="Date and time of last update")
 
+    class Meta:
+        indexes = [
+            # Oldest available parts of an aircraft and part type, used by assembly allocation
+            models.Index(
+                fields=['aircraft_type', 'part_type', 'created_at', 'id'],
+                condition=AVAILABLE_PARTS,
+                name='part_available_idx',
+            ),
+            # Available parts of an aircraft and part type in serial order, used by the serial typeahead
+            models.Index(
+                fields=['aircraft_type', 'part_type', 'serial'],
+                condition=AVAILABLE_PARTS,
+                name='part_available_serial_idx',
+            ),
+        ]
+
     def __str__(self):
         return f"{self.aircraft_type.name} - {self.part_type.name} ({self.serial_number})"
 
     def clean(self):
-        """Validate that the part can only be produced by team members of the corresponding team"""
+        """Validate the lot quantity and that the part can only be produced by team members of the corresponding team"""
+        if self.part_type.is_lot_tracked and self.quantity is None:
+            raise ValidationError(f"{self.part_type.name} parts are produced in lots and need a quantity")
+        if not self.part_type.is_lot_tracked and self.quantity is not None:
+            raise ValidationError(f"{self.part_type.name} parts are serialized and have no quantity")
+
         if self.owner:
             permission = TeamPartPermission.objects.filter(
                 team_type=self.owner.team.team_type,
@@ -73,18 +131,21 @@ class Part(models.Model):
 
     def create_serial_number(self):
         """Create a unique serial number for the part"""
-        self.serial_number = f"P-{uuid.uuid4().hex[:8].upper()}"
-        if Part.objects.filter(serial_number=self.serial_number).exists():
+        self.serial = random_serial()
+        self.serial_number = format_serial(PART_SERIAL_PREFIX, self.serial)
+        if Part.objects.filter(serial=self.serial).exists():
             self.create_serial_number()
 
     def save(self, *args, **kwargs):
         self.check_create_perm()
         if not self.serial_number:
             self.create_serial_number()
+        elif self.serial is None:
+            self.serial = parse_serial(PART_SERIAL_PREFIX, self.serial_number)
         self.clean()
         super().save(*args, **kwargs)
 
     def delete(self, *args, **kwargs):
-        if self.is_used:
+        if self.is_used or (self.quantity is not None and self.used_in.exists()):
             raise ValidationError("Cannot delete a part that is used in an aircraft")
         super().delete(*args, **kwargs)
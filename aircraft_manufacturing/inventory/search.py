@@ -0,0 +1,107 @@
+"""Bounded lookups of the available parts of an aircraft type for the part pickers."""
+import base64
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from django.db.models import F, Q, QuerySet, Sum, Window
+from django.db.models.functions import RowNumber
+from aircraft_manufacturing.serials import SERIAL_SPACE, get_serial_range
+from .constants import PART_SERIAL_PREFIX
+from .models import AVAILABLE_PARTS, PART_UNITS, Part
+
+TYPEAHEAD_FIELDS = ('id', 'serial_number', 'created_at')
+
+
+def find_available_parts(aircraft_type_id: int, part_type_id: int, text: str, limit: int) -> List[dict]:
+    """
+    Get the first available serialized parts whose serial number starts with the text, in serial order.
+
+    The text may leave out the prefix. Serials in display form are a range scan of the
+    (aircraft type, part type, serial) index, serial numbers in another format follow
+    from the rows without an integer serial when the range does not fill the limit.
+    At most limit rows are read by either query.
+    """
+    parts = Part.objects.filter(
+        AVAILABLE_PARTS,
+        aircraft_type_id=aircraft_type_id,
+        part_type_id=part_type_id,
+        quantity__isnull=True,
+    ).values(*TYPEAHEAD_FIELDS)
+    text = text.strip().upper()
+    if text in ('', PART_SERIAL_PREFIX):
+        serial_range = (0, SERIAL_SPACE - 1)
+    else:
+        serial_range = get_serial_range(
+            PART_SERIAL_PREFIX, text if text.startswith(PART_SERIAL_PREFIX) else PART_SERIAL_PREFIX + text
+        )
+
+    found = []
+    if serial_range is not None:
+        found = list(parts.filter(serial__range=serial_range).order_by('serial')[:limit])
+    if len(found) < limit:
+        found += parts.filter(serial__isnull=True, serial_number__istartswith=text).order_by(
+            'serial_number'
+        )[:limit - len(found)]
+    return found
+
+
+def encode_cursor(created_at: datetime, part_id: int) -> str:
+    """Encode the position after a part in (created_at, id) order as an opaque cursor."""
+    return base64.urlsafe_b64encode(json.dumps([created_at.isoformat(), part_id]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor of encode_cursor, raises ValueError when it is not one."""
+    try:
+        created_at, part_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), int(part_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def get_parts_page(rows: List[dict], per_type: int) -> Tuple[List[dict], Optional[str]]:
+    """Cut rows read one past the page size to the page and the cursor of the next page, if any."""
+    page = [{'id': row['id'], 'type': row['type'], 'created_at': row['created_at']} for row in rows[:per_type]]
+    cursor = encode_cursor(page[-1]['created_at'], page[-1]['id']) if len(rows) > per_type else None
+    return page, cursor
+
+
+def get_oldest_parts_by_type(parts: QuerySet, per_type: int) -> Tuple[Dict[str, int], Dict[str, List[dict]],
+                                                                      Dict[str, Optional[str]]]:
+    """
+    Get the available units and the oldest per_type parts of every part type in one query.
+
+    Rows are numbered within their part type by ROW_NUMBER() and the units summed
+    over the whole part type by a window before the numbering is cut, so the counts
+    cover every part while at most per_type + 1 rows of a type are read. Returns the
+    units, the parts and the cursor of the next page of every part type.
+    """
+    rows = parts.annotate(
+        type=F('part_type__name'),
+        position=Window(RowNumber(), partition_by=[F('part_type_id')], order_by=[F('created_at').asc(), F('id').asc()]),
+        type_units=Window(Sum(PART_UNITS), partition_by=[F('part_type_id')]),
+    ).filter(position__lte=per_type + 1).values('id', 'type', 'created_at', 'type_units').order_by('type', 'position')
+
+    units = {}
+    rows_by_type: Dict[str, List[dict]] = {}
+    for row in rows:
+        units[row['type']] = row['type_units']
+        rows_by_type.setdefault(row['type'], []).append(row)
+    pages = {part_type: get_parts_page(type_rows, per_type) for part_type, type_rows in rows_by_type.items()}
+    return (
+        units,
+        {part_type: page for part_type, (page, _) in pages.items()},
+        {part_type: cursor for part_type, (_, cursor) in pages.items()},
+    )
+
+
+def get_next_parts(parts: QuerySet, part_type: str, cursor: str, per_type: int) -> Tuple[List[dict], Optional[str]]:
+    """Get the next per_type parts of a part type after the cursor, with the cursor of the page after."""
+    created_at, part_id = decode_cursor(cursor)
+    rows = list(parts.filter(
+        Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=part_id),
+        part_type__name=part_type,
+    ).annotate(type=F('part_type__name')).values('id', 'type', 'created_at').order_by('created_at', 'id')[
+        :per_type + 1
+    ])
+    return get_parts_page(rows, per_type)
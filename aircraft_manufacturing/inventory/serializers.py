@@ -10,7 +10,7 @@ class PartTypeSerializer(serializers.ModelSerializer):
     """Serializer for PartType model"""
     class Meta:
         model = PartType
-        fields = ('id', 'name', 'description', 'created_at', 'updated_at')
+        fields = ('id', 'name', 'description', 'is_lot_tracked', 'created_at', 'updated_at')
         ordering = ['name']
 
 
@@ -48,12 +48,15 @@ class PartSerializer(serializers.ModelSerializer):
             'owner_name',
             'owner_team',
             'is_used',
+            'quantity',
+            'reservation',
             'created_at',
             'updated_at'
         ]
-        read_only_fields = ['serial_number', 'owner', 'created_at', 'updated_at']
+        read_only_fields = ['serial_number', 'owner', 'reservation', 'created_at', 'updated_at']
         extra_kwargs = {
-            'part_type': {'required': False} # Avoid required validation error
+            'part_type': {'required': False}, # Avoid required validation error
+            'quantity': {'min_value': 1}
         }
 
     def get_owner_name(self, obj: Part) -> Optional[str]:
@@ -89,6 +92,12 @@ class PartSerializer(serializers.ModelSerializer):
                 f"Your team does not have permission to create parts of type {data['part_type'].name}"
             )
 
+        # Lot-tracked parts are produced with a quantity, serialized parts one at a time
+        if data['part_type'].is_lot_tracked and not data.get('quantity'):
+            raise serializers.ValidationError(f"Parts of type {data['part_type'].name} need a lot quantity")
+        if not data['part_type'].is_lot_tracked and data.get('quantity') is not None:
+            raise serializers.ValidationError(f"Parts of type {data['part_type'].name} are serialized and have no quantity")
+
         return data
 
     def create(self, validated_data):
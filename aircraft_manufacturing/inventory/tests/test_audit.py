@@ -0,0 +1,105 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from accounts.constants import TeamTypes
+from accounts.models import Team, TeamMember, TeamType
+from assembly.bom import invalidate_bom_cache
+from assembly.models import Aircraft, AircraftPart, AircraftPartRequirement, AircraftType
+from inventory.audit import audit_inventory
+from inventory.models import Part, PartType, TeamPartPermission
+
+
+class AuditInventoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        """Set up data for all test methods"""
+        assembly_type = TeamType.objects.create(name=TeamTypes.ASSEMBLY)
+        cls.assembly_member = TeamMember.objects.create(
+            team=Team.objects.create(team_type=assembly_type, name="Test Assembly Team"),
+            user=User.objects.create_user(username="assembly_user")
+        )
+        producer_type = TeamType.objects.create(name=TeamTypes.WING)
+        cls.producer_member = TeamMember.objects.create(
+            team=Team.objects.create(team_type=producer_type, name="Test Producer Team"),
+            user=User.objects.create_user(username="producer_user")
+        )
+        cls.aircraft_type = AircraftType.objects.create(name="Test Aircraft Type")
+        cls.other_aircraft_type = AircraftType.objects.create(name="Other Aircraft Type")
+        cls.wing_type = PartType.objects.create(name="WING")
+        TeamPartPermission.objects.create(team_type=producer_type, part_type=cls.wing_type, can_create=True)
+        AircraftPartRequirement.objects.create(aircraft_type=cls.aircraft_type, part_type=cls.wing_type, quantity=2)
+
+    def setUp(self):
+        # Rolled back requirement changes of other tests do not send the invalidating signals
+        invalidate_bom_cache()
+
+    def create_aircraft(self, parts):
+        """Link the parts to a new aircraft and mark them as used"""
+        aircraft = Aircraft.objects.create(aircraft_type=self.aircraft_type, owner=self.assembly_member)
+        AircraftPart.objects.bulk_create([AircraftPart(aircraft=aircraft, part=part) for part in parts])
+        Part.objects.filter(id__in=[part.id for part in parts]).update(is_used=True)
+        return aircraft
+
+    def create_part(self, aircraft_type=None):
+        """Create an unused wing"""
+        return Part.objects.create(
+            part_type=self.wing_type,
+            aircraft_type=aircraft_type or self.aircraft_type,
+            owner=self.producer_member
+        )
+
+    def test_audit_reports_and_fixes_mismatches(self):
+        """Test that drifted usage flags are found in every chunk and fixed on request"""
+        self.create_aircraft([self.create_part(), self.create_part()])
+        orphan = self.create_part()
+        Part.objects.filter(id=orphan.id).update(is_used=True)
+        short = self.create_aircraft([self.create_part()])
+        foreign = self.create_aircraft([self.create_part(), self.create_part(self.other_aircraft_type)])
+        Part.objects.filter(id__in=short.parts.values('id')).update(is_used=False)
+
+        result = audit_inventory(chunk_size=2)
+        self.assertEqual(result.parts, 6)
+        self.assertEqual(result.aircraft, 3)
+        self.assertEqual(result.checks['used_without_aircraft'].samples, [orphan.id])
+        self.assertEqual(result.checks['unused_in_aircraft'].found, 1)
+        self.assertEqual(result.checks['aircraft_part_quantities'].samples, [short.id])
+        self.assertEqual(result.checks['aircraft_part_types'].samples, [foreign.id])
+        # Reporting leaves the data untouched
+        self.assertTrue(Part.objects.get(id=orphan.id).is_used)
+
+        result = audit_inventory(fix=True, chunk_size=2)
+        self.assertEqual(result.checks['used_without_aircraft'].fixed, 1)
+        self.assertEqual(result.checks['unused_in_aircraft'].fixed, 1)
+        self.assertFalse(Part.objects.get(id=orphan.id).is_used)
+        self.assertEqual(Part.objects.filter(is_used=True).count(), 5)
+
+        result = audit_inventory(chunk_size=2)
+        self.assertEqual(result.checks['used_without_aircraft'].found, 0)
+        self.assertEqual(result.checks['unused_in_aircraft'].found, 0)
+
+    def test_audit_lots(self):
+        """Test that lots shared by aircraft are checked by their remaining and taken quantities"""
+        rivet_type = PartType.objects.create(name="RIVET", is_lot_tracked=True)
+        TeamPartPermission.objects.create(
+            team_type=self.producer_member.team.team_type, part_type=rivet_type, can_create=True
+        )
+        AircraftPartRequirement.objects.create(aircraft_type=self.aircraft_type, part_type=rivet_type, quantity=50)
+        lot = Part.objects.create(
+            part_type=rivet_type, aircraft_type=self.aircraft_type, owner=self.producer_member, quantity=30
+        )
+        empty = Part.objects.create(
+            part_type=rivet_type, aircraft_type=self.aircraft_type, owner=self.producer_member, quantity=0
+        )
+        aircraft = self.create_aircraft([self.create_part(), self.create_part()])
+        AircraftPart.objects.create(aircraft=aircraft, part=lot, quantity=50)
+
+        result = audit_inventory(fix=True)
+        self.assertEqual(result.checks['unused_in_aircraft'].found, 0)
+        self.assertEqual(result.checks['aircraft_part_quantities'].found, 0)
+        self.assertEqual(result.checks['empty_lot_unused'].samples, [empty.id])
+        self.assertTrue(Part.objects.get(id=empty.id).is_used)
+
+        # The empty lot has no aircraft link, a second run must not flip it back
+        result = audit_inventory(fix=True)
+        self.assertEqual(result.checks['used_without_aircraft'].found, 0)
+        self.assertEqual(result.checks['empty_lot_unused'].found, 0)
+        self.assertTrue(Part.objects.get(id=empty.id).is_used)
@@ -109,7 +109,7 @@ class PartTests(TestCase):
             aircraft_type=self.aircraft_type,
             owner=self.team_member
         )
-        self.assertRegex(part.serial_number, r'^P-[A-F0-9]{8}$')
+        self.assertRegex(part.serial_number, r'^P-[0-9A-Z]{8}$')
 
     def test_part_creation_permission(self):
         """Test that parts can only be produced by team members with permission"""
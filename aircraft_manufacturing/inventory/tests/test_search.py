@@ -0,0 +1,59 @@
+from unittest import skipUnless
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from accounts.filters import TeamMemberFilter, UserFilter
+from accounts.models import TeamMember
+from aircraft_manufacturing.search import create_trigram_indexes, has_trigram_extension
+from assembly.filters import AircraftFilter
+from assembly.models import Aircraft
+from assembly.tests.test_allocation import AllocationDataMixin
+from inventory.filters import PartFilter
+from inventory.models import Part
+
+
+class SubstringSearchTests(AllocationDataMixin, TestCase):
+    def setUp(self):
+        self.create_allocation_data()
+        self.part = Part.objects.create(
+            part_type=self.wing_type, aircraft_type=self.aircraft_type, owner=self.producer_member,
+            serial_number='P-00C0FFEE'
+        )
+        self.aircraft = Aircraft.objects.create(
+            aircraft_type=self.aircraft_type, owner=self.assembly_member, serial_number='A-LEGACY001'
+        )
+
+    def explain(self, filterset):
+        # A handful of rows is always read sequentially, only the index decides
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        return filterset.qs.explain()
+
+    def test_substring_filters(self):
+        """Test that fragments match anywhere and case insensitively on every database"""
+        self.assertEqual(list(PartFilter({'serial_number': 'c0ffe'}, queryset=Part.objects.all()).qs), [self.part])
+        self.assertEqual(list(AircraftFilter({'serial_number': 'gacy'}, queryset=Aircraft.objects.all()).qs),
+                         [self.aircraft])
+        self.assertEqual(list(UserFilter({'username': 'EMBLY_'}, queryset=User.objects.all()).qs),
+                         [self.assembly_member.user])
+        if connection.vendor != 'postgresql':
+            self.assertEqual(create_trigram_indexes(), [])
+
+    @skipUnless(connection.vendor == 'postgresql', "Trigram indexes require PostgreSQL")
+    def test_substring_filters_use_trigram_indexes(self):
+        """Test that the icontains filters are answered from the trigram indexes created after migrate"""
+        if not has_trigram_extension():
+            self.skipTest("pg_trgm is not installed on the database server")
+        self.assertEqual(create_trigram_indexes(), [])
+        cases = [
+            (PartFilter, Part, {'serial_number': 'c0ffe'}, 'inventory_part_serial_number_trgm'),
+            (AircraftFilter, Aircraft, {'serial_number': 'gacy'}, 'assembly_aircraft_serial_number_trgm'),
+            (UserFilter, User, {'username': 'embly_'}, 'auth_user_username_trgm'),
+            (UserFilter, User, {'email': 'example'}, 'auth_user_email_trgm'),
+        ]
+        for filterset_class, model, data, index_name in cases:
+            with self.subTest(index_name):
+                plan = self.explain(filterset_class(data, queryset=model.objects.all()))
+                self.assertIn(index_name, plan)
+        plan = self.explain(TeamMemberFilter({'user_username': 'embly_'}, queryset=TeamMember.objects.all()))
+        self.assertIn('auth_user_username_trgm', plan)
@@ -0,0 +1,64 @@
+from django.test import SimpleTestCase, TestCase
+from aircraft_manufacturing.serials import backfill_serials, format_serial, get_serial_range, parse_serial
+from assembly.filters import AircraftFilter
+from assembly.models import Aircraft
+from assembly.tests.test_allocation import AllocationDataMixin
+from inventory.models import Part
+
+
+class SerialFormatTests(SimpleTestCase):
+    def test_display_form_round_trip(self):
+        """Test that integer serials and existing hexadecimal serials keep their display form"""
+        self.assertEqual(format_serial('P-', 0), 'P-00000000')
+        self.assertEqual(format_serial('P-', 36 ** 8 - 1), 'P-ZZZZZZZZ')
+        for serial_number in ('P-1A2B3C4D', 'P-00C0FFEE', 'P-ZZ01XY9Q'):
+            self.assertEqual(format_serial('P-', parse_serial('P-', serial_number)), serial_number)
+        for serial_number in ('A-1A2B3C4D', 'P-1a2b3c4d', 'P-1A2B3C4', 'P-1A2B3C4D5', 'LEGACY-001', ''):
+            self.assertIsNone(parse_serial('P-', serial_number))
+
+    def test_prefix_range(self):
+        """Test that the start of a serial maps to the range of serials sharing it"""
+        low, high = get_serial_range('A-', 'a-1a')
+        self.assertEqual(format_serial('A-', low), 'A-1A000000')
+        self.assertEqual(format_serial('A-', high), 'A-1AZZZZZZ')
+        self.assertIsNone(get_serial_range('A-', '1A2B'))
+        self.assertIsNone(get_serial_range('A-', 'A-'))
+
+
+class SerialLookupTests(AllocationDataMixin, TestCase):
+    def setUp(self):
+        self.create_allocation_data()
+
+    def test_backfill_existing_serials(self):
+        """Test that rows stored with strings only get their integer serial, other formats are kept as strings"""
+        parts = self.create_parts(self.wing_type, 3)
+        self.assertTrue(all(part.serial_number == format_serial('P-', part.serial) for part in parts))
+        Part.objects.filter(id=parts[0].id).update(serial=None, serial_number='P-00C0FFEE')
+        Part.objects.filter(id=parts[1].id).update(serial=None, serial_number='LEGACY-001')
+
+        progress = []
+        self.assertEqual(backfill_serials(Part, 'P-', chunk_size=1, progress=lambda *counts: progress.append(counts)),
+                         (1, 1))
+        self.assertEqual(progress, [(1, 0), (1, 1)])
+        self.assertEqual(Part.objects.get(id=parts[0].id).serial, int('00C0FFEE', 36))
+        self.assertIsNone(Part.objects.get(id=parts[1].id).serial)
+
+    def test_filter_by_serial(self):
+        """Test that serial searches from the start use the integer serial and other text the string"""
+        aircraft = Aircraft.objects.create(
+            aircraft_type=self.aircraft_type, owner=self.assembly_member, serial_number='A-00C0FFEE'
+        )
+        legacy = Aircraft.objects.create(
+            aircraft_type=self.aircraft_type, owner=self.assembly_member, serial_number='A-LEGACY001'
+        )
+        self.assertEqual(aircraft.serial, int('00C0FFEE', 36))
+        self.assertIsNone(legacy.serial)
+
+        def search(value):
+            return set(AircraftFilter({'serial_number': value}, queryset=Aircraft.objects.all()).qs)
+
+        self.assertEqual(search('a-00c'), {aircraft})
+        self.assertEqual(search('A-00C0FFEE'), {aircraft})
+        self.assertEqual(search('C0FFEE'), {aircraft})
+        self.assertEqual(search('A-LEG'), {legacy})
+        self.assertEqual(search('LEGACY'), {legacy})
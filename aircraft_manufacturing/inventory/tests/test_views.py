@@ -1,12 +1,25 @@
+import csv
+import gzip
+import io
+import json
+from datetime import date, datetime, timedelta
+from unittest import skipUnless
+from django.db import connection
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TransactionTestCase
 from django.urls import reverse
+from django.utils import timezone
 from django.contrib.auth.models import User
 from rest_framework import status
 from rest_framework.test import APITestCase
 from accounts.models import TeamType, Team, TeamMember
 from accounts.constants import TeamTypes
 from inventory.models import PartType, TeamPartPermission, Part
-from assembly.models import AircraftPartRequirement, AircraftType
+from analytics.models import DailyPartProduction
+from analytics.rollups import recompute_rollups
+from assembly.models import Aircraft, AircraftPart, AircraftPartRequirement, AircraftType, Reservation
+from inventory.constants import PART_EXPORT_COLUMNS
+from aircraft_manufacturing.exports import COPY_QUEUE_SIZE, CopyCancelled, _CopyWriter, iter_copy_export, iter_export
 
 class PartTypeViewSetTests(APITestCase, TransactionTestCase):
     # No need to test, as this is not public API
@@ -261,3 +274,281 @@ class PartViewSetTests(APITestCase, TransactionTestCase):
             self.assertEqual(value['available'], 1)
             self.assertEqual(value['used'], 0)
 
+
+    def test_export_parts_csv(self):
+        """Test streaming parts export honours the list filters"""
+        url = self.get_api_url('inventory:parts-export')
+        other_aircraft_type = AircraftType.objects.create(name="Other Aircraft Type")
+        Part.objects.create(
+            part_type=self.part_type,
+            aircraft_type=other_aircraft_type,
+            owner=self.team_membership
+        )
+
+        self.client.force_authenticate(user=self.team_member)
+        response = self.client.get(url, {'aircraft_type': self.aircraft_type.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0][:2], ['id', 'serial_number'])
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][1], self.part.serial_number)
+
+    def test_export_parts_ndjson_gzip(self):
+        """Test gzip compressed NDJSON parts export"""
+        url = self.get_api_url('inventory:parts-export')
+
+        self.client.force_authenticate(user=self.team_member)
+        response = self.client.get(url, {'file_format': 'ndjson', 'gzip': 'true'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('parts.ndjson.gz', response['Content-Disposition'])
+        lines = gzip.decompress(b''.join(response.streaming_content)).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])['serial_number'], self.part.serial_number)
+
+        response = self.client.get(url, {'file_format': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_copy_writer_stops_when_cancelled(self):
+        """Test that a COPY worker facing a full queue gives up once the consumer is gone"""
+        writer = _CopyWriter()
+        for _ in range(COPY_QUEUE_SIZE):
+            writer.put(b'block')
+        writer.cancelled.set()
+        with self.assertRaises(CopyCancelled):
+            writer.put(ValueError("COPY failed"))
+
+    def test_export_parts_json(self):
+        """Test that the JSON export streams the rows as one array"""
+        url = self.get_api_url('inventory:parts-export')
+
+        self.client.force_authenticate(user=self.team_member)
+        response = self.client.get(url, {'file_format': 'json'})
+        self.assertEqual(response['Content-Type'], 'application/json')
+        rows = json.loads(b''.join(response.streaming_content))
+        self.assertEqual([row['serial_number'] for row in rows], [self.part.serial_number])
+        response = self.client.get(url, {'file_format': 'json', 'is_used': 'true'})
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), [])
+
+    @skipUnless(connection.vendor == 'postgresql', "COPY TO requires PostgreSQL")
+    def test_export_parts_copy_matches_python(self):
+        """Test that the COPY TO fast path exports the same rows as the Python streamer"""
+        queryset = Part.objects.order_by('id')
+        copy_rows = list(csv.reader(io.StringIO(b''.join(iter_copy_export(queryset, PART_EXPORT_COLUMNS)).decode())))
+        python_rows = list(csv.reader(io.StringIO(b''.join(iter_export(queryset, PART_EXPORT_COLUMNS, 'csv')).decode())))
+        self.assertEqual(copy_rows[0], python_rows[0])
+        self.assertEqual([row[:4] for row in copy_rows], [row[:4] for row in python_rows])
+
+    def test_import_parts(self):
+        """Test bulk import validates rows against lookups and skips existing serial numbers"""
+        url = self.get_api_url('inventory:parts-import-parts')
+        content = "\n".join([
+            "serial_number,part_type,aircraft_type,owner,created_at",
+            f"LEGACY-1,{self.part_type.name},{self.aircraft_type.name},test_member,2024-01-02T10:00:00Z",
+            f"LEGACY-2,{self.part_type.name},{self.aircraft_type.name},test_member,",
+            f"LEGACY-3,Unknown,{self.aircraft_type.name},test_member,",
+            f"LEGACY-4,{self.part_type.name},{self.aircraft_type.name},test_admin,",
+            f"{self.part.serial_number},{self.part_type.name},{self.aircraft_type.name},test_member,",
+        ])
+        upload = SimpleUploadedFile('parts.csv', content.encode(), content_type='text/csv')
+
+        # Only admins can import
+        self.client.force_authenticate(user=self.team_member)
+        response = self.client.post(url, {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        upload.seek(0)
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.post(url, {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['rows'], 5)
+        self.assertEqual(response.data['imported'], 2)
+        self.assertEqual(response.data['skipped'], 1)
+        self.assertEqual(response.data['invalid'], 2)
+        self.assertEqual([error['line'] for error in response.data['errors']], [4, 5])
+
+        legacy_part = Part.objects.get(serial_number='LEGACY-1')
+        self.assertEqual(legacy_part.owner, self.team_membership)
+        self.assertFalse(legacy_part.is_used)
+        self.assertEqual(legacy_part.created_at.year, 2024)
+
+    def test_import_rejects_lot_tracked_parts(self):
+        """Test that rows of a part type produced in lots are rejected instead of imported without a quantity"""
+        url = self.get_api_url('inventory:parts-import-parts')
+        lot_type = PartType.objects.create(name="Rivets", is_lot_tracked=True)
+        TeamPartPermission.objects.create(team_type=self.team_type, part_type=lot_type, can_create=True)
+        content = "\n".join([
+            "serial_number,part_type,aircraft_type,owner",
+            f"LOT-1,{lot_type.name},{self.aircraft_type.name},test_member",
+            f"LEGACY-1,{self.part_type.name},{self.aircraft_type.name},test_member",
+        ])
+
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.post(url, {'file': SimpleUploadedFile('parts.csv', content.encode())}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['imported'], 1)
+        self.assertEqual(response.data['invalid'], 1)
+        self.assertEqual(response.data['errors'][0]['line'], 2)
+        self.assertIn('lots', response.data['errors'][0]['detail'])
+        self.assertFalse(Part.objects.filter(part_type=lot_type).exists())
+
+    def test_import_parts_ndjson_update(self):
+        """Test NDJSON import updating parts with an existing serial number"""
+        url = self.get_api_url('inventory:parts-import-parts')
+        other_aircraft_type = AircraftType.objects.create(name="Other Aircraft Type")
+        record = {
+            'serial_number': self.part.serial_number,
+            'part_type': self.part_type.name,
+            'aircraft_type': other_aircraft_type.name,
+            'owner': 'test_member',
+        }
+        upload = SimpleUploadedFile('parts.ndjson', (json.dumps(record) + "\nnot json\n").encode())
+
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.post(url, {'file': upload, 'on_conflict': 'update'}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['imported'], 1)
+        self.assertEqual(response.data['invalid'], 1)
+        self.part.refresh_from_db()
+        self.assertEqual(self.part.aircraft_type, other_aircraft_type)
+        self.assertEqual(Part.objects.count(), 1)
+
+    def test_import_update_skips_reserved_parts_and_lots(self):
+        """Test that an update import leaves reserved parts and partly used lots unchanged"""
+        url = self.get_api_url('inventory:parts-import-parts')
+        other_aircraft_type = AircraftType.objects.create(name="Other Aircraft Type")
+        lot_type = PartType.objects.create(name="Rivets", is_lot_tracked=True)
+        TeamPartPermission.objects.create(team_type=self.team_type, part_type=lot_type, can_create=True)
+        lot = Part.objects.create(part_type=lot_type, aircraft_type=self.aircraft_type,
+                                  owner=self.team_membership, quantity=5)
+        aircraft = Aircraft.objects.create(aircraft_type=self.aircraft_type, owner=self.team_membership)
+        AircraftPart.objects.create(aircraft=aircraft, part=lot, quantity=2)
+        Part.objects.filter(id=lot.id).update(quantity=3)
+        reservation = Reservation.objects.create(
+            aircraft_type=self.aircraft_type, owner=self.team_membership, expires_at=timezone.now() + timedelta(minutes=30)
+        )
+        Part.objects.filter(id=self.part.id).update(reservation=reservation)
+        content = "\n".join(json.dumps({
+            'serial_number': serial_number,
+            'part_type': self.part_type.name,
+            'aircraft_type': other_aircraft_type.name,
+            'owner': 'test_member',
+        }) for serial_number in (lot.serial_number, self.part.serial_number))
+
+        self.client.force_authenticate(user=self.admin_user)
+        upload = SimpleUploadedFile('parts.ndjson', content.encode())
+        response = self.client.post(url, {'file': upload, 'on_conflict': 'update'}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['imported'], 0)
+        self.assertEqual(response.data['skipped'], 2)
+        lot.refresh_from_db()
+        self.part.refresh_from_db()
+        self.assertEqual((lot.part_type, lot.aircraft_type, lot.quantity), (lot_type, self.aircraft_type, 3))
+        self.assertEqual((self.part.aircraft_type, self.part.reservation), (self.aircraft_type, reservation))
+
+    def test_import_update_recomputes_previous_day(self):
+        """Test that the rollup of the day an updated part was produced on before is rebuilt as well"""
+        url = self.get_api_url('inventory:parts-import-parts')
+        Part.objects.filter(id=self.part.id).update(created_at=timezone.make_aware(datetime(2024, 1, 5, 10)))
+        recompute_rollups(date(2024, 1, 5), date(2024, 1, 5))
+        self.assertTrue(DailyPartProduction.objects.filter(date=date(2024, 1, 5)).exists())
+        record = {
+            'serial_number': self.part.serial_number,
+            'part_type': self.part_type.name,
+            'aircraft_type': self.aircraft_type.name,
+            'owner': 'test_member',
+            'created_at': '2024-02-01T10:00:00',
+        }
+
+        self.client.force_authenticate(user=self.admin_user)
+        upload = SimpleUploadedFile('parts.ndjson', json.dumps(record).encode())
+        response = self.client.post(url, {'file': upload, 'on_conflict': 'update'}, format='multipart')
+        self.assertEqual(response.data['imported'], 1)
+        self.assertFalse(DailyPartProduction.objects.filter(date=date(2024, 1, 5)).exists())
+        self.assertEqual(DailyPartProduction.objects.get(date=date(2024, 2, 1)).count, 1)
+
+    def test_typeahead_parts(self):
+        """Test that the typeahead returns a bounded list of available parts by the start of their serial number"""
+        url = self.get_api_url('inventory:parts-typeahead')
+        for serial_number in ('P-00C0FF01', 'P-00C0FF02', 'P-00C0FF03', 'P-00D00000', 'LEGACY-X1'):
+            Part.objects.create(part_type=self.part_type, aircraft_type=self.aircraft_type,
+                                owner=self.team_membership, serial_number=serial_number)
+        Part.objects.filter(serial_number='P-00C0FF03').update(is_used=True)
+        params = {'aircraft_type': self.aircraft_type.id, 'part_type': self.part_type.name}
+
+        self.client.force_authenticate(user=self.team_member)
+        response = self.client.get(url, {**params, 'q': 'p-00c0'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([part['serial_number'] for part in response.data['results']], ['P-00C0FF01', 'P-00C0FF02'])
+        self.assertFalse(response.data['has_more'])
+
+        response = self.client.get(url, {**params, 'q': '00C0', 'limit': 1})
+        self.assertEqual([part['serial_number'] for part in response.data['results']], ['P-00C0FF01'])
+        self.assertTrue(response.data['has_more'])
+
+        response = self.client.get(url, {**params, 'q': 'legacy'})
+        self.assertEqual([part['serial_number'] for part in response.data['results']], ['LEGACY-X1'])
+
+        response = self.client.get(url, {**params, 'part_type': 'Unknown'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_multi_get_parts(self):
+        """Test that parts are fetched by id in one query, in the requested order"""
+        url = self.get_api_url('inventory:parts-multi')
+        other = Part.objects.create(part_type=self.part_type, aircraft_type=self.aircraft_type,
+                                    owner=self.team_membership)
+
+        self.client.force_authenticate(user=self.team_member)
+        response = self.client.get(url, {'ids': f"{other.id},{self.part.id},0"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        with self.assertNumQueries(1):
+            response = self.client.post(url, {'ids': [other.id, 999999, self.part.id]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row and row['serial_number'] for row in response.data['results']],
+                         [other.serial_number, None, self.part.serial_number])
+        self.assertEqual(response.data['not_found'], [999999])
+
+    def test_available_parts_per_type_with_cursors(self):
+        """Test that at most per_type parts of each type are listed with the full counts, and cursors page the rest"""
+        other_type = PartType.objects.create(name="Other Part Type")
+        TeamPartPermission.objects.create(team_type=self.team_type, part_type=other_type, can_create=True)
+        AircraftPartRequirement.objects.create(aircraft_type=self.aircraft_type, part_type=self.part_type, quantity=2)
+        AircraftPartRequirement.objects.create(aircraft_type=self.aircraft_type, part_type=other_type, quantity=1)
+        parts = [self.part] + [
+            Part.objects.create(part_type=self.part_type, aircraft_type=self.aircraft_type, owner=self.team_membership)
+            for _ in range(4)
+        ]
+        others = [
+            Part.objects.create(part_type=other_type, aircraft_type=self.aircraft_type, owner=self.team_membership)
+            for _ in range(2)
+        ]
+        url = self.get_api_url('inventory:parts-available-parts', aircraft_id=self.aircraft_type.id)
+
+        self.client.force_authenticate(user=self.team_member)
+        response = self.client.get(url, {'per_type': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['can_assemble'])
+        self.assertEqual([part['id'] for part in response.data['parts']],
+                         [part.id for part in others] + [part.id for part in parts[:2]])
+        self.assertIsNone(response.data['cursors']['Other Part Type'])
+
+        # Follow the cursor of the part type to the end
+        seen = [part['id'] for part in response.data['parts'] if part['type'] == self.part_type.name]
+        cursor = response.data['cursors'][self.part_type.name]
+        while cursor:
+            response = self.client.get(url, {'per_type': 2, 'part_type': self.part_type.name, 'cursor': cursor})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen += [part['id'] for part in response.data['parts']]
+            cursor = response.data['cursor']
+        self.assertEqual(seen, [part.id for part in parts])
+
+        # Counts cover the parts beyond the page
+        Part.objects.filter(id__in=[part.id for part in parts[1:]]).update(is_used=True)
+        response = self.client.get(url, {'per_type': 1})
+        self.assertFalse(response.data['can_assemble'])
+        self.assertEqual(response.data['missing_parts'], [{'type': self.part_type.name, 'required': 2, 'available': 1}])
+
+        for params in ({'per_type': 0}, {'per_type': 'x'}, {'cursor': 'abc', 'per_type': 2},
+                       {'cursor': 'abc', 'per_type': 2, 'part_type': self.part_type.name}):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,16 +1,26 @@
+import io
 from rest_framework import viewsets, permissions, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.parsers import FormParser, MultiPartParser
 from django_filters import rest_framework as django_filters
-from django.db.models import Count
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from accounts.permissions import IsMemberOfTeam, IsSuperUserOrReadOnly
 from aircraft_manufacturing.responses import GeneralFailedResponseSerializer
 from aircraft_manufacturing.pagination import DataTablePagination
-from inventory.models import Part, PartType, TeamPartPermission
+from aircraft_manufacturing.multiget import MultiGetMixin
+from inventory.models import AVAILABLE_PARTS, PART_UNITS, Part, PartType, TeamPartPermission
 from inventory.serializers import PartSerializer, PartTypeSerializer, TeamPartPermissionSerializer
 from inventory.filters import PartFilter, PartTypeFilter, TeamPartPermissionFilter
+from inventory.constants import (
+    AVAILABLE_PARTS_MAX_PER_TYPE, PART_EXPORT_COLUMNS, TYPEAHEAD_LIMIT, TYPEAHEAD_MAX_LIMIT
+)
+from inventory.importers import IMPORT_CONFLICT_ACTIONS, PartImportError, get_import_format, import_parts
+from inventory.search import find_available_parts, get_next_parts, get_oldest_parts_by_type
+from aircraft_manufacturing.exports import EXPORT_PARAMETERS, streaming_export_response
 from .models import PartType
 from rest_framework.exceptions import MethodNotAllowed
 
@@ -159,7 +169,7 @@ class TeamPartPermissionViewSet(viewsets.ModelViewSet):
         return super().destroy(request, *args, **kwargs)
 
 
-class PartViewSet(viewsets.ModelViewSet):
+class PartViewSet(MultiGetMixin, viewsets.ModelViewSet):
     """API endpoint for managing parts."""
     queryset = Part.objects.select_related(
         'part_type',
@@ -502,6 +512,71 @@ class PartViewSet(viewsets.ModelViewSet):
         part.delete()
         return Response(status=204)
 
+    @swagger_auto_schema(
+        method='get',
+        operation_summary="Export parts",
+        operation_description="Stream all parts matching the list filters as CSV or NDJSON",
+        manual_parameters=EXPORT_PARAMETERS,
+        responses={
+            200: openapi.Response(description="CSV or NDJSON file, optionally gzip compressed"),
+            400: GeneralFailedResponseSerializer
+        }
+    )
+    @action(detail=False, methods=['get'], url_path='export', pagination_class=None)
+    def export(self, request, *args, **kwargs):
+        """Stream filtered parts without pagination."""
+        queryset = self.filter_queryset(self.get_queryset())
+        return streaming_export_response(request, queryset, PART_EXPORT_COLUMNS, filename='parts')
+
+    @swagger_auto_schema(
+        method='post',
+        operation_summary="Import parts",
+        operation_description=(
+            "Bulk import already serialised parts from a CSV or NDJSON file with serial_number, part_type, "
+            "aircraft_type, owner and optional created_at columns. Admin only."
+        ),
+        manual_parameters=[
+            openapi.Parameter('file', openapi.IN_FORM, type=openapi.TYPE_FILE, required=True,
+                              description="CSV or NDJSON file"),
+            openapi.Parameter('file_format', openapi.IN_FORM, type=openapi.TYPE_STRING, required=False,
+                              description="csv or ndjson, defaults to the file extension"),
+            openapi.Parameter('on_conflict', openapi.IN_FORM, type=openapi.TYPE_STRING, required=False,
+                              description="skip (default) or update parts with an existing serial number"),
+        ],
+        responses={
+            200: openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    'rows': openapi.Schema(type=openapi.TYPE_INTEGER),
+                    'invalid': openapi.Schema(type=openapi.TYPE_INTEGER),
+                    'imported': openapi.Schema(type=openapi.TYPE_INTEGER),
+                    'skipped': openapi.Schema(type=openapi.TYPE_INTEGER),
+                    'errors': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT)),
+                }
+            ),
+            400: GeneralFailedResponseSerializer,
+            403: GeneralFailedResponseSerializer
+        }
+    )
+    @action(detail=False, methods=['post'], url_path='import', permission_classes=[permissions.IsAdminUser],
+            parser_classes=[MultiPartParser, FormParser])
+    def import_parts(self, request, *args, **kwargs):
+        """Bulk import parts from an uploaded file."""
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response({"detail": "An import file is required"}, status=status.HTTP_400_BAD_REQUEST)
+        on_conflict = request.data.get('on_conflict', 'skip')
+        if on_conflict not in IMPORT_CONFLICT_ACTIONS:
+            return Response({"detail": f"Unsupported conflict action: {on_conflict}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            file_format = get_import_format(upload.name, request.data.get('file_format'))
+            stream = io.TextIOWrapper(upload.file, encoding='utf-8', newline='')
+            result = import_parts(stream, file_format, on_conflict=on_conflict)
+        except PartImportError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result.as_dict())
+
     @swagger_auto_schema(
         operation_summary="Get inventory status",
         operation_description="Get current inventory status for all part types",
@@ -514,6 +589,7 @@ class PartViewSet(viewsets.ModelViewSet):
                     properties={
                         'total': openapi.Schema(type=openapi.TYPE_INTEGER),
                         'available': openapi.Schema(type=openapi.TYPE_INTEGER),
+                        'reserved': openapi.Schema(type=openapi.TYPE_INTEGER),
                         'used': openapi.Schema(type=openapi.TYPE_INTEGER)
                     }
                 )
@@ -523,7 +599,7 @@ class PartViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], url_path='inventory-status', pagination_class=None, filterset_class=None)
     def inventory_status(self, request, *args, **kwargs):
         """Get inventory status for each aircraft type"""
-        from assembly.models import AircraftType, AircraftPartRequirement
+        from assembly.models import AircraftPart, AircraftType, AircraftPartRequirement
 
 
         inventory = {}
@@ -540,17 +616,26 @@ class PartViewSet(viewsets.ModelViewSet):
                 if not part_type:
                     continue
                     
-                parts = Part.objects.filter(
+                # Units are serialized parts or the quantities of lots, taken from lots when used
+                units = Part.objects.filter(
                     aircraft_type=aircraft_type,
                     part_type=part_type
+                ).aggregate(
+                    available=Coalesce(Sum(PART_UNITS, filter=AVAILABLE_PARTS), 0),
+                    reserved=Coalesce(Sum(PART_UNITS, filter=Q(is_used=False, reservation__isnull=False)), 0),
+                    used=Count('id', filter=Q(is_used=True, quantity__isnull=True)),
                 )
-                total = parts.count()
-                used = parts.filter(is_used=True).count()
+                units['used'] += AircraftPart.objects.filter(
+                    part__aircraft_type=aircraft_type,
+                    part__part_type=part_type,
+                    quantity__isnull=False
+                ).aggregate(total=Coalesce(Sum('quantity'), 0))['total']
                 
                 parts_status[part_type.name] = {
-                    'total': total,
-                    'available': total - used,
-                    'used': used
+                    'total': units['available'] + units['reserved'] + units['used'],
+                    'available': units['available'],
+                    'reserved': units['reserved'],
+                    'used': units['used']
                 }
             
             inventory[aircraft_type.name] = parts_status
@@ -559,7 +644,9 @@ class PartViewSet(viewsets.ModelViewSet):
 
     @swagger_auto_schema(
         operation_summary="Get available parts",
-        operation_description="Get list of available parts for a specific aircraft type",
+        operation_description="Get list of available parts for a specific aircraft type. With per_type only the "
+                              "oldest parts of each part type are listed, with a cursor per part type to page "
+                              "through the rest of it with cursor and part_type.",
         manual_parameters=[
             openapi.Parameter(
                 'aircraft_type',
@@ -567,6 +654,35 @@ class PartViewSet(viewsets.ModelViewSet):
                 description="Aircraft type to check parts for",
                 type=openapi.TYPE_STRING,
                 required=True
+            ),
+            openapi.Parameter(
+                'include_parts',
+                openapi.IN_QUERY,
+                description="List the available parts, false returns the counts only",
+                type=openapi.TYPE_BOOLEAN,
+                required=False
+            ),
+            openapi.Parameter(
+                'per_type',
+                openapi.IN_QUERY,
+                description=f"Parts listed per part type, at most {AVAILABLE_PARTS_MAX_PER_TYPE}",
+                type=openapi.TYPE_INTEGER,
+                required=False
+            ),
+            openapi.Parameter(
+                'cursor',
+                openapi.IN_QUERY,
+                description="Cursor of a part type from a previous response, returns the next per_type parts "
+                            "of that part type only",
+                type=openapi.TYPE_STRING,
+                required=False
+            ),
+            openapi.Parameter(
+                'part_type',
+                openapi.IN_QUERY,
+                description="Part type name of the cursor",
+                type=openapi.TYPE_STRING,
+                required=False
             )
         ],
         responses={
@@ -606,6 +722,12 @@ class PartViewSet(viewsets.ModelViewSet):
                             }
                         )
                     ),
+                    'cursors': openapi.Schema(
+                        type=openapi.TYPE_OBJECT,
+                        description="Cursor of the next parts of each part type, null when all are listed. "
+                                    "Only with per_type",
+                        additionalProperties=openapi.Schema(type=openapi.TYPE_STRING, x_nullable=True)
+                    ),
                     'detail': openapi.Schema(
                         type=openapi.TYPE_STRING,
                         description="Status message"
@@ -620,7 +742,8 @@ class PartViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], url_path='available/(?P<aircraft_id>[^/.]+)')
     def available_parts(self, request, *args, **kwargs):
         """Get available parts for a specific aircraft type."""
-        from assembly.models import AircraftType, AircraftPartRequirement
+        from assembly.bom import get_required_parts
+        from assembly.models import AircraftType
 
         # Get aircraft type from database
         aircraft_type_id = kwargs.get('aircraft_id')
@@ -632,37 +755,67 @@ class PartViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Get required parts from database
-        required_parts = {
-            req.part_type.name: req.quantity
-            for req in AircraftPartRequirement.objects.filter(aircraft_type=aircraft_type)
-        }
+        per_type = request.query_params.get('per_type')
+        if per_type is not None:
+            try:
+                per_type = int(per_type)
+                if not 0 < per_type <= AVAILABLE_PARTS_MAX_PER_TYPE:
+                    raise ValueError
+            except ValueError:
+                return Response(
+                    {"detail": f"per_type must be between 1 and {AVAILABLE_PARTS_MAX_PER_TYPE}"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        # Get available parts, reserved ones are held for other assemblies
+        available_parts = Part.objects.filter(
+            AVAILABLE_PARTS,
+            aircraft_type=aircraft_type
+        )
+
+        # Next parts of a single part type, the counts are those of the first page
+        cursor = request.query_params.get('cursor')
+        if cursor is not None:
+            part_type = request.query_params.get('part_type')
+            if per_type is None or not part_type:
+                return Response(
+                    {"detail": "cursor requires per_type and part_type"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            try:
+                parts, next_cursor = get_next_parts(available_parts, part_type, cursor, per_type)
+            except ValueError as e:
+                return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({'part_type': part_type, 'parts': parts, 'cursor': next_cursor})
+
+        # Get required leaf parts, sub-assemblies are exploded into their components
+        required_parts = get_required_parts(aircraft_type.pk)
         if not required_parts:
             return Response(
                 {"detail": f"No required parts defined for aircraft type: {aircraft_type.name}"}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Get available parts
-        available_parts = Part.objects.filter(
-            aircraft_type=aircraft_type,
-            is_used=False
-        ).select_related('part_type').order_by('part_type__name', 'created_at')
-
-        # Get available parts count for each type
-        parts_count = available_parts.values('part_type__name').annotate(
-            count=Count('id')
-        ).order_by('part_type__name')
+        include_parts = request.query_params.get('include_parts', 'true').lower() != 'false'
+        parts_by_type = cursors = None
+        if per_type is not None and include_parts:
+            # Counts and the oldest parts of each type in one windowed query
+            parts_count, parts_by_type, cursors = get_oldest_parts_by_type(available_parts, per_type)
+        else:
+            # Get available parts count for each type
+            parts_count = {
+                item['part_type__name']: item['count']
+                for item in available_parts.values('part_type__name').annotate(
+                    count=Sum(PART_UNITS)
+                ).order_by('part_type__name')
+            }
 
         # Check if we have all required parts
         can_assemble = True
         missing_parts = []
 
         for part_type, required_count in required_parts.items():
-            available_count = next(
-                (item['count'] for item in parts_count if item['part_type__name'] == part_type),
-                0
-            )
+            available_count = parts_count.get(part_type, 0)
             if available_count < required_count:
                 can_assemble = False
                 missing_parts.append({
@@ -671,22 +824,110 @@ class PartViewSet(viewsets.ModelViewSet):
                     'available': available_count
                 })
 
-        # Prepare parts list for frontend
+        # Prepare parts list for frontend, the part picker searches them with the typeahead instead
         parts = []
-        if can_assemble:
-            parts = [
-                {
-                    'id': part.id,
-                    'type': part.part_type.name,
-                    'created_at': part.created_at
-                }
-                for part in available_parts
-            ]
+        if can_assemble and include_parts:
+            if parts_by_type is not None:
+                parts = [part for part_type in sorted(parts_by_type) for part in parts_by_type[part_type]]
+            else:
+                parts = [
+                    {
+                        'id': part.id,
+                        'type': part.part_type.name,
+                        'created_at': part.created_at
+                    }
+                    for part in available_parts.select_related('part_type').order_by('part_type__name', 'created_at')
+                ]
 
-        return Response({
+        response = {
             'can_assemble': can_assemble,
             'missing_parts': missing_parts,
             'required_parts': required_parts,
             'parts': parts,
             'detail': "All required parts are available" if can_assemble else None
-        })
+        }
+        if cursors is not None:
+            response['cursors'] = cursors if can_assemble else {}
+        return Response(response)
+
+    @swagger_auto_schema(
+        operation_summary="Search available parts by serial number",
+        operation_description="Get the first available serialized parts of an aircraft type and part type whose "
+                              "serial number starts with the text, in serial order",
+        manual_parameters=[
+            openapi.Parameter(
+                'aircraft_type',
+                openapi.IN_QUERY,
+                description="Aircraft type ID",
+                type=openapi.TYPE_INTEGER,
+                required=True
+            ),
+            openapi.Parameter(
+                'part_type',
+                openapi.IN_QUERY,
+                description="Part type name",
+                type=openapi.TYPE_STRING,
+                required=True
+            ),
+            openapi.Parameter(
+                'q',
+                openapi.IN_QUERY,
+                description="Start of the serial number, the prefix may be left out",
+                type=openapi.TYPE_STRING,
+                required=False
+            ),
+            openapi.Parameter(
+                'limit',
+                openapi.IN_QUERY,
+                description=f"Parts returned (default {TYPEAHEAD_LIMIT}, at most {TYPEAHEAD_MAX_LIMIT})",
+                type=openapi.TYPE_INTEGER,
+                required=False
+            ),
+        ],
+        responses={
+            200: openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    'results': openapi.Schema(
+                        type=openapi.TYPE_ARRAY,
+                        items=openapi.Schema(
+                            type=openapi.TYPE_OBJECT,
+                            properties={
+                                'id': openapi.Schema(type=openapi.TYPE_INTEGER),
+                                'serial_number': openapi.Schema(type=openapi.TYPE_STRING),
+                                'created_at': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_DATETIME),
+                            }
+                        )
+                    ),
+                    'has_more': openapi.Schema(
+                        type=openapi.TYPE_BOOLEAN,
+                        description="Whether more parts match the text"
+                    ),
+                }
+            ),
+            400: GeneralFailedResponseSerializer
+        }
+    )
+    @action(detail=False, methods=['get'], url_path='typeahead', pagination_class=None, filterset_class=None)
+    def typeahead(self, request, *args, **kwargs):
+        """Search the available parts of an aircraft and part type by the start of their serial number."""
+        try:
+            aircraft_type_id = int(request.query_params.get('aircraft_type', ''))
+            limit = min(int(request.query_params.get('limit', TYPEAHEAD_LIMIT)), TYPEAHEAD_MAX_LIMIT)
+        except ValueError:
+            return Response(
+                {"detail": "aircraft_type and limit must be integers"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if limit < 1:
+            return Response({"detail": "limit must be positive"}, status=status.HTTP_400_BAD_REQUEST)
+        part_type = PartType.objects.filter(name=request.query_params.get('part_type', '')).first()
+        if not part_type:
+            return Response(
+                {"detail": f"Invalid part type: {request.query_params.get('part_type', '')}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # One more part than returned tells whether the list is complete
+        parts = find_available_parts(aircraft_type_id, part_type.pk, request.query_params.get('q', ''), limit + 1)
+        return Response({'results': parts[:limit], 'has_more': len(parts) > limit})
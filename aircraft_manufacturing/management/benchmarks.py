@@ -0,0 +1,378 @@
+"""Benchmark scenarios run by the `benchmark` management command."""
+import time
+from typing import Callable, Dict, Optional, Tuple
+from django.contrib.auth.models import User
+from django.db import connection
+from accounts.constants import TeamTypes
+from accounts.models import Team, TeamMember, TeamType
+from assembly.constants import DefaultAircraftTypes
+from assembly.models import AircraftType
+from inventory.constants import DefaultPartTypes
+from inventory.models import Part, PartType
+
+BENCHMARKS: Dict[str, Callable] = {}
+
+
+def benchmark(name: str):
+    """Register a benchmark scenario under the given name."""
+    def decorator(func):
+        BENCHMARKS[name] = func
+        return func
+    return decorator
+
+
+def timed(func: Callable, *args, **kwargs) -> Tuple[float, object]:
+    """Run the function and return (elapsed seconds, result)."""
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - started, result
+
+
+def get_benchmark_member() -> TeamMember:
+    """Get or create the team member owning the seeded benchmark data."""
+    team_type, _ = TeamType.objects.get_or_create(name=TeamTypes.WING)
+    team, _ = Team.objects.get_or_create(team_type=team_type, name=f"{TeamTypes.WING} Team")
+    user, _ = User.objects.get_or_create(username='benchmark')
+    member, _ = TeamMember.objects.get_or_create(user=user, defaults={'team': team})
+    return member
+
+
+def seed_parts(count: int, batch_size: int = 5000, part_types=None, aircraft_types=None,
+               lot_size: Optional[int] = None) -> int:
+    """Bulk insert unused parts spread over the given (or default) part and aircraft types, lots of lot_size if given."""
+    owner = get_benchmark_member()
+    part_types = part_types or [
+        PartType.objects.get_or_create(name=name)[0]
+        for name in DefaultPartTypes().__dict__.values()
+    ]
+    aircraft_types = aircraft_types or [
+        AircraftType.objects.get_or_create(name=name)[0]
+        for name in DefaultAircraftTypes().__dict__.values()
+    ]
+    offset = Part.objects.filter(serial_number__startswith='B-').count()
+    for start in range(0, count, batch_size):
+        Part.objects.bulk_create([
+            Part(
+                part_type=part_types[index % len(part_types)],
+                aircraft_type=aircraft_types[index // len(part_types) % len(aircraft_types)],
+                owner=owner,
+                serial_number=f"B-{offset + index:08X}",
+                quantity=lot_size,
+            )
+            for index in range(start, min(start + batch_size, count))
+        ], batch_size=batch_size)
+    return count
+
+
+def consume(stream) -> Tuple[int, int]:
+    """Drain a byte stream and return (total bytes, newline count)."""
+    size = 0
+    lines = 0
+    for chunk in stream:
+        size += len(chunk)
+        lines += chunk.count(b'\n')
+    return size, lines
+
+
+@benchmark('exports')
+def benchmark_exports(stdout, rows: int, **options):
+    """Compare the Python streaming export with the PostgreSQL COPY TO fast path."""
+    from aircraft_manufacturing.exports import iter_copy_export, iter_export
+    from inventory.constants import PART_EXPORT_COLUMNS
+    from inventory.views import PartViewSet
+
+    seed_parts(rows)
+    queryset = PartViewSet.queryset.order_by('-created_at')
+    total = queryset.count()
+    stdout.write(f"Exporting {total} parts")
+
+    backends = [('python csv', lambda: iter_export(queryset, PART_EXPORT_COLUMNS, 'csv')),
+                ('python ndjson', lambda: iter_export(queryset, PART_EXPORT_COLUMNS, 'ndjson'))]
+    if connection.vendor == 'postgresql':
+        backends.append(('copy csv', lambda: iter_copy_export(queryset, PART_EXPORT_COLUMNS)))
+    else:
+        stdout.write("COPY TO is only available on PostgreSQL, skipping the fast path")
+
+    for name, build_stream in backends:
+        elapsed, (size, _) = timed(consume, build_stream())
+        stdout.write(
+            f"{name:<16}{elapsed:>8.2f}s{total / elapsed:>12.0f} rows/s{size / elapsed / 1024 / 1024:>8.1f} MB/s"
+        )
+
+
+@benchmark('buildable')
+def benchmark_buildable(stdout, rows: int, types: int = 200, **options):
+    """Time the buildable report on a types x types requirement matrix against a per type loop."""
+    import random
+    from django.db.models import Sum
+    from analytics.buildable import get_buildable_report
+    from assembly.bom import invalidate_bom_cache
+    from assembly.models import AircraftPartRequirement
+    from inventory.models import AVAILABLE_PARTS, PART_UNITS
+
+    aircraft_types = AircraftType.objects.bulk_create([AircraftType(name=f"BENCH-A{index}") for index in range(types)])
+    part_types = PartType.objects.bulk_create([PartType(name=f"BENCH-P{index}") for index in range(types)])
+    rng = random.Random(0)
+    AircraftPartRequirement.objects.bulk_create([
+        AircraftPartRequirement(aircraft_type=aircraft_type, part_type=part_type, quantity=rng.randint(1, 4))
+        for aircraft_type in aircraft_types
+        for part_type in rng.sample(part_types, 10)
+    ])
+    # The bulk insert bypasses the signals dropping cached explosions
+    invalidate_bom_cache()
+    seed_parts(rows, part_types=part_types, aircraft_types=aircraft_types)
+    stdout.write(f"{types} aircraft types x {types} part types, {rows} parts")
+
+    def per_type_loop():
+        report = {}
+        for aircraft_type in AircraftType.objects.all():
+            required = dict(AircraftPartRequirement.objects.filter(
+                aircraft_type=aircraft_type
+            ).values_list('part_type__name', 'quantity'))
+            available = dict(Part.objects.filter(
+                AVAILABLE_PARTS, aircraft_type=aircraft_type
+            ).values_list('part_type__name').annotate(count=Sum(PART_UNITS)).order_by())
+            report[aircraft_type.name] = min(
+                (available.get(name, 0) // quantity for name, quantity in required.items()), default=0
+            )
+        return report
+
+    # The first report explodes and caches the requirements of every aircraft type
+    for name, func in [('per type loop', per_type_loop), ('numpy, cold bom', get_buildable_report),
+                       ('numpy matrices', get_buildable_report)]:
+        elapsed, _ = timed(func)
+        stdout.write(f"{name:<16}{elapsed * 1000:>10.1f}ms")
+
+
+def get_part_table_size() -> Optional[int]:
+    """Get the bytes used by the part table with its indexes, where the database reports it."""
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_total_relation_size(%s)", [Part._meta.db_table])
+        return cursor.fetchone()[0]
+
+
+@benchmark('lots')
+def benchmark_lots(stdout, rows: int, lot_size: int = 1000, **options):
+    """Compare the table growth and stock report latency of rows serialized parts with the same units in lots."""
+    from django.db.models import Sum
+    from inventory.models import AVAILABLE_PARTS, PART_UNITS
+
+    aircraft_types = [
+        AircraftType.objects.get_or_create(name=name)[0]
+        for name in DefaultAircraftTypes().__dict__.values()
+    ]
+    kinds = [
+        ('serialized', PartType.objects.create(name="BENCH-SERIAL"), rows, None),
+        ('lots', PartType.objects.create(name="BENCH-LOT", is_lot_tracked=True), -(-rows // lot_size), lot_size),
+    ]
+    stdout.write(f"{rows} units as serialized parts and in lots of {lot_size}")
+
+    for name, part_type, count, size in kinds:
+        size_before = get_part_table_size()
+        seed_parts(count, part_types=[part_type], aircraft_types=aircraft_types, lot_size=size)
+        table_size = f"{(get_part_table_size() - size_before) / 1024 / 1024:>8.2f} MB" if size_before is not None else ""
+
+        # Available units per aircraft type, as read by the inventory status and requirement checks
+        elapsed, units = timed(lambda: list(Part.objects.filter(
+            AVAILABLE_PARTS, part_type=part_type
+        ).values_list('aircraft_type_id').annotate(units=Sum(PART_UNITS)).order_by()))
+        stdout.write(
+            f"{name:<12}{count:>10} rows{table_size}{elapsed * 1000:>10.1f}ms "
+            f"report ({sum(total for _, total in units)} units)"
+        )
+
+
+def get_index_sizes(model, columns) -> Dict[str, Optional[int]]:
+    """Get the bytes used by the single column unique index of each column, where the database reports it."""
+    sizes = {column: None for column in columns}
+    if connection.vendor != 'postgresql':
+        return sizes
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, model._meta.db_table)
+        for name, constraint in constraints.items():
+            if constraint['unique'] and len(constraint['columns']) == 1 and constraint['columns'][0] in sizes:
+                cursor.execute("SELECT pg_relation_size(%s::regclass)", [connection.ops.quote_name(name)])
+                sizes[constraint['columns'][0]] = cursor.fetchone()[0]
+    return sizes
+
+
+@benchmark('serials')
+def benchmark_serials(stdout, rows: int, lookups: int = 1000, **options):
+    """Compare the serial number string index with the integer serial index: size, exact and prefix lookups."""
+    import random
+    from aircraft_manufacturing.serials import backfill_serials, get_serial_range
+
+    seed_parts(rows)
+    elapsed, (filled, _) = timed(backfill_serials, Part, 'B-')
+    stdout.write(f"Backfilled {filled} serials in {elapsed:.2f}s ({filled / elapsed:.0f} rows/s)")
+    if connection.vendor == 'postgresql':
+        # The indexes are rebuilt so the rows updated by the backfill leave no dead entries
+        with connection.cursor() as cursor:
+            cursor.execute(f"REINDEX TABLE {connection.ops.quote_name(Part._meta.db_table)}")
+            cursor.execute(f"ANALYZE {connection.ops.quote_name(Part._meta.db_table)}")
+
+    sizes = get_index_sizes(Part, ['serial_number', 'serial'])
+    sample = random.Random(0).sample(
+        list(Part.objects.filter(serial__isnull=False).values_list('serial_number', 'serial')), lookups
+    )
+    prefixes = [serial_number[:8] for serial_number, _ in sample[:100]]
+    cases = [
+        ('serial_number', sizes['serial_number'],
+         lambda: [Part.objects.filter(serial_number=serial_number).values_list('id').first()
+                  for serial_number, _ in sample],
+         lambda: [list(Part.objects.filter(serial_number__icontains=prefix).values_list('id'))
+                  for prefix in prefixes]),
+        ('serial', sizes['serial'],
+         lambda: [Part.objects.filter(serial=serial).values_list('id').first() for _, serial in sample],
+         lambda: [list(Part.objects.filter(serial__range=get_serial_range('B-', prefix)).values_list('id'))
+                  for prefix in prefixes]),
+    ]
+    for name, size, exact, prefix in cases:
+        index_size = f"{size / 1024 / 1024:>8.2f} MB" if size is not None else ""
+        exact_elapsed, _ = timed(exact)
+        prefix_elapsed, _ = timed(prefix)
+        stdout.write(
+            f"{name:<16}{index_size}{exact_elapsed / lookups * 1000:>10.3f}ms exact"
+            f"{prefix_elapsed / len(prefixes) * 1000:>10.3f}ms prefix"
+        )
+
+
+@benchmark('typeahead')
+def benchmark_typeahead(stdout, rows: int, lookups: int = 100, **options):
+    """Compare loading every available part of a type for the picker with the bounded serial typeahead."""
+    import random
+    from aircraft_manufacturing.serials import backfill_serials
+    from inventory.constants import TYPEAHEAD_LIMIT
+    from inventory.models import AVAILABLE_PARTS
+    from inventory.search import TYPEAHEAD_FIELDS, find_available_parts
+
+    seed_parts(rows)
+    backfill_serials(Part, 'B-')
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {connection.ops.quote_name(Part._meta.db_table)}")
+
+    aircraft_type_id, part_type_id = Part.objects.filter(serial__isnull=False).values_list(
+        'aircraft_type_id', 'part_type_id'
+    ).first()
+    parts = Part.objects.filter(AVAILABLE_PARTS, aircraft_type_id=aircraft_type_id, part_type_id=part_type_id)
+    # Serial numbers typed so far, from two to six digits
+    prefixes = [
+        serial_number[2:2 + length]
+        for serial_number, length in zip(
+            random.Random(0).sample(list(parts.values_list('serial_number', flat=True)), lookups),
+            random.Random(1).choices(range(2, 7), k=lookups)
+        )
+    ]
+
+    elapsed, listed = timed(lambda: list(parts.values(*TYPEAHEAD_FIELDS)))
+    stdout.write(f"{'full list':<16}{elapsed * 1000:>10.3f}ms {len(listed):>8} parts")
+    elapsed, found = timed(lambda: [
+        find_available_parts(aircraft_type_id, part_type_id, prefix, TYPEAHEAD_LIMIT) for prefix in prefixes
+    ])
+    stdout.write(
+        f"{'typeahead':<16}{elapsed / lookups * 1000:>10.3f}ms "
+        f"{sum(map(len, found)) / lookups:>8.1f} parts"
+    )
+    if connection.vendor == 'postgresql':
+        stdout.write(parts.filter(serial__range=(0, 36 ** 4)).values(*TYPEAHEAD_FIELDS).order_by('serial')[
+            :TYPEAHEAD_LIMIT
+        ].explain())
+
+
+@benchmark('trace')
+def benchmark_trace(stdout, rows: int, lookups: int = 2000, **options):
+    """Compare tracing part serial numbers one request at a time with the chunked batch lookup."""
+    import random
+    from assembly.traceability import trace_parts
+
+    seed_parts(rows)
+    serial_numbers = random.Random(0).sample(
+        list(Part.objects.filter(serial_number__startswith='B-').values_list('serial_number', flat=True)),
+        min(lookups, rows)
+    )
+    for name, func in [
+        ('one by one', lambda: [trace_parts([serial_number]) for serial_number in serial_numbers]),
+        ('chunked IN', lambda: trace_parts(serial_numbers)),
+    ]:
+        elapsed, _ = timed(func)
+        stdout.write(f"{name:<16}{elapsed * 1000:>10.1f}ms {len(serial_numbers)} serial numbers")
+
+
+@benchmark('available')
+def benchmark_available(stdout, rows: int, per_type: int = 20, **options):
+    """Compare listing every available part of an aircraft type with the first per_type parts of each part type."""
+    from django.db.models import Sum
+    from inventory.models import AVAILABLE_PARTS, PART_UNITS
+    from inventory.search import get_oldest_parts_by_type
+
+    seed_parts(rows)
+    aircraft_type_id = Part.objects.values_list('aircraft_type_id', flat=True).first()
+    parts = Part.objects.filter(AVAILABLE_PARTS, aircraft_type_id=aircraft_type_id)
+
+    def list_all():
+        counts = list(parts.values('part_type__name').annotate(count=Sum(PART_UNITS)).order_by('part_type__name'))
+        return counts, list(parts.values('id', 'part_type__name', 'created_at').order_by('part_type__name', 'created_at'))
+
+    elapsed, (_, listed) = timed(list_all)
+    stdout.write(f"{'full list':<16}{elapsed * 1000:>10.1f}ms {len(listed):>8} parts")
+    elapsed, (_, pages, _) = timed(get_oldest_parts_by_type, parts, per_type)
+    stdout.write(f"{'per type':<16}{elapsed * 1000:>10.1f}ms {sum(map(len, pages.values())):>8} parts")
+
+
+@benchmark('requirements')
+def benchmark_requirements(stdout, rows: int, **options):
+    """Compare the size and latency of the full requirements response with the summary."""
+    from rest_framework.test import APIRequestFactory, force_authenticate
+    from assembly.views import AircraftViewSet
+
+    seed_parts(rows)
+    user = get_benchmark_member().user
+    view = AircraftViewSet.as_view({'get': 'requirements'})
+
+    def get(params) -> bytes:
+        request = APIRequestFactory().get('/api/v1/assembly/aircraft/requirements/', params)
+        force_authenticate(request, user=user)
+        response = view(request, version='v1')
+        # The full response is streamed, the summary rendered in one pass
+        if response.streaming:
+            return b''.join(response.streaming_content)
+        return response.render().content
+
+    for name, params in [('full', {}), ('summary', {'summary': 'true'})]:
+        elapsed, content = timed(get, params)
+        stdout.write(f"{name:<16}{elapsed * 1000:>10.1f}ms {len(content) / 1024:>12.1f}KiB")
+
+
+@benchmark('streaming')
+def benchmark_streaming(stdout, rows: int, **options):
+    """Compare the peak Python memory of rendering a list in one pass with the streaming JSON renderer."""
+    import tracemalloc
+    from rest_framework.renderers import JSONRenderer
+    from aircraft_manufacturing.streaming import StreamingJSONRenderer
+
+    seed_parts(rows)
+    parts = Part.objects.filter(serial_number__startswith='B-').values(
+        'id', 'serial_number', 'part_type_id', 'aircraft_type_id', 'created_at'
+    ).order_by('id')
+
+    def peak(func) -> Tuple[float, int, object]:
+        tracemalloc.start()
+        try:
+            elapsed, result = timed(func)
+            return elapsed, tracemalloc.get_traced_memory()[1], result
+        finally:
+            tracemalloc.stop()
+
+    for size in (rows // 8, rows // 4, rows // 2, rows):
+        for name, func in [
+            ('in memory', lambda: len(JSONRenderer().render(list(parts[:size])))),
+            ('streaming', lambda: consume(StreamingJSONRenderer().render_stream(parts[:size]))[0]),
+        ]:
+            elapsed, peak_bytes, size_bytes = peak(func)
+            stdout.write(
+                f"{name:<16}{size:>8} rows{elapsed * 1000:>10.1f}ms {peak_bytes / 2 ** 20:>8.1f}MiB peak "
+                f"{size_bytes / 2 ** 20:>8.1f}MiB rendered"
+            )
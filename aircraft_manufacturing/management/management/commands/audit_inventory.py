@@ -0,0 +1,42 @@
+import time
+from django.core.management.base import BaseCommand
+from inventory.audit import AUDIT_CHUNK_SIZE, audit_inventory
+
+
+class Command(BaseCommand):
+    help = 'Check part usage flags against aircraft part links and aircraft against their requirements'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Fix the part usage flags instead of only reporting them')
+        parser.add_argument('--chunk-size', type=int, default=AUDIT_CHUNK_SIZE, help='Rows checked per query')
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to sleep between chunks')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+
+        def progress(table, result):
+            scanned = result.parts + result.aircraft
+            self.stdout.write(
+                f"{result.parts} parts, {result.aircraft} aircraft checked, {result.mismatches} mismatches "
+                f"({scanned / (time.monotonic() - started):.0f} rows/s)"
+            )
+
+        result = audit_inventory(
+            fix=options['fix'],
+            chunk_size=options['chunk_size'],
+            pause=options['pause'],
+            progress=progress
+        )
+
+        for name, check in result.checks.items():
+            if not check.found:
+                continue
+            fixed = f", {check.fixed} fixed" if options['fix'] and check.fixed else ""
+            self.stdout.write(self.style.WARNING(
+                f"{check.description}: {check.found}{fixed} (e.g. ids {', '.join(map(str, check.samples))})"
+            ))
+        style = self.style.SUCCESS if not result.mismatches else self.style.WARNING
+        self.stdout.write(style(
+            f"Audited {result.parts} parts and {result.aircraft} aircraft in {time.monotonic() - started:.1f}s, "
+            f"{result.mismatches} mismatches"
+        ))
@@ -0,0 +1,32 @@
+import time
+from django.core.management.base import BaseCommand
+from aircraft_manufacturing.serials import SERIAL_BACKFILL_CHUNK_SIZE, backfill_serials
+from assembly.constants import AIRCRAFT_SERIAL_PREFIX
+from assembly.models import Aircraft
+from inventory.constants import PART_SERIAL_PREFIX
+from inventory.models import Part
+
+
+class Command(BaseCommand):
+    help = 'Fill the integer serials of parts and aircraft stored with serial number strings only'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=SERIAL_BACKFILL_CHUNK_SIZE,
+                            help='Rows updated per transaction')
+
+    def handle(self, *args, **options):
+        for model, prefix in [(Part, PART_SERIAL_PREFIX), (Aircraft, AIRCRAFT_SERIAL_PREFIX)]:
+            started = time.monotonic()
+            name = model._meta.verbose_name_plural
+
+            def progress(filled, skipped):
+                self.stdout.write(
+                    f"{filled} {name} filled, {skipped} skipped "
+                    f"({(filled + skipped) / (time.monotonic() - started):.0f} rows/s)"
+                )
+
+            filled, skipped = backfill_serials(model, prefix, chunk_size=options['chunk_size'], progress=progress)
+            self.stdout.write(self.style.SUCCESS(
+                f"Filled {filled} {name} in {time.monotonic() - started:.1f}s, "
+                f"{skipped} with serial numbers in another format kept as strings"
+            ))
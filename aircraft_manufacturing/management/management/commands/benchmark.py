@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from management.benchmarks import BENCHMARKS
+
+
+class Command(BaseCommand):
+    help = 'Run a performance benchmark scenario against the configured database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenario', choices=sorted(BENCHMARKS), help='Benchmark scenario to run')
+        parser.add_argument('--rows', type=int, default=100000, help='Number of rows to seed for the scenario')
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Keep the seeded data instead of rolling it back',
+        )
+
+    def handle(self, *args, **options):
+        scenario = options['scenario']
+        self.stdout.write(self.style.NOTICE(f"Running {scenario} benchmark with {options['rows']} rows..."))
+
+        # Seeded data lives in a transaction which is rolled back unless --keep is given
+        with transaction.atomic():
+            BENCHMARKS[scenario](self.stdout, **options)
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS(f"\n{scenario} benchmark completed."))
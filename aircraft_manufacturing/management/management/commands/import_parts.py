@@ -0,0 +1,46 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from inventory.importers import (
+    IMPORT_CHUNK_SIZE, IMPORT_CONFLICT_ACTIONS, IMPORT_FORMATS, PartImportError, get_import_format, import_parts
+)
+
+
+class Command(BaseCommand):
+    help = 'Bulk import already serialised parts from a CSV or NDJSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or NDJSON file with serial_number, part_type, aircraft_type, owner, created_at')
+        parser.add_argument('--format', dest='file_format', choices=IMPORT_FORMATS, help='Defaults to the file extension')
+        parser.add_argument('--on-conflict', choices=IMPORT_CONFLICT_ACTIONS, default='skip',
+                            help='What to do with parts whose serial number already exists')
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE, help='Rows validated and loaded per transaction')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+
+        def progress(result):
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f"{result.rows} rows read, {result.imported} imported, {result.skipped} skipped, "
+                f"{result.invalid} invalid ({result.rows / elapsed:.0f} rows/s)"
+            )
+
+        try:
+            file_format = get_import_format(options['path'], options['file_format'])
+            with open(options['path'], encoding='utf-8', newline='') as stream:
+                result = import_parts(
+                    stream,
+                    file_format,
+                    on_conflict=options['on_conflict'],
+                    chunk_size=options['chunk_size'],
+                    progress=progress
+                )
+        except (OSError, PartImportError) as e:
+            raise CommandError(str(e))
+
+        for error in result.errors:
+            self.stdout.write(self.style.WARNING(f"Line {error['line']}: {error['detail']}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result.imported} of {result.rows} rows in {time.monotonic() - started:.1f}s "
+            f"({result.skipped} skipped, {result.invalid} invalid)"
+        ))
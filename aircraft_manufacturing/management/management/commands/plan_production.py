@@ -0,0 +1,53 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from analytics.constants import DEFAULT_HISTORY_DAYS
+from analytics.planning import PlanningError, get_production_plan
+
+
+def parse_target(value: str):
+    name, _, count = value.partition('=')
+    if not name or not count.isdigit():
+        raise ValueError(value)
+    return name, int(count)
+
+
+class Command(BaseCommand):
+    help = 'Plan the parts every team has to produce to assemble the target aircraft'
+
+    def add_arguments(self, parser):
+        parser.add_argument('targets', nargs='+', type=parse_target, help='Targets as TYPE=COUNT, e.g. TB2=20 AKINCI=5')
+        parser.add_argument('--deadline', type=date.fromisoformat, help='Date the aircraft should be ready by (YYYY-MM-DD)')
+        parser.add_argument('--history-days', type=int, default=DEFAULT_HISTORY_DAYS,
+                            help='Days of production history used to estimate team rates')
+
+    def handle(self, *args, **options):
+        try:
+            plan = get_production_plan(
+                dict(options['targets']),
+                deadline=options['deadline'],
+                history_days=options['history_days'],
+            )
+        except PlanningError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.NOTICE("Parts to produce"))
+        for name, part_plan in plan['part_types'].items():
+            line = (f"  {name:<12} required {part_plan['required']:>6}  in stock {part_plan['available']:>6}  "
+                    f"to produce {part_plan['to_produce']:>6}")
+            if part_plan['unassigned']:
+                line += self.style.ERROR(f"  no team for {part_plan['unassigned']}")
+            self.stdout.write(line)
+
+        self.stdout.write(self.style.NOTICE("\nTeams"))
+        for team in plan['teams']:
+            parts = ', '.join(f"{name} {count} ({team['daily_rate'][name]}/day)" for name, count in team['parts'].items())
+            self.stdout.write(f"  {team['team_name']:<20} {parts}  ready {team['estimated_completion'] or 'unknown'}")
+
+        assembly = plan['assembly']
+        self.stdout.write(
+            f"\nAssembly: {assembly['aircraft']} aircraft at {assembly['daily_rate']}/day, "
+            f"ready {assembly['estimated_completion'] or 'unknown'}"
+        )
+        completion = plan['estimated_completion'] or 'unknown (no production history)'
+        style = self.style.SUCCESS if plan['on_track'] is not False else self.style.ERROR
+        self.stdout.write(style(f"Estimated completion: {completion}"))
@@ -0,0 +1,47 @@
+import time
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+from analytics.constants import RECOMPUTE_WINDOW_DAYS
+from analytics.rollups import recompute_rollups
+from assembly.models import Aircraft
+from inventory.models import Part
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily production rollups for a date range'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat,
+                            help='First day to rebuild (YYYY-MM-DD). Defaults to the first production day')
+        parser.add_argument('--end', type=date.fromisoformat, help='Last day to rebuild (YYYY-MM-DD). Defaults to today')
+        parser.add_argument('--window-days', type=int, default=RECOMPUTE_WINDOW_DAYS,
+                            help='Days rebuilt per transaction')
+
+    def handle(self, *args, **options):
+        end = options['end'] or timezone.localdate()
+        start = options['start']
+        if not start:
+            first_records = [
+                Part.objects.aggregate(first=Min('created_at'))['first'],
+                Aircraft.objects.aggregate(first=Min('created_at'))['first'],
+            ]
+            first_records = [timezone.localdate(value) for value in first_records if value]
+            if not first_records:
+                self.stdout.write(self.style.WARNING("No parts or aircraft to roll up."))
+                return
+            start = min(first_records)
+        if start > end:
+            raise CommandError("Start date must be before the end date")
+
+        started = time.monotonic()
+
+        def progress(window_start, window_end):
+            self.stdout.write(f"Rebuilt {window_start} - {window_end}")
+
+        part_rows, assembly_rows = recompute_rollups(start, end, window_days=options['window_days'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {part_rows} part production and {assembly_rows} assembly rows "
+            f"for {start} - {end} in {time.monotonic() - started:.1f}s"
+        ))
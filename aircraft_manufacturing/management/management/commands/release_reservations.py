@@ -0,0 +1,23 @@
+import time
+from django.core.management.base import BaseCommand
+from assembly.constants import RESERVATION_SWEEP_BATCH_SIZE
+from assembly.reservations import release_expired_reservations
+
+
+class Command(BaseCommand):
+    help = 'Release the parts of expired part kit reservations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=RESERVATION_SWEEP_BATCH_SIZE,
+                            help='Reservations released per transaction')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+
+        def progress(reservations, parts):
+            self.stdout.write(f"Released {reservations} reservations holding {parts} parts")
+
+        total = release_expired_reservations(batch_size=options['batch_size'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(
+            f"Released {total} expired reservations in {time.monotonic() - started:.1f}s"
+        ))
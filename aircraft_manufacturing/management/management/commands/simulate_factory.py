@@ -0,0 +1,84 @@
+import os
+import time
+from django.core.management.base import BaseCommand, CommandError
+from analytics.constants import DEFAULT_HISTORY_DAYS
+from analytics.simulation import DEFAULT_TEAM_RATE, load_factory_config, simulate
+
+
+def parse_pair(value: str):
+    name, _, number = value.rpartition('=')
+    if not name:
+        raise ValueError(value)
+    return name, float(number)
+
+
+class Command(BaseCommand):
+    help = 'Simulate the factory with Monte Carlo replications to estimate throughput and bottlenecks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=float, default=30, help='Simulated days per replication')
+        parser.add_argument('--replications', type=int, default=200, help='Number of Monte Carlo replications')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes')
+        parser.add_argument('--seed', type=int, help='Random seed for reproducible results')
+        parser.add_argument('--history-days', type=int, default=DEFAULT_HISTORY_DAYS,
+                            help='Days of production history used to measure team rates')
+        parser.add_argument('--default-rate', type=float, default=DEFAULT_TEAM_RATE,
+                            help='Parts per day of teams without production history')
+        parser.add_argument('--mix', nargs='+', type=parse_pair, default=[],
+                            help='Aircraft mix as TYPE=WEIGHT, e.g. TB3=1. Defaults to the assembled mix')
+        parser.add_argument('--rate', nargs='+', type=parse_pair, default=[],
+                            help='Override team rates as "TEAM NAME=PARTS_PER_DAY"')
+        parser.add_argument('--add-team', nargs='+', default=[],
+                            help='Add a team working like the named team, e.g. "AVIONICS Team"')
+        parser.add_argument('--assembly-teams', type=int, help='Number of assembly teams')
+        parser.add_argument('--assembly-rate', type=float,
+                            help='Aircraft per day of a single assembly team. Defaults to the capacity measured on '
+                                 'the busiest assembly days of the history, required when there are too few of them')
+        parser.add_argument('--with-stock', action='store_true', help='Start from the current unused stock')
+
+    def handle(self, *args, **options):
+        try:
+            config = load_factory_config(
+                days=options['days'],
+                history_days=options['history_days'],
+                mix=dict(options['mix']) or None,
+                with_stock=options['with_stock'],
+                default_team_rate=options['default_rate'],
+                assembly_rate=options['assembly_rate'],
+            )
+            for name, rate in options['rate']:
+                if name not in config.team_names:
+                    raise ValueError(f"Unknown team: {name}")
+                config.team_rates[config.team_names.index(name)] = rate
+            for name in options['add_team']:
+                config = config.with_team_copy(name)
+        except ValueError as e:
+            raise CommandError(str(e))
+        if options['assembly_teams']:
+            config.assembly_teams = options['assembly_teams']
+
+        self.stdout.write(self.style.NOTICE(
+            f"Simulating {options['replications']} x {config.days:g} days on {options['workers']} workers..."
+        ))
+        started = time.monotonic()
+        report = simulate(config, replications=options['replications'], workers=options['workers'], seed=options['seed'])
+        self.stdout.write(f"Finished in {time.monotonic() - started:.1f}s\n")
+
+        self.stdout.write(self.style.NOTICE("Throughput (aircraft)          mean     std      p5     p50     p95"))
+        for name, stats in list(report['throughput'].items()) + [('Total', report['total_throughput'])]:
+            self.stdout.write(
+                f"  {name:<26}{stats['mean']:>8}{stats['std']:>8}{stats['p5']:>8g}{stats['p50']:>8g}{stats['p95']:>8g}"
+            )
+
+        assembly = report['assembly']
+        self.stdout.write(self.style.NOTICE("\nUtilisation"))
+        self.stdout.write(
+            f"  {'Assembly':<26}{assembly['utilisation']:>8.1%}  ({assembly['teams']} teams at {assembly['rate']:.2f}/day)"
+        )
+        for name, team in report['teams'].items():
+            self.stdout.write(f"  {name:<26}{team['utilisation']:>8.1%}  ({team['rate']:.2f} parts/day)")
+
+        self.stdout.write(self.style.NOTICE("\nAssembly waiting for parts"))
+        for name, share in report['starvation'].items():
+            self.stdout.write(f"  {name:<26}{share:>8.1%}")
+        self.stdout.write(self.style.SUCCESS(f"\nBottleneck: {report['bottleneck']}"))
@@ -0,0 +1,296 @@
+import json
+import random
+import statistics
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+from typing import Dict, List, Optional, Tuple
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import HTTPCookieProcessor, Request, build_opener
+
+from django.core.management.base import BaseCommand, CommandError
+from accounts.constants import DEFAULT_TEAM_USERS, TeamTypes
+from accounts.models import TeamMember
+from assembly.models import AircraftType
+from inventory.models import TeamPartPermission
+
+
+class LoadStats:
+    """Thread-safe collector for request latencies, statuses and assembly results."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+        self.errors: Counter = Counter()
+        self.parts_created = 0
+        self.aircraft_created = 0
+        self.assembly_skipped = 0
+        # part id -> serial numbers of the aircraft that reported using it
+        self.part_usage: Dict[int, List[str]] = defaultdict(list)
+        self.lost_parts: List[Tuple[str, int]] = []
+
+    def record(self, endpoint: str, status_code: int, elapsed: float, error: Optional[str] = None):
+        with self._lock:
+            self.latencies[endpoint].append(elapsed)
+            self.statuses[endpoint][status_code] += 1
+            if error:
+                self.errors[f"{endpoint}: {error}"] += 1
+
+    def record_part(self):
+        with self._lock:
+            self.parts_created += 1
+
+    def record_skip(self):
+        with self._lock:
+            self.assembly_skipped += 1
+
+    def record_aircraft(self, serial_number: str, submitted_ids: List[int], used_ids: List[int]):
+        with self._lock:
+            self.aircraft_created += 1
+            for part_id in used_ids:
+                self.part_usage[part_id].append(serial_number)
+            for part_id in set(submitted_ids) - set(used_ids):
+                self.lost_parts.append((serial_number, part_id))
+
+    def double_used_parts(self) -> Dict[int, List[str]]:
+        return {part_id: serials for part_id, serials in self.part_usage.items() if len(serials) > 1}
+
+
+class ApiClient:
+    """Minimal session-authenticated client for a single simulated user."""
+
+    def __init__(self, base_url: str, timeout: float):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.cookies = CookieJar()
+        self.opener = build_opener(HTTPCookieProcessor(self.cookies))
+
+    def _csrf_token(self) -> str:
+        for cookie in self.cookies:
+            if cookie.name == 'csrftoken':
+                return cookie.value
+        return ''
+
+    def login(self, username: str, password: str) -> None:
+        login_url = f"{self.base_url}/login/"
+        self.opener.open(login_url, timeout=self.timeout).read()
+        body = urlencode({
+            'username': username,
+            'password': password,
+            'csrfmiddlewaretoken': self._csrf_token(),
+        }).encode()
+        request = Request(login_url, data=body, headers={'Referer': login_url})
+        self.opener.open(request, timeout=self.timeout).read()
+        if not any(cookie.name == 'sessionid' for cookie in self.cookies):
+            raise CommandError(f"Login failed for user {username}")
+
+    def request(self, method: str, path: str, payload: Optional[dict] = None) -> Tuple[int, Optional[dict], float]:
+        """Send a request and return (status, decoded body, elapsed seconds)."""
+        headers = {'Accept': 'application/json', 'Referer': self.base_url}
+        data = None
+        if payload is not None:
+            data = json.dumps(payload).encode()
+            headers['Content-Type'] = 'application/json'
+            headers['X-CSRFToken'] = self._csrf_token()
+        request = Request(f"{self.base_url}{path}", data=data, headers=headers, method=method)
+        started = time.perf_counter()
+        try:
+            with self.opener.open(request, timeout=self.timeout) as response:
+                raw = response.read()
+                status_code = response.status
+        except HTTPError as e:
+            raw = e.read()
+            status_code = e.code
+        elapsed = time.perf_counter() - started
+        try:
+            body = json.loads(raw) if raw else None
+        except ValueError:
+            body = None
+        return status_code, body, elapsed
+
+
+class Command(BaseCommand):
+    help = (
+        'Simulate concurrent shop floor load against a running server: producer teams create parts '
+        'while assembly teams fetch available parts and assemble aircraft'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://localhost:8000', help='Server to load')
+        parser.add_argument('--producers', type=int, default=8, help='Number of concurrent part producers')
+        parser.add_argument('--assemblers', type=int, default=2, help='Number of concurrent assemblers')
+        parser.add_argument('--duration', type=float, default=60.0, help='Duration of the run in seconds')
+        parser.add_argument('--think-time', type=float, default=1.0,
+                            help='Mean think time between actions in seconds (exponentially distributed)')
+        parser.add_argument('--password', default='123456', help='Password of the default team users')
+        parser.add_argument('--timeout', type=float, default=30.0, help='Per request timeout in seconds')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed for reproducible runs')
+
+    def handle(self, *args, **options):
+        if options['seed'] is not None:
+            random.seed(options['seed'])
+
+        self.base_url = options['base_url']
+        self.password = options['password']
+        self.timeout = options['timeout']
+        self.think_time = options['think_time']
+        self.stats = LoadStats()
+
+        # The catalog is read from the configured database, so the server must share it
+        aircraft_type_ids = list(AircraftType.objects.values_list('id', flat=True))
+        if not aircraft_type_ids:
+            raise CommandError("No aircraft types found, run migrations first")
+        producer_users = self.get_producer_users()
+        assembler_users = [username for username, *_ in DEFAULT_TEAM_USERS[TeamTypes.ASSEMBLY]]
+        if not producer_users or not assembler_users:
+            raise CommandError("Default team users are missing, run migrations first")
+
+        deadline = time.monotonic() + options['duration']
+        workers = []
+        for index in range(options['producers']):
+            username, part_type_ids = producer_users[index % len(producer_users)]
+            workers.append((self.run_producer, username, part_type_ids, aircraft_type_ids))
+        for index in range(options['assemblers']):
+            workers.append((self.run_assembler, assembler_users[index % len(assembler_users)], aircraft_type_ids))
+
+        self.stdout.write(self.style.NOTICE(
+            f"Running {options['producers']} producers and {options['assemblers']} assemblers "
+            f"against {self.base_url} for {options['duration']:.0f}s..."
+        ))
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=len(workers)) as executor:
+            futures = [executor.submit(worker, *worker_args, deadline=deadline) for worker, *worker_args in workers]
+            for future in futures:
+                future.result()
+        self.report(time.monotonic() - started)
+
+    def get_producer_users(self) -> List[Tuple[str, List[int]]]:
+        """Return (username, creatable part type ids) for every default producer user."""
+        producers = []
+        for team_type_name, users in DEFAULT_TEAM_USERS.items():
+            if team_type_name in (TeamTypes.ADMIN, TeamTypes.ASSEMBLY):
+                continue
+            for username, *_ in users:
+                member = TeamMember.objects.select_related('team').filter(user__username=username).first()
+                if not member:
+                    continue
+                part_type_ids = list(TeamPartPermission.objects.filter(
+                    team_type=member.team.team_type_id,
+                    can_create=True
+                ).values_list('part_type_id', flat=True))
+                if part_type_ids:
+                    producers.append((username, part_type_ids))
+        return producers
+
+    def think(self):
+        if self.think_time > 0:
+            time.sleep(random.expovariate(1 / self.think_time))
+
+    def login(self, username: str) -> ApiClient:
+        client = ApiClient(self.base_url, self.timeout)
+        client.login(username, self.password)
+        return client
+
+    def call(self, client: ApiClient, endpoint: str, method: str, path: str, payload: Optional[dict] = None):
+        """Send a request and record it under the given endpoint label."""
+        try:
+            status_code, body, elapsed = client.request(method, path, payload)
+        except (URLError, OSError) as e:
+            self.stats.record(endpoint, 0, 0.0, error=type(e).__name__)
+            return 0, None
+        error = None
+        if status_code >= 400:
+            error = (body or {}).get('detail', f"HTTP {status_code}") if isinstance(body, dict) else f"HTTP {status_code}"
+        self.stats.record(endpoint, status_code, elapsed, error=error)
+        return status_code, body
+
+    def run_producer(self, username: str, part_type_ids: List[int], aircraft_type_ids: List[int], deadline: float):
+        client = self.login(username)
+        while time.monotonic() < deadline:
+            status_code, _ = self.call(client, 'create part', 'POST', '/api/v1/inventory/parts/', {
+                'part_type': random.choice(part_type_ids),
+                'aircraft_type': random.choice(aircraft_type_ids),
+            })
+            if status_code == 201:
+                self.stats.record_part()
+            self.think()
+
+    def run_assembler(self, username: str, aircraft_type_ids: List[int], deadline: float):
+        client = self.login(username)
+        while time.monotonic() < deadline:
+            aircraft_type_id = random.choice(aircraft_type_ids)
+            status_code, body = self.call(
+                client, 'available parts', 'GET', f'/api/v1/inventory/parts/available/{aircraft_type_id}/'
+            )
+            if status_code != 200 or not body or not body.get('can_assemble'):
+                self.stats.record_skip()
+                self.think()
+                continue
+
+            # Operators pick from the top of each list, which is what makes contention realistic
+            self.think()
+            parts = {}
+            submitted_ids = []
+            for part_type, required_count in body['required_parts'].items():
+                candidates = [part['id'] for part in body['parts'] if part['type'] == part_type]
+                picked = candidates[:required_count]
+                parts[f"{part_type.lower()}_ids"] = picked
+                submitted_ids.extend(picked)
+
+            status_code, body = self.call(client, 'assemble aircraft', 'POST', '/api/v1/assembly/aircraft/', {
+                'aircraft_type': aircraft_type_id,
+                'parts': parts,
+            })
+            if status_code == 201 and body:
+                used_ids = [used_part['part'] for used_part in body.get('used_parts', [])]
+                self.stats.record_aircraft(body['serial_number'], submitted_ids, used_ids)
+            self.think()
+
+    def report(self, elapsed: float):
+        stats = self.stats
+        total_requests = sum(sum(counter.values()) for counter in stats.statuses.values())
+        total_errors = sum(
+            count for counter in stats.statuses.values()
+            for status_code, count in counter.items() if status_code == 0 or status_code >= 400
+        )
+
+        self.stdout.write(self.style.SUCCESS(f"\nCompleted in {elapsed:.1f}s"))
+        self.stdout.write(
+            f"Requests: {total_requests} ({total_requests / elapsed:.1f} req/s), "
+            f"errors: {total_errors} ({(total_errors / total_requests * 100) if total_requests else 0:.1f}%)"
+        )
+        self.stdout.write(
+            f"Parts created: {stats.parts_created} ({stats.parts_created / elapsed:.2f}/s), "
+            f"aircraft assembled: {stats.aircraft_created} ({stats.aircraft_created / elapsed:.2f}/s), "
+            f"assemblies skipped: {stats.assembly_skipped}"
+        )
+
+        self.stdout.write("\nLatency (ms)")
+        self.stdout.write(f"{'endpoint':<20}{'count':>8}{'p50':>10}{'p90':>10}{'p95':>10}{'p99':>10}{'max':>10}  statuses")
+        for endpoint, latencies in sorted(stats.latencies.items()):
+            values = sorted(latency * 1000 for latency in latencies if latency > 0) or [0.0]
+            quantiles = statistics.quantiles(values, n=100, method='inclusive') if len(values) > 1 else values * 99
+            statuses = ', '.join(f"{code}={count}" for code, count in sorted(stats.statuses[endpoint].items()))
+            self.stdout.write(
+                f"{endpoint:<20}{len(latencies):>8}{quantiles[49]:>10.1f}{quantiles[89]:>10.1f}"
+                f"{quantiles[94]:>10.1f}{quantiles[98]:>10.1f}{values[-1]:>10.1f}  {statuses}"
+            )
+
+        if stats.errors:
+            self.stdout.write("\nTop errors")
+            for message, count in stats.errors.most_common(10):
+                self.stdout.write(f"  {count:>6}  {message}")
+
+        double_used = stats.double_used_parts()
+        if double_used or stats.lost_parts:
+            self.stdout.write(self.style.ERROR(
+                f"\nDouble-used parts: {len(double_used)}, submitted parts missing from aircraft: {len(stats.lost_parts)}"
+            ))
+            for part_id, serials in list(double_used.items())[:10]:
+                self.stdout.write(self.style.ERROR(f"  part {part_id} used by {', '.join(serials)}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("\nNo double-used parts detected"))
@@ -0,0 +1,14 @@
+import io
+from django.test import TestCase
+from management.benchmarks import BENCHMARKS
+
+
+class BenchmarkSmokeTests(TestCase):
+    def test_every_benchmark_runs(self):
+        """Test that every benchmark scenario runs to the end on a small data set"""
+        for name, scenario in sorted(BENCHMARKS.items()):
+            with self.subTest(name):
+                stdout = io.StringIO()
+                # Sizes of the scenario specific options small enough for the seeded rows
+                scenario(stdout, rows=200, lookups=5, types=10, lot_size=10, per_type=2)
+                self.assertTrue(stdout.getvalue())